@@ -231,42 +231,54 @@ class ResourceMonitor:
         }
 
 class AdaptiveRateLimiter:
-    """Limiteur de débit adaptatif"""
+    """Limiteur de débit adaptatif (GCRA, un horodatage par clé)
     
-    def __init__(self):
-        self.request_counts = defaultdict(list)
+    Chaque clé ne garde que son heure d'arrivée théorique (TAT) : chaque
+    requête la repousse de 60 / limite secondes, et une requête est refusée
+    quand la TAT dépasserait maintenant + 60 s.
+    """
+    
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.arrival_times = OrderedDict()  # clé -> TAT, la plus anciennement écrite en tête
+        self._lock = threading.Lock()
         self.base_limits = {
             'api': 100,      # requêtes par minute
             'search': 50,
             'upload': 10
         }
         self.current_limits = self.base_limits.copy()
-        self.blocked_ips = set()
+        self.blocked_ips = {}  # ip -> fin du blocage
     
     def is_allowed(self, identifier: str, endpoint_type: str = 'api') -> bool:
         """Vérifie si la requête est autorisée"""
-        if identifier in self.blocked_ips:
-            return False
-        
-        now = time.time()
-        minute_ago = now - 60
-        
-        # Nettoyer les anciennes requêtes
-        self.request_counts[identifier] = [
-            req_time for req_time in self.request_counts[identifier]
-            if req_time > minute_ago
-        ]
+        blocked_until = self.blocked_ips.get(identifier)
+        if blocked_until is not None:
+            if blocked_until > time.time():
+                return False
+            self.blocked_ips.pop(identifier, None)
         
-        # Vérifier la limite
-        current_count = len(self.request_counts[identifier])
         limit = self.current_limits.get(endpoint_type, self.base_limits['api'])
-        
-        if current_count >= limit:
+        return self._hit(f'{endpoint_type}:{identifier}', limit, 60)
+    
+    def _hit(self, key: str, limit: int, window: float) -> bool:
+        """Compte une requête pour `key` si elle tient dans `limit` par `window` secondes"""
+        if limit <= 0:
             return False
-        
-        # Enregistrer la requête
-        self.request_counts[identifier].append(now)
-        return True
+        now = time.time()
+        with self._lock:
+            tat = max(self.arrival_times.get(key, now), now) + window / limit
+            if tat - now > window:
+                return False
+            self.arrival_times[key] = tat
+            self.arrival_times.move_to_end(key)
+            # Une clé dont la TAT est passée équivaut à une clé absente
+            while self.arrival_times:
+                oldest, oldest_tat = next(iter(self.arrival_times.items()))
+                if oldest_tat > now and len(self.arrival_times) <= self.max_keys:
+                    break
+                del self.arrival_times[oldest]
+            return True
     
     def adapt_limits(self, system_load: float):
         """Adapte les limites selon la charge système"""
@@ -282,8 +294,11 @@ class AdaptiveRateLimiter:
     
     def block_ip(self, ip: str, duration: int = 3600):
         """Bloque une IP temporairement"""
-        self.blocked_ips.add(ip)
-        threading.Timer(duration, lambda: self.blocked_ips.discard(ip)).start()
+        now = time.time()
+        # Purger les blocages expirés plutôt qu'un Timer par IP
+        for expired in [blocked for blocked, until in self.blocked_ips.items() if until <= now]:
+            del self.blocked_ips[expired]
+        self.blocked_ips[ip] = now + duration
 
 class QueryOptimizer:
     """Optimiseur de requêtes base de données"""
@@ -346,10 +361,10 @@ class QueryOptimizer:
 class PerformanceOptimizer:
     """Optimiseur de performance principal"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[AdaptiveRateLimiter] = None):
         self.cache = IntelligentCache()
         self.monitor = ResourceMonitor()
-        self.rate_limiter = AdaptiveRateLimiter()
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
         self.query_optimizer = QueryOptimizer()
         self.optimization_active = False
     
@@ -472,17 +487,20 @@ def cached(ttl: int = 3600):
     
     return decorator
 
-def rate_limited(requests_per_minute: int = 60):
-    """Décorateur pour limiter le débit d'une fonction"""
+def rate_limited(requests_per_minute: int = 60, rate_limiter: Optional[AdaptiveRateLimiter] = None):
+    """Décorateur pour limiter le débit d'une fonction
+    
+    Sans `rate_limiter`, les limites sont celles de performance_optimizer,
+    partagées avec le reste de l'application.
+    """
     def decorator(func: Callable) -> Callable:
-        rate_limiter = AdaptiveRateLimiter()
-        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # Identifier l'appelant (simplification)
             identifier = f"{func.__name__}:{id(threading.current_thread())}"
+            limiter = rate_limiter or performance_optimizer.rate_limiter
             
-            if not rate_limiter.is_allowed(identifier):
+            if not limiter.is_allowed(identifier):
                 raise Exception("Rate limit exceeded")
             
             return func(*args, **kwargs)
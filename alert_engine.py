@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Alert Engine
+Threshold rules for environmental alerts, evaluated one reading at a time
+or vectorized over columnar arrays of many readings and bunkers.
+
+Every rule maps one metric to a "high" band and a wider "critical" band.
+The vectorized path scores all rules in a (rules x readings) severity
+matrix, so backfills and batch ingests need a handful of NumPy operations
+instead of a Python if-chain per reading.
+
+Sustained incidents are tracked per (bunker, alert type) by
+IncidentTracker: a condition opens once, keeps updating the same alert
+while it persists, and only closes after the readings have been back
+inside the band by the rule's `clear_margin` (hysteresis) for a full
+cool-down. Values hovering around a threshold cannot flap an alert open
+and shut.
+
+Thresholds and health-score bands are declared in a rules file
+(alert_rules.json next to this module by default) with optional
+per-bunker overrides. load_rules() compiles it into a RuleTable: one
+flat bounds array with a row set per overridden bunker, so a batch of
+readings from many bunkers is scored in a single pass. RuleBook watches
+the file and swaps in a freshly compiled table when it changes.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Callable, Collection, Dict, Hashable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_NAMES = ('none', 'low', 'medium', 'high', 'critical')
+SEVERITY_LEVELS = {name: level for level, name in enumerate(SEVERITY_NAMES)}
+HIGH = SEVERITY_LEVELS['high']
+CRITICAL = SEVERITY_LEVELS['critical']
+
+
+@dataclass(frozen=True)
+class ThresholdRule:
+    """Safe band for one metric; readings outside it raise an alert"""
+    alert_type: str
+    metric: str
+    title: str
+    description: str
+    low: Optional[float] = None
+    high: Optional[float] = None
+    critical_low: Optional[float] = None
+    critical_high: Optional[float] = None
+    clear_margin: float = 0.0
+
+    def severity(self, value: Optional[float]) -> int:
+        """Severity level of a single value (0 when inside the safe band)"""
+        if value is None:
+            return 0
+        if _outside(value, self.critical_low, self.critical_high):
+            return CRITICAL
+        if _outside(value, self.low, self.high):
+            return HIGH
+        return 0
+
+    def severities(self, values: np.ndarray) -> np.ndarray:
+        """Vectorized severity(); NaN (missing) compares False everywhere"""
+        critical = _outside_array(values, self.critical_low, self.critical_high)
+        high = _outside_array(values, self.low, self.high)
+        return np.where(critical, CRITICAL, np.where(high, HIGH, 0)).astype(np.int8)
+
+    def clears(self, value: Optional[float]) -> bool:
+        """True when `value` is inside the safe band by at least clear_margin"""
+        if value is None:
+            return False
+        low = None if self.low is None else self.low + self.clear_margin
+        high = None if self.high is None else self.high - self.clear_margin
+        return not _outside(value, low, high)
+
+    def excess(self, value: Optional[float]) -> float:
+        """Distance of `value` outside the safe band, to rank peaks (0 inside, -inf if missing)"""
+        if value is None:
+            return float('-inf')
+        below = self.low - value if self.low is not None else 0.0
+        above = value - self.high if self.high is not None else 0.0
+        return max(below, above, 0.0)
+
+    def describe(self, bunker_id: str, value: float) -> Dict:
+        """Alert payload in the shape AlertService creates alerts from"""
+        return {
+            'type': self.alert_type,
+            'severity': SEVERITY_NAMES[self.severity(value)],
+            'title': self.title.format(value=value),
+            'description': self.description.format(bunker_id=bunker_id),
+            'value': value
+        }
+
+
+class Violations(NamedTuple):
+    """Violating (reading, rule) pairs, as parallel arrays"""
+    rows: np.ndarray       # index into the evaluated readings
+    rules: np.ndarray      # index into the rule table
+    severities: np.ndarray  # SEVERITY_LEVELS value
+
+    def __len__(self):
+        return len(self.rows)
+
+
+# Health-score band: a reading outside (low, high) loses `penalty` points
+HealthBand = Tuple[Optional[float], Optional[float], int]
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alert_rules.json')
+# Reading fields rules may refer to; anything else is a typo that would never fire
+READING_METRICS = frozenset(('temperature', 'humidity', 'oxygen_level', 'co2_level',
+                             'radiation_level', 'air_quality_index', 'pressure'))
+_BOUNDS = ('critical_low', 'low', 'high', 'critical_high')
+_RULE_FIELDS = {'type': 'alert_type', 'title': 'title', 'description': 'description',
+                'low': 'low', 'high': 'high', 'critical_low': 'critical_low',
+                'critical_high': 'critical_high', 'clear_margin': 'clear_margin'}
+_NUMERIC_FIELDS = ('low', 'high', 'critical_low', 'critical_high', 'clear_margin')
+
+
+class RuleTable:
+    """Alert rules and health bands compiled for single-pass evaluation
+
+    `bounds` has one (rules x 4) row set per distinct rule set: index 0
+    holds the defaults, the others the bunkers with overrides. Missing
+    bounds are stored as -inf/+inf so every comparison is branch-free.
+    """
+
+    def __init__(self, rules: Sequence[ThresholdRule], health: Mapping[str, Sequence[HealthBand]],
+                 bunker_rules: Optional[Mapping[str, Sequence[ThresholdRule]]] = None,
+                 bunker_health: Optional[Mapping[str, Mapping[str, Sequence[HealthBand]]]] = None,
+                 version: int = 0):
+        self.rules = tuple(rules)
+        self.health = {metric: tuple(bands) for metric, bands in health.items()}
+        self.version = version
+        self._bunker_rules = {bunker: tuple(items) for bunker, items in (bunker_rules or {}).items()}
+        self._bunker_health = {bunker: {metric: tuple(bands) for metric, bands in items.items()}
+                               for bunker, items in (bunker_health or {}).items()}
+
+        self._set_of = {bunker: index + 1 for index, bunker in enumerate(sorted(self._bunker_rules))}
+        rule_sets = [self.rules] + [self._bunker_rules[bunker] for bunker in sorted(self._bunker_rules)]
+        self.bounds = np.array([
+            [[_bound(getattr(rule, name), name.endswith('low')) for name in _BOUNDS] for rule in rule_set]
+            for rule_set in rule_sets
+        ], dtype=np.float64).reshape(len(rule_sets), len(self.rules), len(_BOUNDS))
+
+    @property
+    def metrics(self) -> List[str]:
+        return sorted({rule.metric for rule in self.rules} | set(self.health))
+
+    def rules_for(self, bunker_id: Optional[str]) -> Tuple[ThresholdRule, ...]:
+        """Rules in effect for a bunker, index-aligned with `rules`"""
+        return self._bunker_rules.get(bunker_id, self.rules)
+
+    def health_for(self, bunker_id: Optional[str] = None) -> Dict[str, Tuple[HealthBand, ...]]:
+        """Health penalty bands in effect for a bunker"""
+        return self._bunker_health.get(bunker_id, self.health)
+
+    def evaluate(self, columns: Mapping[str, Sequence[float]],
+                 bunker_ids: Optional[Sequence[str]] = None) -> Violations:
+        """Score every reading against its bunker's rules in one pass
+
+        `bunker_ids` gives the bunker of each reading; without it every
+        reading is scored against the defaults.
+        """
+        length = len(next(iter(columns.values()))) if columns else 0
+        values = np.full((len(self.rules), length), np.nan)
+        for index, rule in enumerate(self.rules):
+            if rule.metric in columns:
+                values[index] = np.asarray(columns[rule.metric], dtype=np.float64)
+
+        if bunker_ids is None or not self._set_of:
+            bounds = self.bounds[0][:, :, None]                       # (rules, 4, 1)
+        else:
+            sets = np.array([self._set_of.get(bunker, 0) for bunker in bunker_ids], dtype=np.intp)
+            bounds = self.bounds[sets].transpose(1, 2, 0)             # (rules, 4, readings)
+
+        critical = (values < bounds[:, 0]) | (values > bounds[:, 3])
+        high = (values < bounds[:, 1]) | (values > bounds[:, 2])
+        matrix = np.where(critical, CRITICAL, np.where(high, HIGH, 0)).astype(np.int8)
+
+        rule_index, row_index = np.nonzero(matrix)
+        return Violations(row_index, rule_index, matrix[rule_index, row_index])
+
+
+def compile_rules(spec: Mapping, version: int = 0, known_metrics: Collection[str] = READING_METRICS) -> RuleTable:
+    """Compile a parsed rules document into a RuleTable
+
+    Raises ValueError for unknown keys, metrics outside `known_metrics`,
+    non-numeric bounds or penalties, inverted bands and overrides of
+    metrics the defaults do not define, so a bad file never goes live.
+    """
+    metrics = spec.get('metrics')
+    if not isinstance(metrics, Mapping) or not metrics:
+        raise ValueError('rules file needs a non-empty "metrics" object')
+    unknown = set(metrics) - set(known_metrics)
+    if unknown:
+        raise ValueError(f'rules for unknown metrics: {sorted(unknown)}')
+
+    rules, health = [], {}
+    for metric, entry in metrics.items():
+        if entry.get('alert'):
+            rules.append(_compile_rule(metric, entry['alert']))
+        if entry.get('health'):
+            health[metric] = _compile_bands(metric, entry['health'])
+
+    bunker_rules, bunker_health = {}, {}
+    for bunker_id, overrides in (spec.get('bunkers') or {}).items():
+        unknown = set(overrides) - set(metrics)
+        if unknown:
+            raise ValueError(f'bunker {bunker_id} overrides unknown metrics: {sorted(unknown)}')
+        patched = []
+        for rule in rules:
+            override = overrides.get(rule.metric, {})
+            if 'alert' not in override:
+                patched.append(rule)
+            elif override['alert'] is None:
+                # null disables the alert for this bunker
+                patched.append(replace(rule, low=None, high=None, critical_low=None, critical_high=None))
+            else:
+                patched.append(_compile_rule(rule.metric, override['alert'], rule))
+        if patched != rules:
+            bunker_rules[bunker_id] = patched
+        if any('health' in override for override in overrides.values()):
+            bunker_health[bunker_id] = dict(health)
+            for metric, override in overrides.items():
+                if 'health' in override:
+                    if override['health']:
+                        bunker_health[bunker_id][metric] = _compile_bands(metric, override['health'])
+                    else:
+                        bunker_health[bunker_id].pop(metric, None)
+
+    return RuleTable(rules, health, bunker_rules, bunker_health, version)
+
+
+def load_rules(path: str = DEFAULT_RULES_PATH, version: int = 0) -> RuleTable:
+    with open(path, encoding='utf-8') as handle:
+        return compile_rules(json.load(handle), version)
+
+
+def _compile_rule(metric: str, fields: Mapping, base: Optional[ThresholdRule] = None) -> ThresholdRule:
+    unknown = set(fields) - set(_RULE_FIELDS)
+    if unknown:
+        raise ValueError(f'{metric}: unknown alert fields {sorted(unknown)}')
+    for key in _NUMERIC_FIELDS:
+        if key in fields:
+            _check_number(metric, key, fields[key], optional=key != 'clear_margin')
+    values = {_RULE_FIELDS[key]: value for key, value in fields.items()}
+    if base is not None:
+        rule = replace(base, **values)
+    else:
+        if 'alert_type' not in values:
+            raise ValueError(f'{metric}: alert needs a "type"')
+        values.setdefault('title', f'{metric} alert: {{value}}')
+        values.setdefault('description', f'{metric} is outside safe range in {{bunker_id}}')
+        rule = ThresholdRule(metric=metric, **values)
+
+    for low, high in ((rule.low, rule.high), (rule.critical_low, rule.critical_high),
+                      (rule.critical_low, rule.low), (rule.high, rule.critical_high)):
+        if low is not None and high is not None and low > high:
+            raise ValueError(f'{metric}: bound {low} is above {high}')
+    return rule
+
+
+def _compile_bands(metric: str, bands: Sequence[Mapping]) -> Tuple[HealthBand, ...]:
+    compiled = []
+    for band in bands:
+        low, high = band.get('low'), band.get('high')
+        _check_number(metric, 'health low', low, optional=True)
+        _check_number(metric, 'health high', high, optional=True)
+        _check_number(metric, 'health penalty', band.get('penalty'))
+        if low is not None and high is not None and low > high:
+            raise ValueError(f'{metric}: health band {low} is above {high}')
+        compiled.append((low, high, int(band['penalty'])))
+    return tuple(compiled)
+
+
+def _check_number(metric: str, name: str, value, optional: bool = False):
+    """JSON numbers only: "900" or true would compare wrongly or crash scoring later"""
+    if value is None and optional:
+        return
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        raise ValueError(f'{metric}: {name} must be a number, got {value!r}')
+
+
+def _bound(value: Optional[float], is_low: bool) -> float:
+    if value is None:
+        return -np.inf if is_low else np.inf
+    return float(value)
+
+
+class RuleBook:
+    """Compiled rules that follow their file: edits go live without a deploy
+
+    current() stats the file at most every `check_seconds` and recompiles
+    it when its mtime or size changed. A file that fails to parse or
+    validate is logged and ignored; the previous table stays in force.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, check_seconds: float = 5.0):
+        self.path = path
+        self.check_seconds = check_seconds
+        self.last_error: Optional[str] = None
+        self._listeners: List[Callable[[RuleTable], None]] = []
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._table = load_rules(path, version=1)
+        self._checked_at = time.monotonic()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def current(self) -> RuleTable:
+        if time.monotonic() - self._checked_at >= self.check_seconds:
+            self.reload()
+        return self._table
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompile when the file changed (or always with `force`); True if swapped"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            stamp = self._file_stamp()
+            if stamp is None or (stamp == self._stamp and not force):
+                return False
+            self._stamp = stamp
+            try:
+                table = load_rules(self.path, version=self._table.version + 1)
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as error:
+                self.last_error = str(error)
+                logger.error('Keeping alert rules v%d, %s is invalid: %s', self._table.version, self.path, error)
+                return False
+            self._table, self.last_error = table, None
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(table)
+        return True
+
+    def on_reload(self, listener: Callable[[RuleTable], None]):
+        """Call `listener(table)` after every successful reload (e.g. to drop caches)"""
+        self._listeners.append(listener)
+        return listener
+
+
+DEFAULT_RULES = load_rules()
+ALERT_RULES: Tuple[ThresholdRule, ...] = DEFAULT_RULES.rules
+
+
+def evaluate_reading(bunker_id: str, values: Mapping[str, Optional[float]],
+                     rules: Sequence[ThresholdRule] = ALERT_RULES) -> List[Dict]:
+    """Alert payloads raised by one reading"""
+    return [
+        rule.describe(bunker_id, values[rule.metric])
+        for rule in rules
+        if rule.severity(values.get(rule.metric))
+    ]
+
+
+def to_columns(rows: Sequence[Mapping], metrics: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Row dicts to float64 columns, with None stored as NaN"""
+    return {metric: np.array([row.get(metric) for row in rows], dtype=np.float64) for metric in metrics}
+
+
+def evaluate(columns: Mapping[str, Sequence[float]],
+             rules: Sequence[ThresholdRule] = ALERT_RULES) -> Violations:
+    """Score every reading against every rule at once
+
+    `columns` maps metric names to equal-length arrays (NaN for missing
+    values); metrics without a column are treated as missing.
+    """
+    length = len(next(iter(columns.values()))) if columns else 0
+    matrix = np.zeros((len(rules), length), dtype=np.int8)
+    for index, rule in enumerate(rules):
+        if rule.metric in columns:
+            matrix[index] = rule.severities(np.asarray(columns[rule.metric], dtype=np.float64))
+
+    rule_index, row_index = np.nonzero(matrix)
+    return Violations(row_index, rule_index, matrix[rule_index, row_index])
+
+
+def worst_per_group(violations: Violations, groups: np.ndarray,
+                    order: Optional[np.ndarray] = None) -> Violations:
+    """Keep one violation per (group, rule): highest severity, then latest
+
+    `groups` holds an integer group code per reading (e.g. from
+    np.unique(bunker_ids, return_inverse=True)) and `order` a sortable
+    recency key per reading (defaults to the reading index).
+    """
+    if not len(violations):
+        return violations
+    recency = violations.rows if order is None else np.asarray(order)[violations.rows]
+    group = np.asarray(groups)[violations.rows]
+
+    # Sort by (group, rule, severity, recency); the last entry of each run wins
+    ranking = np.lexsort((recency, violations.severities, violations.rules, group))
+    group, rules = group[ranking], violations.rules[ranking]
+    last = np.ones(len(ranking), dtype=bool)
+    last[:-1] = (group[1:] != group[:-1]) | (rules[1:] != rules[:-1])
+    keep = ranking[last]
+    return Violations(violations.rows[keep], violations.rules[keep], violations.severities[keep])
+
+
+class IncidentTracker:
+    """Hysteresis and cool-down state per (bunker, alert type) key
+
+    breach() marks a key as open. settle() feeds it a non-violating value
+    and returns True once the incident should close: the value cleared
+    the band by the rule's margin and no breach or in-band value came
+    for `cooldown` since. Values between the threshold and the clear
+    level restart the cool-down.
+    """
+
+    def __init__(self, cooldown_seconds: float = 300, max_keys: int = 100000):
+        self.cooldown = timedelta(seconds=cooldown_seconds)
+        self.max_keys = max_keys
+        self._cleared_at: 'OrderedDict[Hashable, Optional[datetime]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def breach(self, key: Hashable):
+        with self._lock:
+            self._cleared_at[key] = None
+            self._cleared_at.move_to_end(key)
+            if len(self._cleared_at) > self.max_keys:
+                self._cleared_at.popitem(last=False)
+
+    def is_open(self, key: Hashable) -> bool:
+        return key in self._cleared_at
+
+    def settle(self, key: Hashable, rule: ThresholdRule, value: Optional[float], timestamp: datetime) -> bool:
+        with self._lock:
+            if key not in self._cleared_at or value is None:
+                return False
+            if not rule.clears(value):
+                self._cleared_at[key] = None
+                return False
+            cleared_at = self._cleared_at[key]
+            if cleared_at is None:
+                self._cleared_at[key] = timestamp
+                cleared_at = timestamp
+            if timestamp - cleared_at < self.cooldown:
+                return False
+            del self._cleared_at[key]
+            return True
+
+    def reset(self):
+        with self._lock:
+            self._cleared_at.clear()
+
+    def __len__(self):
+        return len(self._cleared_at)
+
+
+def _outside(value: float, low: Optional[float], high: Optional[float]) -> bool:
+    return (low is not None and value < low) or (high is not None and value > high)
+
+
+def _outside_array(values: np.ndarray, low: Optional[float], high: Optional[float]) -> np.ndarray:
+    mask = np.zeros(values.shape, dtype=bool)
+    if low is not None:
+        mask |= values < low
+    if high is not None:
+        mask |= values > high
+    return mask
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Active Alert Index
+In-process index of the active alerts of every bunker.
+
+Active alerts change rarely but are read on every dashboard poll. The
+index keeps one sorted tuple of alert dicts per bunker (most severe,
+then newest first), loaded from the database on first use and then
+maintained write-through by the code that creates and resolves alerts.
+
+Each bunker hashes to a version counter. Writers bump it; readers
+compare it with the version their entry was loaded at and reload on a
+mismatch. With a `name` the counters live in a shared memory segment,
+so a write in one web worker invalidates the copies held by the others
+on the same host; without one they are private to the process.
+"""
+
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover - Python < 3.8
+    shared_memory = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+SEVERITY_RANK = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4, 'emergency': 5}
+_COUNTER = struct.Struct('Q')
+
+
+class VersionCounters:
+    """Fixed array of uint64 counters, private or in named shared memory"""
+
+    def __init__(self, slots: int = 1024, name: Optional[str] = None):
+        self.slots = slots
+        self._shm = None
+        self._lock_file = None
+        size = slots * _COUNTER.size
+        if name and shared_memory is not None:
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                try:
+                    self._shm = shared_memory.SharedMemory(name=name, track=False)
+                except TypeError:  # Python < 3.13 has no `track` argument
+                    self._shm = shared_memory.SharedMemory(name=name)
+            self._buf = self._shm.buf
+            if fcntl is not None:
+                self._lock_file = open(f'/tmp/{name}.lock', 'a+b')
+        else:
+            self._buf = memoryview(bytearray(size))
+        self._lock = threading.Lock()
+
+    def slot(self, key: str) -> int:
+        return zlib.crc32(key.encode('utf-8')) % self.slots
+
+    def get(self, key: str) -> int:
+        return _COUNTER.unpack_from(self._buf, self.slot(key) * _COUNTER.size)[0]
+
+    def bump(self, key: str) -> int:
+        offset = self.slot(key) * _COUNTER.size
+        with self._lock:
+            if self._lock_file is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                version = _COUNTER.unpack_from(self._buf, offset)[0] + 1
+                _COUNTER.pack_into(self._buf, offset, version)
+            finally:
+                if self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        return version
+
+    def close(self):
+        if self._shm is not None:
+            self._buf = None
+            self._shm.close()
+            self._shm = None
+
+
+class ActiveAlertIndex:
+    """Sorted active alerts per bunker, write-through with version invalidation"""
+
+    def __init__(self, time_key: str = 'created_at', max_bunkers: int = 10000,
+                 version_slots: int = 1024, name: Optional[str] = None):
+        self.time_key = time_key
+        self.max_bunkers = max_bunkers
+        self.versions = VersionCounters(version_slots, name)
+        self._entries: 'OrderedDict[str, Tuple[int, Tuple[Dict, ...]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bunker_id: str, loader: Callable[[], Iterable[Dict]]) -> List[Dict]:
+        """Active alerts of a bunker; `loader` runs only when the entry is missing or stale"""
+        version = self.versions.get(bunker_id)
+        with self._lock:
+            entry = self._entries.get(bunker_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(bunker_id)
+                return list(entry[1])
+
+        # Version read before loading: a write during the load leaves the entry stale
+        alerts = self._ordered(loader())
+        with self._lock:
+            self._store(bunker_id, version, alerts)
+        return list(alerts)
+
+    def count(self, bunker_id: str, loader: Callable[[], Iterable[Dict]]) -> int:
+        return len(self.get(bunker_id, loader))
+
+    def upsert(self, alert: Dict):
+        """Add or replace an active alert (matched by id) after it was committed"""
+        self._apply(alert['bunker_id'],
+                    lambda alerts: [item for item in alerts if item['id'] != alert['id']] + [alert])
+
+    def discard(self, bunker_id: str, alert_id: int):
+        """Drop an alert that is no longer active"""
+        self._apply(bunker_id, lambda alerts: [item for item in alerts if item['id'] != alert_id])
+
+    def _apply(self, bunker_id: str, change: Callable[[Tuple[Dict, ...]], List[Dict]]):
+        with self._lock:
+            previous = self.versions.get(bunker_id)
+            version = self.versions.bump(bunker_id)
+            entry = self._entries.get(bunker_id)
+            if entry is None:
+                return
+            if entry[0] != previous or version != previous + 1:
+                # Stale, or another worker wrote concurrently: reload on next read
+                del self._entries[bunker_id]
+                return
+            self._store(bunker_id, version, self._ordered(change(entry[1])))
+
+    def _ordered(self, alerts: Iterable[Dict]) -> Tuple[Dict, ...]:
+        """Most severe first, newest first within a severity (two stable sorts)"""
+        alerts = sorted(alerts, key=lambda alert: (alert.get(self.time_key) or '', alert.get('id') or 0), reverse=True)
+        return tuple(sorted(alerts, key=lambda alert: SEVERITY_RANK.get(alert.get('severity'), 0), reverse=True))
+
+    def _store(self, bunker_id: str, version: int, alerts: Tuple[Dict, ...]):
+        self._entries[bunker_id] = (version, alerts)
+        self._entries.move_to_end(bunker_id)
+        if len(self._entries) > self.max_bunkers:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, bunker_id: Optional[str] = None):
+        """Forget one bunker everywhere (its version is bumped) or this worker's whole index"""
+        with self._lock:
+            if bunker_id is None:
+                self._entries.clear()
+                return
+            self.versions.bump(bunker_id)
+            self._entries.pop(bunker_id, None)
+
+    def __len__(self):
+        return len(self._entries)
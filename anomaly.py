@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Streaming Anomaly Detection
+Online outlier scoring per sensor series with O(1) state.
+
+Each series keeps an exponentially weighted mean/variance and a running
+median/MAD estimate (stochastic approximation), updated in constant time
+and memory per reading. A reading is anomalous when it is further than
+`threshold` deviations from both the EWMA mean and the running median,
+so a single noisy estimator cannot raise an anomaly on its own. Outliers
+are clipped before they update the state, so a spike does not drag the
+baseline with it.
+
+score_many scores a batch against copies of the series states, and
+commit adopts those copies once the batch is stored, so a batch that is
+retried after a failed write is not learned twice.
+"""
+
+import copy
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class SeriesState:
+    __slots__ = ('count', 'mean', 'variance', 'median', 'mad')
+
+    def __init__(self, value: float):
+        self.count = 0
+        self.mean = value
+        self.variance = 0.0
+        self.median = value
+        self.mad = 0.0
+
+
+class AnomalyDetector:
+    """Constant-memory anomaly scores for many (bunker, metric) series"""
+
+    MAD_TO_SIGMA = 1.4826  # MAD of a normal distribution is 0.6745 sigma
+
+    def __init__(self, alpha: float = 0.05, threshold: float = 4.0, warmup: int = 30,
+                 max_series: int = 100000):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.max_series = max_series
+        self._series: 'OrderedDict[Hashable, SeriesState]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key: Hashable, value: Optional[float]) -> Optional[float]:
+        """Score `value` against its series, then learn from it
+
+        Returns the anomaly score (in standard deviations) when the reading
+        is anomalous, otherwise None.
+        """
+        if value is None or math.isnan(value):
+            return None
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                state = self._series[key] = SeriesState(value)
+                self._evict()
+            else:
+                self._series.move_to_end(key)
+            return self._step(state, value)
+
+    def score_many(self, readings: Iterable[Tuple[Hashable, Optional[float]]]
+                   ) -> Tuple[List[Optional[float]], Dict[Hashable, SeriesState]]:
+        """Score (key, value) readings in order without changing the detector
+
+        Returns the score of each reading (as update would) and the series
+        states learned from them, for commit once the readings are stored.
+        """
+        scores, staged = [], {}
+        with self._lock:
+            for key, value in readings:
+                if value is None or math.isnan(value):
+                    scores.append(None)
+                    continue
+                state = staged.get(key)
+                if state is None:
+                    live = self._series.get(key)
+                    state = staged[key] = copy.copy(live) if live is not None else SeriesState(value)
+                scores.append(self._step(state, value))
+        return scores, staged
+
+    def commit(self, staged: Dict[Hashable, SeriesState]):
+        """Adopt the series states returned by score_many"""
+        with self._lock:
+            for key, state in staged.items():
+                self._series[key] = state
+                self._series.move_to_end(key)
+            self._evict()
+
+    def _step(self, state: SeriesState, value: float) -> Optional[float]:
+        score = self._score(state, value) if state.count >= self.warmup else 0.0
+        anomalous = score > self.threshold
+        if anomalous:
+            # Winsorize so the spike only nudges the baseline
+            spread = self.threshold * self._sigma(state)
+            value = min(max(value, state.mean - spread), state.mean + spread)
+        self._learn(state, value)
+        return score if anomalous else None
+
+    def _evict(self):
+        while len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+
+    def _score(self, state: SeriesState, value: float) -> float:
+        ewma = abs(value - state.mean) / self._sigma(state)
+        robust = abs(value - state.median) / max(self.MAD_TO_SIGMA * state.mad, self._floor(state))
+        return min(ewma, robust)
+
+    def _sigma(self, state: SeriesState) -> float:
+        return max(math.sqrt(state.variance), self._floor(state))
+
+    @staticmethod
+    def _floor(state: SeriesState) -> float:
+        # Perfectly flat series would otherwise flag any change as infinite
+        return 1e-3 * abs(state.mean) + 1e-9
+
+    def _learn(self, state: SeriesState, value: float):
+        alpha = self.alpha
+        diff = value - state.mean
+        increment = alpha * diff
+        state.mean += increment
+        state.variance = (1 - alpha) * (state.variance + diff * increment)
+
+        step = alpha * (state.mad or abs(value - state.median))
+        if value > state.median:
+            state.median += step
+        elif value < state.median:
+            state.median -= step
+        state.mad += alpha * (abs(value - state.median) - state.mad)
+        state.count += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def __len__(self):
+        return len(self._series)
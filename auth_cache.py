@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Authentication Caches
+Keeps authenticated requests off the signature check and the users table.
+
+TokenCache remembers the payload of every token that verified, keyed by
+a SHA-256 digest of the token (the token itself is never stored), until
+the payload's `exp`. Only successful verifications are cached, so bad
+tokens cannot fill it.
+
+PrincipalCache holds immutable snapshots of users for a short TTL. A
+change to a user's role or premium tier bumps that user's version
+counter, which drops the snapshot here and, with a shared `name`, in
+every other worker on the host (see alert_index.VersionCounters).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from alert_index import VersionCounters
+
+
+class TokenCache:
+    """Bounded LRU of verified token payloads, each dropped at its `exp`"""
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[bytes, Tuple[float, Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry[1])
+
+    def put(self, token: str, payload: Dict):
+        """Remember a verified payload; tokens without `exp` are not cached"""
+        expires = payload.get('exp')
+        if expires is None:
+            return
+        expires = expires.timestamp() if hasattr(expires, 'timestamp') else float(expires)
+        with self._lock:
+            self._entries[self._key(token)] = (expires, dict(payload))
+            self._entries.move_to_end(self._key(token))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, token: str):
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PrincipalCache:
+    """Short-TTL user snapshots with per-user version invalidation"""
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 10000, version_slots: int = 4096,
+                 name: Optional[str] = None, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.versions = VersionCounters(version_slots, name)
+        self._entries: 'OrderedDict[Hashable, Tuple[int, float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: Hashable, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """Snapshot of a user; `loader` runs when it is missing, stale or expired
+
+        A loader returning None (unknown user) is not cached.
+        """
+        version = self.versions.get(str(user_id))
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == version and now - entry[1] < self.ttl:
+                self._entries.move_to_end(user_id)
+                return entry[2]
+
+        # Version read before loading: a change during the load leaves the entry stale
+        principal = loader()
+        if principal is not None:
+            with self._lock:
+                self._entries[user_id] = (version, now, principal)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, user_id: Hashable):
+        """Forget a user in every worker sharing the version counters"""
+        with self._lock:
+            self.versions.bump(str(user_id))
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Forget this worker's snapshots"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Cold Storage Codec
+Gorilla-style compression of archived readings.
+
+Series block layout: a small header (value mode, sample count, first
+timestamp) followed by a bit stream where
+  * timestamps (epoch milliseconds) are stored as delta-of-deltas in
+    variable-width buckets, so a steady sampling interval costs one bit;
+  * values are either XORed with the previous float64 and only the
+    meaningful bits kept (lossless), or quantized to a fixed number of
+    decimals and stored as bucketed deltas of the scaled integers.
+
+A rows block (encode_rows) packs whole readings instead: one shared
+timestamp vector and one value vector per metric, each with a presence
+bit per row for missing values. Row i of every column is the same
+reading, so readings sharing a timestamp stay distinct.
+
+    block = encode_rows(timestamps, {'temperature': [20.5, None]}, {'temperature': 2})
+    timestamps, columns = decode_rows(block)
+"""
+
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_HEADER = struct.Struct('<BIq')  # value mode (0 = XOR, n = n-1 decimals), count, first timestamp
+_ROWS_HEADER = struct.Struct('<IqB')  # row count, first timestamp, column count
+_COLUMN = struct.Struct('<BB')  # value mode, name length (name bytes follow)
+_FLOAT = struct.Struct('>d')
+_UINT64 = struct.Struct('>Q')
+
+# (prefix bits, prefix length, payload bits) for signed integers, smallest first
+_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12), (0b11110, 5, 20))
+_WIDE_PREFIX, _WIDE_PREFIX_BITS, _WIDE_BITS = 0b11111, 5, 64
+
+
+class BitWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int):
+        self._acc = (self._acc << bits) | (value & ((1 << bits) - 1))
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.data.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self._bits:
+            return bytes(self.data) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self.data)
+
+
+class BitReader:
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = data
+        self.position = offset * 8
+
+    def read(self, bits: int) -> int:
+        value = 0
+        while bits:
+            byte = self.data[self.position >> 3]
+            available = 8 - (self.position & 7)
+            take = min(available, bits)
+            chunk = (byte >> (available - take)) & ((1 << take) - 1)
+            value = (value << take) | chunk
+            self.position += take
+            bits -= take
+        return value
+
+
+def _write_signed(writer: BitWriter, value: int):
+    """Zero costs one bit; small magnitudes use the narrowest bucket that fits"""
+    if value == 0:
+        writer.write(0, 1)
+        return
+    for prefix, prefix_bits, bits in _BUCKETS:
+        limit = 1 << (bits - 1)
+        if -limit <= value < limit:
+            writer.write(prefix, prefix_bits)
+            writer.write(value, bits)
+            return
+    writer.write(_WIDE_PREFIX, _WIDE_PREFIX_BITS)
+    writer.write(value, _WIDE_BITS)
+
+
+def _read_signed(reader: BitReader) -> int:
+    if reader.read(1) == 0:
+        return 0
+    ones = 1
+    while ones <= len(_BUCKETS) and reader.read(1):
+        ones += 1
+    bits = _BUCKETS[ones - 1][2] if ones <= len(_BUCKETS) else _WIDE_BITS
+    raw = reader.read(bits)
+    return raw - (1 << bits) if raw >> (bits - 1) else raw
+
+
+def encode_series(timestamps: Sequence[int], values: Sequence[float], decimals: Optional[int] = None) -> bytes:
+    """Pack ascending epoch-ms timestamps and their values into one block
+
+    With `decimals` the values are rounded to that many decimal places
+    (sensor resolution) and compress far better; without it the block is
+    lossless.
+    """
+    if len(timestamps) != len(values):
+        raise ValueError('timestamps and values must have the same length')
+    count = len(timestamps)
+    mode, scaled = _value_mode(values, decimals)
+    header = _HEADER.pack(mode, count, timestamps[0] if count else 0)
+    if not count:
+        return header
+
+    writer = BitWriter()
+    _encode_timestamps(writer, timestamps)
+    _encode_values(writer, values, scaled)
+    return header + writer.getvalue()
+
+
+def decode_series(block: bytes) -> Tuple[List[int], List[float]]:
+    """Inverse of encode_series()"""
+    mode, count, first = _HEADER.unpack_from(block, 0)
+    if not count:
+        return [], []
+
+    reader = BitReader(block, _HEADER.size)
+    timestamps = _decode_timestamps(reader, first, count)
+    return timestamps, _decode_values(reader, mode, count)
+
+
+def encode_rows(timestamps: Sequence[int], columns: Dict[str, Sequence[Optional[float]]],
+                decimals: Optional[Dict[str, int]] = None) -> bytes:
+    """Pack rows of readings: epoch-ms timestamps plus one value column per metric
+
+    Each column holds one value or None per row. `decimals` maps a metric
+    to its sensor resolution, as for encode_series(); metrics without an
+    entry are stored losslessly. Rows are kept in the order given.
+    """
+    count = len(timestamps)
+    if any(len(values) != count for values in columns.values()):
+        raise ValueError('every column must have one value per timestamp')
+    decimals = decimals or {}
+
+    header = bytearray(_ROWS_HEADER.pack(count, timestamps[0] if count else 0, len(columns)))
+    writer = BitWriter()
+    _encode_timestamps(writer, timestamps)
+    for metric, values in columns.items():
+        present = [value for value in values if value is not None]
+        mode, scaled = _value_mode(present, decimals.get(metric))
+        name = metric.encode('utf-8')
+        header += _COLUMN.pack(mode, len(name)) + name
+        for value in values:
+            writer.write(value is not None, 1)
+        if present:
+            _encode_values(writer, present, scaled)
+    return bytes(header) + writer.getvalue()
+
+
+def decode_rows(block: bytes) -> Tuple[List[int], Dict[str, List[Optional[float]]]]:
+    """Inverse of encode_rows()"""
+    count, first, column_count = _ROWS_HEADER.unpack_from(block, 0)
+    offset = _ROWS_HEADER.size
+    modes = []
+    for _ in range(column_count):
+        mode, length = _COLUMN.unpack_from(block, offset)
+        offset += _COLUMN.size
+        modes.append((block[offset:offset + length].decode('utf-8'), mode))
+        offset += length
+
+    reader = BitReader(block, offset)
+    timestamps = _decode_timestamps(reader, first, count) if count else []
+    columns = {}
+    for metric, mode in modes:
+        presence = [reader.read(1) for _ in range(count)]
+        present = iter(_decode_values(reader, mode, sum(presence)) if any(presence) else ())
+        columns[metric] = [next(present) if flag else None for flag in presence]
+    return timestamps, columns
+
+
+def _value_mode(values: Sequence[float], decimals: Optional[int]) -> Tuple[int, Optional[List[int]]]:
+    """Value mode for the header and the scaled integers (None when lossless)"""
+    if decimals is None:
+        return 0, None
+    scaled = [round(value * 10 ** decimals) for value in values]
+    if any(abs(value) >= 1 << 62 for value in scaled):
+        return 0, None  # out of range for integer deltas: stay lossless
+    return decimals + 1, scaled
+
+
+def _encode_timestamps(writer: BitWriter, timestamps: Sequence[int]):
+    previous_delta = 0
+    for previous, current in zip(timestamps, timestamps[1:]):
+        delta = current - previous
+        _write_signed(writer, delta - previous_delta)
+        previous_delta = delta
+
+
+def _decode_timestamps(reader: BitReader, first: int, count: int) -> List[int]:
+    timestamps, delta = [first], 0
+    for _ in range(count - 1):
+        delta += _read_signed(reader)
+        timestamps.append(timestamps[-1] + delta)
+    return timestamps
+
+
+def _encode_values(writer: BitWriter, values: Sequence[float], scaled: Optional[Sequence[int]]):
+    if scaled is None:
+        _encode_xor(writer, values)
+    else:
+        writer.write(scaled[0], 64)
+        for previous, current in zip(scaled, scaled[1:]):
+            _write_signed(writer, current - previous)
+
+
+def _decode_values(reader: BitReader, mode: int, count: int) -> List[float]:
+    if mode == 0:
+        return _decode_xor(reader, count)
+    scale = 10 ** (mode - 1)
+    scaled = reader.read(64)
+    scaled = scaled - (1 << 64) if scaled >> 63 else scaled
+    values = [scaled / scale]
+    for _ in range(count - 1):
+        scaled += _read_signed(reader)
+        values.append(scaled / scale)
+    return values
+
+
+def _encode_xor(writer: BitWriter, values: Sequence[float]):
+    previous = _UINT64.unpack(_FLOAT.pack(values[0]))[0]
+    writer.write(previous, 64)
+    leading, trailing = -1, 0
+    for value in values[1:]:
+        current = _UINT64.unpack(_FLOAT.pack(value))[0]
+        xor = current ^ previous
+        previous = current
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        writer.write(1, 1)
+        new_leading = min(64 - xor.bit_length(), 31)
+        new_trailing = (xor & -xor).bit_length() - 1
+        if leading >= 0 and new_leading >= leading and new_trailing >= trailing:
+            # Meaningful bits fit inside the previous window
+            writer.write(0, 1)
+            writer.write(xor >> trailing, 64 - leading - trailing)
+        else:
+            leading, trailing = new_leading, new_trailing
+            meaningful = 64 - leading - trailing
+            writer.write(1, 1)
+            writer.write(leading, 5)
+            writer.write(meaningful & 63, 6)  # 64 is stored as 0
+            writer.write(xor >> trailing, meaningful)
+
+
+def _decode_xor(reader: BitReader, count: int) -> List[float]:
+    previous = reader.read(64)
+    values = [_FLOAT.unpack(_UINT64.pack(previous))[0]]
+    leading, trailing = 0, 0
+    for _ in range(count - 1):
+        if reader.read(1):
+            if reader.read(1):
+                leading = reader.read(5)
+                meaningful = reader.read(6) or 64
+                trailing = 64 - leading - meaningful
+            previous ^= reader.read(64 - leading - trailing) << trailing
+        values.append(_FLOAT.unpack(_UINT64.pack(previous))[0])
+    return values
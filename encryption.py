@@ -3,42 +3,145 @@ import base64
 import hashlib
 import hmac
 import secrets
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
+from functools import wraps
 import json
+import threading
+import time
+from password_hashing import default_hasher
+from ttl_store import open_backend
 
-class EncryptionManager:
-    """Gestionnaire de chiffrement pour les données sensibles"""
-    
-    def __init__(self, master_key=None):
-        self.master_key = master_key or os.environ.get('MASTER_KEY')
-        if not self.master_key:
-            raise ValueError("Master key is required for encryption")
-        
-        self.fernet = self._create_fernet_key()
-    
-    def _create_fernet_key(self):
-        """Crée une clé Fernet à partir de la clé maître"""
+# Les versions de clé tiennent dans le premier octet d'un token, sous 0x67 ('g'):
+# les anciens tokens Fernet (double base64) se décodent en octets 'gAAAAA...'.
+MAX_KEY_VERSION = 63
+NONCE_SIZE = 12
+KDF_ITERATIONS = 100000
+LEGACY_SALT = b'bunker_salt_2025'
+
+_derived_keys = {}
+_derived_keys_lock = threading.Lock()
+
+
+def derive_key(secret, salt):
+    """PBKDF2 d'un secret maître, calculé une seule fois par processus"""
+    cache_key = (hashlib.sha256(secret.encode('utf-8')).digest(), salt)
+    with _derived_keys_lock:
+        key = _derived_keys.get(cache_key)
+    if key is None:
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
-            salt=b'bunker_salt_2025',  # En production, utiliser un salt aléatoire
-            iterations=100000,
+            salt=salt,
+            iterations=KDF_ITERATIONS,
             backend=default_backend()
         )
-        key = base64.urlsafe_b64encode(kdf.derive(self.master_key.encode()))
-        return Fernet(key)
+        key = kdf.derive(secret.encode('utf-8'))
+        with _derived_keys_lock:
+            _derived_keys[cache_key] = key
+    return key
+
+
+class KeyRing:
+    """Clés AES-256-GCM versionnées: `current` chiffre, les anciennes versions déchiffrent encore"""
+    
+    def __init__(self, secrets_by_version, current=None):
+        if not secrets_by_version:
+            raise ValueError("Master key is required for encryption")
+        for version in secrets_by_version:
+            if not 1 <= version <= MAX_KEY_VERSION:
+                raise ValueError(f"Key version must be between 1 and {MAX_KEY_VERSION}")
+        self.secrets = dict(secrets_by_version)
+        self.current = current if current is not None else max(self.secrets)
+        if self.current not in self.secrets:
+            raise ValueError(f"No key for current version {self.current}")
+        self._ciphers = {}
+    
+    @classmethod
+    def from_env(cls, master_key=None):
+        """MASTER_KEY (version MASTER_KEY_VERSION) et MASTER_KEYS_RETIRED="1:ancienne,2:autre" """
+        current = int(os.environ.get('MASTER_KEY_VERSION', 1))
+        secrets_by_version = {}
+        for item in filter(None, os.environ.get('MASTER_KEYS_RETIRED', '').split(',')):
+            version, _, secret = item.partition(':')
+            secrets_by_version[int(version)] = secret
+        master_key = master_key or os.environ.get('MASTER_KEY')
+        if not master_key:
+            raise ValueError("Master key is required for encryption")
+        secrets_by_version[current] = master_key
+        return cls(secrets_by_version, current)
+    
+    def cipher(self, version):
+        cipher = self._ciphers.get(version)
+        if cipher is None:
+            if version not in self.secrets:
+                raise KeyError(f"Unknown key version {version}")
+            salt = LEGACY_SALT + b':aes-gcm:' + str(version).encode('ascii')
+            cipher = self._ciphers[version] = AESGCM(derive_key(self.secrets[version], salt))
+        return cipher
+
+
+_key_rings = {}
+_key_rings_lock = threading.Lock()
+
+
+def get_key_ring(master_key=None):
+    """Trousseau partagé par le processus pour une clé maître (ou l'environnement)"""
+    cache_key = (master_key, os.environ.get('MASTER_KEY'), os.environ.get('MASTER_KEY_VERSION'),
+                 os.environ.get('MASTER_KEYS_RETIRED'))
+    with _key_rings_lock:
+        ring = _key_rings.get(cache_key)
+        if ring is None:
+            ring = _key_rings[cache_key] = KeyRing.from_env(master_key)
+        return ring
+
+
+class EncryptionManager:
+    """Gestionnaire de chiffrement pour les données sensibles
+    
+    Les tokens sont en AES-256-GCM: un octet de version de clé, un nonce
+    de 12 octets puis le chiffré et son tag, encodés une seule fois en
+    base64url. Les clés viennent d'un KeyRing partagé: la construction ne
+    relance plus PBKDF2. Les anciens tokens Fernet se déchiffrent encore.
+    """
+    
+    def __init__(self, master_key=None, key_ring=None):
+        self.keys = key_ring or get_key_ring(master_key)
+        self.master_key = self.keys.secrets[self.keys.current]
+        self._fernet = None
+    
+    @property
+    def fernet(self):
+        """Clés Fernet de l'ancien format pour chaque secret du trousseau (le courant d'abord), dérivées au premier usage"""
+        if self._fernet is None:
+            versions = sorted(self.keys.secrets, key=lambda version: (version != self.keys.current, -version))
+            self._fernet = MultiFernet([
+                Fernet(base64.urlsafe_b64encode(derive_key(self.keys.secrets[version], LEGACY_SALT)))
+                for version in versions
+            ])
+        return self._fernet
+    
+    def encrypt_bytes(self, plaintext, associated_data=None):
+        """Chiffre des octets (format compact: version, nonce, ciphertext+tag)"""
+        nonce = os.urandom(NONCE_SIZE)
+        version = self.keys.current
+        return bytes((version,)) + nonce + self.keys.cipher(version).encrypt(nonce, plaintext, associated_data)
+    
+    def decrypt_bytes(self, token, associated_data=None):
+        """Déchiffre des octets produits par encrypt_bytes"""
+        version, nonce, ciphertext = token[0], token[1:1 + NONCE_SIZE], token[1 + NONCE_SIZE:]
+        return self.keys.cipher(version).decrypt(nonce, ciphertext, associated_data)
     
     def encrypt_string(self, plaintext):
         """Chiffre une chaîne de caractères"""
         if not plaintext:
             return None
         
-        encrypted = self.fernet.encrypt(plaintext.encode('utf-8'))
-        return base64.urlsafe_b64encode(encrypted).decode('utf-8')
+        return _b64encode(self.encrypt_bytes(plaintext.encode('utf-8')))
     
     def decrypt_string(self, ciphertext):
         """Déchiffre une chaîne de caractères"""
@@ -46,12 +149,34 @@ class EncryptionManager:
             return None
         
         try:
-            encrypted_data = base64.urlsafe_b64decode(ciphertext.encode('utf-8'))
-            decrypted = self.fernet.decrypt(encrypted_data)
-            return decrypted.decode('utf-8')
+            token = _b64decode(ciphertext)
+            if token[:1] == b'g':
+                # Ancien format: base64 d'un token Fernet (déjà en base64)
+                return self.fernet.decrypt(token).decode('utf-8')
+            return self.decrypt_bytes(token).decode('utf-8')
         except Exception:
             return None
     
+    def encrypt_many(self, values):
+        """encrypt_string sur une liste, avec un seul tirage de nonces pour le lot"""
+        version = self.keys.current
+        cipher = self.keys.cipher(version)
+        prefix = bytes((version,))
+        nonces = os.urandom(NONCE_SIZE * len(values))
+        
+        encrypted = []
+        for index, value in enumerate(values):
+            if not value:
+                encrypted.append(None)
+                continue
+            nonce = nonces[index * NONCE_SIZE:(index + 1) * NONCE_SIZE]
+            encrypted.append(_b64encode(prefix + nonce + cipher.encrypt(nonce, value.encode('utf-8'), None)))
+        return encrypted
+    
+    def decrypt_many(self, ciphertexts):
+        """decrypt_string sur une liste (None pour les entrées invalides)"""
+        return [self.decrypt_string(ciphertext) for ciphertext in ciphertexts]
+    
     def encrypt_dict(self, data):
         """Chiffre un dictionnaire"""
         if not data:
@@ -78,10 +203,11 @@ class EncryptionManager:
         if salt is None:
             salt = secrets.token_bytes(32)
         
-        pwdhash = hashlib.pbkdf2_hmac('sha256', 
-                                     password.encode('utf-8'), 
-                                     salt, 
-                                     100000)
+        # PBKDF2 runs in the hashing pool, off the request thread
+        pwdhash = default_hasher().run(hashlib.pbkdf2_hmac, 'sha256',
+                                       password.encode('utf-8'),
+                                       salt,
+                                       100000)
         
         return {
             'hash': base64.b64encode(pwdhash).decode('utf-8'),
@@ -91,10 +217,10 @@ class EncryptionManager:
     def verify_password(self, password, stored_hash, stored_salt):
         """Vérifie un mot de passe"""
         salt = base64.b64decode(stored_salt.encode('utf-8'))
-        pwdhash = hashlib.pbkdf2_hmac('sha256',
-                                     password.encode('utf-8'),
-                                     salt,
-                                     100000)
+        pwdhash = default_hasher().run(hashlib.pbkdf2_hmac, 'sha256',
+                                       password.encode('utf-8'),
+                                       salt,
+                                       100000)
         
         stored_hash_bytes = base64.b64decode(stored_hash.encode('utf-8'))
         return hmac.compare_digest(pwdhash, stored_hash_bytes)
@@ -125,53 +251,47 @@ class EncryptionManager:
         return hmac.compare_digest(signature, expected_signature)
 
 class SecureStorage:
-    """Stockage sécurisé pour les données sensibles"""
+    """Stockage sécurisé pour les données sensibles
+    
+    Les valeurs sont chiffrées puis confiées à un backend ttl_store borné
+    (mémoire par défaut, fichier SQLite partagé entre workers via
+    SECURE_STORAGE_URL): expiration par tas, éviction LRU au budget d'octets.
+    """
     
-    def __init__(self, encryption_manager):
+    def __init__(self, encryption_manager, backend=None):
         self.encryption = encryption_manager
-        self.storage = {}  # En production, utiliser Redis ou une base sécurisée
+        if backend is None:
+            backend = open_backend(
+                os.environ.get('SECURE_STORAGE_URL'),
+                max_bytes=int(os.environ.get('SECURE_STORAGE_MAX_BYTES', 64 << 20)),
+                max_entries=int(os.environ.get('SECURE_STORAGE_MAX_ENTRIES', 100000))
+            )
+        self.storage = backend
     
     def store_sensitive_data(self, key, data, ttl=3600):
         """Stocke des données sensibles chiffrées"""
-        encrypted_data = self.encryption.encrypt_dict(data)
-        
-        self.storage[key] = {
-            'data': encrypted_data,
-            'expires_at': time.time() + ttl,
-            'created_at': time.time()
-        }
+        plaintext = json.dumps(data, sort_keys=True).encode('utf-8')
+        self.storage.put(key, self.encryption.encrypt_bytes(plaintext, key.encode('utf-8')), time.time() + ttl)
     
     def retrieve_sensitive_data(self, key):
-        """Récupère des données sensibles"""
-        if key not in self.storage:
+        """Récupère des données sensibles (None si absentes ou expirées)"""
+        token = self.storage.get(key)
+        if token is None:
             return None
         
-        stored_item = self.storage[key]
-        
-        # Vérifier l'expiration
-        if time.time() > stored_item['expires_at']:
-            del self.storage[key]
+        try:
+            # La clé est liée au chiffré: une valeur recopiée sous une autre clé ne se déchiffre pas
+            return json.loads(self.encryption.decrypt_bytes(token, key.encode('utf-8')))
+        except Exception:
             return None
-        
-        return self.encryption.decrypt_dict(stored_item['data'])
     
     def delete_sensitive_data(self, key):
         """Supprime des données sensibles"""
-        if key in self.storage:
-            del self.storage[key]
+        self.storage.delete(key)
     
     def cleanup_expired_data(self):
         """Nettoie les données expirées"""
-        now = time.time()
-        expired_keys = [
-            key for key, item in self.storage.items()
-            if now > item['expires_at']
-        ]
-        
-        for key in expired_keys:
-            del self.storage[key]
-        
-        return len(expired_keys)
+        return self.storage.purge_expired()
 
 class DataMasking:
     """Utilitaires de masquage de données"""
@@ -247,22 +367,36 @@ class DataMasking:
         
         return masked_data
 
+def _b64encode(token):
+    return base64.urlsafe_b64encode(token).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
 # Décorateur pour le chiffrement automatique
 def encrypt_response_data(fields_to_encrypt=None):
-    """Décorateur pour chiffrer automatiquement les données de réponse"""
+    """Décorateur pour chiffrer automatiquement les données de réponse
+    
+    Accepte un dictionnaire ou une liste de dictionnaires; tous les champs
+    sont chiffrés en un seul appel à encrypt_many.
+    """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             response = f(*args, **kwargs)
             
-            if isinstance(response, dict) and fields_to_encrypt:
-                encryption_manager = EncryptionManager()
-                
-                for field in fields_to_encrypt:
-                    if field in response:
-                        response[field] = encryption_manager.encrypt_string(
-                            str(response[field])
-                        )
+            if fields_to_encrypt and isinstance(response, (dict, list)):
+                items = [response] if isinstance(response, dict) else response
+                targets = [
+                    (item, field) for item in items if isinstance(item, dict)
+                    for field in fields_to_encrypt if field in item
+                ]
+                if targets:
+                    encrypted = EncryptionManager().encrypt_many([str(item[field]) for item, field in targets])
+                    for (item, field), value in zip(targets, encrypted):
+                        item[field] = value
             
             return response
         
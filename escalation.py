@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Alert Escalation Scheduler
+Escalates unresolved alerts on time without polling the alerts table.
+
+Pending alerts are loaded once into a min-heap keyed on their next
+escalation time. A single background thread sleeps until the earliest
+deadline (or until a new alert is scheduled earlier), raises the level
+of every alert that is due, re-queues it for its next level and hands
+the level changes to a persistence callback in batches. Resolved alerts
+are cancelled lazily: their heap entries are skipped when popped.
+
+    scheduler = EscalationScheduler(persist_escalations)
+    scheduler.load(pending_alerts)   # (id, severity, level, since) tuples
+    scheduler.start()
+    scheduler.schedule(alert.id, alert.severity, alert.escalation_level, alert.timestamp)
+    scheduler.cancel(alert.id)       # once resolved
+"""
+
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Seconds an alert may stay at a level before it moves to the next one
+DEFAULT_POLICY = {'emergency': 120, 'critical': 300, 'high': 900, 'medium': 3600, 'low': 14400}
+MAX_LEVEL = 5
+
+
+class Escalation(NamedTuple):
+    alert_id: int
+    level: int
+    escalated_at: datetime
+
+
+class EscalationScheduler:
+    """Heap of next-escalation deadlines drained by one background thread"""
+
+    def __init__(self, persist: Callable[[List[Escalation]], None], policy: Optional[Dict[str, float]] = None,
+                 max_level: int = MAX_LEVEL, flush_seconds: float = 5.0, batch_size: int = 500,
+                 clock: Callable[[], datetime] = datetime.utcnow):
+        self.persist = persist
+        self.policy = dict(DEFAULT_POLICY if policy is None else policy)
+        self.max_level = max_level
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.clock = clock
+
+        self._heap: List[Tuple[datetime, int, int]] = []   # (deadline, generation, alert_id)
+        self._alerts: Dict[int, Tuple[int, str, int]] = {}  # alert_id -> (generation, severity, level)
+        self._generations = itertools.count()
+        self._pending: List[Escalation] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def _deadline(self, severity: str, since: datetime) -> Optional[datetime]:
+        seconds = self.policy.get(severity)
+        return None if seconds is None else since + timedelta(seconds=seconds)
+
+    def _push(self, alert_id: int, severity: str, level: int, since: datetime) -> bool:
+        deadline = self._deadline(severity, since)
+        if deadline is None or level >= self.max_level:
+            self._alerts.pop(alert_id, None)
+            return False
+        generation = next(self._generations)
+        self._alerts[alert_id] = (generation, severity, level)
+        heapq.heappush(self._heap, (deadline, generation, alert_id))
+        return True
+
+    def load(self, alerts: Iterable[Tuple[int, str, int, datetime]]) -> int:
+        """Bulk-load unresolved alerts as (id, severity, level, since) in one heapify"""
+        with self._condition:
+            entries = []
+            for alert_id, severity, level, since in alerts:
+                deadline = self._deadline(severity, since)
+                if deadline is None or level >= self.max_level:
+                    continue
+                generation = next(self._generations)
+                self._alerts[alert_id] = (generation, severity, level)
+                entries.append((deadline, generation, alert_id))
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+            self._condition.notify()
+            return len(entries)
+
+    def schedule(self, alert_id: int, severity: str, level: int, since: datetime):
+        """(Re)schedule one alert; `since` is when it reached its current level"""
+        with self._condition:
+            if self._push(alert_id, severity, level, since):
+                self._condition.notify()
+
+    def cancel(self, alert_id: int):
+        """Stop escalating an alert (resolved); its heap entry is skipped later"""
+        with self._condition:
+            self._alerts.pop(alert_id, None)
+
+    def next_deadline(self) -> Optional[datetime]:
+        with self._condition:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _discard_stale(self):
+        while self._heap:
+            _, generation, alert_id = self._heap[0]
+            current = self._alerts.get(alert_id)
+            if current is not None and current[0] == generation:
+                return
+            heapq.heappop(self._heap)
+
+    # ------------------------------------------------------------------
+    # Firing
+    # ------------------------------------------------------------------
+
+    def run_due(self, now: Optional[datetime] = None) -> List[Escalation]:
+        """Escalate every alert whose deadline has passed; O(k log n) for k due alerts"""
+        now = now or self.clock()
+        fired = []
+        with self._condition:
+            while True:
+                self._discard_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                deadline, _, alert_id = heapq.heappop(self._heap)
+                _, severity, level = self._alerts[alert_id]
+                escalation = Escalation(alert_id, level + 1, deadline)
+                fired.append(escalation)
+                # The next level is timed from this deadline, so a late run catches up
+                self._push(alert_id, severity, level + 1, deadline)
+            self._pending.extend(fired)
+        return fired
+
+    def flush(self) -> int:
+        """Hand the accumulated level changes to `persist` in batches
+
+        A batch that fails is put back, with everything after it, and the
+        error re-raised, so no level change is lost.
+        """
+        with self._condition:
+            pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.batch_size):
+            try:
+                self.persist(pending[start:start + self.batch_size])
+            except Exception:
+                with self._condition:
+                    self._pending[:0] = pending[start:]
+                raise
+        return len(pending)
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='alert-escalation', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        last_flush = self.clock()
+        while True:
+            with self._condition:
+                if self._stopping:
+                    return
+                flush_at = last_flush + timedelta(seconds=self.flush_seconds) if self._pending else None
+                wakes = [moment for moment in (self.next_deadline(), flush_at) if moment is not None]
+                now = self.clock()
+                if not wakes:
+                    self._condition.wait()
+                elif min(wakes) > now:
+                    self._condition.wait((min(wakes) - now).total_seconds())
+                if self._stopping:
+                    return
+            self.run_due()
+            if self._pending and (self.clock() - last_flush).total_seconds() >= self.flush_seconds:
+                try:
+                    self.flush()
+                except Exception:
+                    pass  # persist reports its own failures; the changes stay queued
+                last_flush = self.clock()
+
+    def __len__(self):
+        return len(self._alerts)
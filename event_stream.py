@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Event Stream
+In-process publish/subscribe broker behind the Server-Sent Events feed.
+
+Publishers (ingestion, alerting) push small events per bunker; every open
+stream owns a bounded queue, so a slow browser only ever loses its own
+oldest events and never blocks the writer or grows memory without limit.
+"""
+
+import itertools
+import json
+import queue
+import threading
+from typing import Dict, Iterator, Optional, Set
+
+
+class Subscription:
+    """One stream's view of a topic, backed by a bounded queue"""
+
+    def __init__(self, broker: 'EventBroker', topic: str, maxsize: int):
+        self.broker = broker
+        self.topic = topic
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: Dict):
+        """Enqueue without blocking, discarding the oldest event when full"""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Next event, or None once `timeout` seconds pass without one"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """Fan-out of events to the subscribers of a topic (a bunker id)"""
+
+    def __init__(self, queue_size: int = 100, max_subscribers: int = 1000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._ids = itertools.count(1)
+
+    def subscribe(self, topic: str) -> Optional[Subscription]:
+        """Open a subscription, or None when the broker is at capacity"""
+        with self._lock:
+            if self.subscriber_count() >= self.max_subscribers:
+                return None
+            subscription = Subscription(self, topic, self.queue_size)
+            self._topics.setdefault(topic, set()).add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def publish(self, topic: str, event: str, data: Dict) -> int:
+        """Deliver an event to every subscriber of `topic`; returns the fan-out"""
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+            message = {'id': next(self._ids), 'event': event, 'data': data}
+        for subscription in subscribers:
+            subscription.offer(message)
+        return len(subscribers)
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        if topic is not None:
+            return len(self._topics.get(topic, ()))
+        return sum(len(subscribers) for subscribers in self._topics.values())
+
+    def stream(self, subscription: Subscription, heartbeat: float = 15.0) -> Iterator[str]:
+        """SSE-encoded events for a subscription, with comment heartbeats"""
+        try:
+            while True:
+                message = subscription.get(timeout=heartbeat)
+                if message is None:
+                    yield ': heartbeat\n\n'
+                else:
+                    yield format_sse(message['data'], message['event'], message['id'])
+        finally:
+            subscription.close()
+
+
+def format_sse(data: Dict, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - History Export Encoding
+NDJSON and CSV bodies built chunk by chunk from plain row tuples.
+
+The export endpoint fetches readings through a server-side cursor, one
+chunk of tuples at a time. encode_chunks turns each chunk into one
+string of the response body, so memory stays flat however long the
+exported history is.
+
+    body = encode_chunks(chunks, ('id', 'bunker_id', 'timestamp', 'temperature'), 'csv')
+    return Response(stream_with_context(body), mimetype=FORMATS['csv'])
+"""
+
+import csv
+import io
+import json
+from typing import Iterable, Iterator, Sequence
+
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def encode_chunks(chunks: Iterable[Sequence[tuple]], columns: Sequence[str], export_format: str) -> Iterator[str]:
+    """Encoded body, one string per chunk (CSV starts with a header line)
+
+    Datetime values are written as ISO 8601, missing values as null in
+    NDJSON and as empty fields in CSV.
+    """
+    if export_format not in FORMATS:
+        raise ValueError(f'Unsupported export format: {export_format}')
+
+    columns = tuple(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if export_format == 'csv':
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in chunk:
+            row = [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+            if export_format == 'csv':
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(dict(zip(columns, row))))
+                buffer.write('\n')
+        yield buffer.getvalue()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Fleet Overview
+Status cards for every bunker from two pre-aggregated query results.
+
+The fleet endpoint runs one window-function query for the latest reading
+of each bunker and one grouped count of active alerts per bunker and
+severity. status_cards merges both into one card per bunker without
+further database access.
+
+    cards = status_cards(latest, alert_counts, stale_before=datetime.utcnow() - timedelta(minutes=15))
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SEVERITY_ORDER = ('low', 'medium', 'high', 'critical')
+
+
+def worst_severity(by_severity: Dict[str, int]) -> Optional[str]:
+    """Most severe level present; unknown levels rank below 'low'"""
+    return max(by_severity, key=lambda severity: SEVERITY_ORDER.index(severity)
+               if severity in SEVERITY_ORDER else -1, default=None)
+
+
+def status_cards(latest: Dict[str, Dict], alert_counts: Dict[str, Dict[str, int]],
+                 stale_before: datetime) -> List[Dict]:
+    """One card per bunker, sorted by bunker id
+
+    `latest` maps bunker_id to its latest reading (ISO `timestamp`) and
+    `alert_counts` maps bunker_id to {severity: active alert count}. A
+    bunker without a reading since `stale_before` is 'offline'; otherwise
+    it is 'critical', 'warning' (any active alert) or 'normal'.
+    """
+    stale = stale_before.isoformat()
+    cards = []
+    for bunker_id in sorted(set(latest) | set(alert_counts)):
+        reading = latest.get(bunker_id)
+        by_severity = alert_counts.get(bunker_id, {})
+
+        if reading is None or (reading['timestamp'] or '') < stale:
+            status = 'offline'
+        elif worst_severity(by_severity) == 'critical':
+            status = 'critical'
+        elif by_severity:
+            status = 'warning'
+        else:
+            status = 'normal'
+
+        cards.append({
+            'bunker_id': bunker_id,
+            'status': status,
+            'latest': reading,
+            'active_alerts': sum(by_severity.values()),
+            'alerts_by_severity': by_severity
+        })
+    return cards
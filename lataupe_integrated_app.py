@@ -16,34 +16,59 @@ import time
 import random
 import logging
 import hashlib
+import hmac
 import secrets
 import unittest
 import asyncio
 import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import io
+import csv
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Tuple
 from functools import wraps
 from dataclasses import dataclass, asdict
 
+import numpy as np
+
 # Flask and extensions
-from flask import Flask, request, jsonify, session, send_from_directory, g, render_template_string
+from flask import Flask, request, jsonify, session, send_from_directory, g, render_template_string, Response, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
 from werkzeug.utils import secure_filename
 
+# Local modules
+from reading_buffer import LatestReadingBuffer
+from alert_index import ActiveAlertIndex
+from auth_cache import PrincipalCache, TokenCache
+from password_hashing import HasherBusy, PasswordHasher
+from rate_limit import MemoryStore, RateLimiter, SharedStore
+from event_stream import EventBroker, format_sse
+from anomaly import AnomalyDetector
+import alert_engine
+import cold_storage
+import downsample
+import export
+import fleet
+import rollups
+import simulator
+import wire
+
 # JWT and encryption
 try:
     import jwt
     import bcrypt
-    from marshmallow import Schema, fields, ValidationError
+    from marshmallow import Schema, fields, validate, ValidationError
     from bleach import clean
 except ImportError:
     print("Installing required packages...")
     os.system("pip install PyJWT bcrypt marshmallow bleach")
     import jwt
     import bcrypt
-    from marshmallow import Schema, fields, ValidationError
+    from marshmallow import Schema, fields, validate, ValidationError
     from bleach import clean
 
 # ============================================================================
@@ -114,21 +139,8 @@ class SecurityManager:
     
     @staticmethod
     def rate_limit_check(identifier: str, max_requests: int = 10, window: int = 60) -> bool:
-        """Simple rate limiting check"""
-        # Implementation would use Redis or similar in production
-        # For now, we'll use a simple in-memory store
-        if not hasattr(SecurityManager, '_rate_limit_store'):
-            SecurityManager._rate_limit_store = {}
-        
-        now = time.time()
-        key = f"{identifier}:{int(now // window)}"
-        
-        current_count = SecurityManager._rate_limit_store.get(key, 0)
-        if current_count >= max_requests:
-            return False
-        
-        SecurityManager._rate_limit_store[key] = current_count + 1
-        return True
+        """Sliding-window rate limit: at most max_requests per window seconds"""
+        return rate_limiter.allow(identifier, max_requests, window)
 
 # ============================================================================
 # VALIDATION SCHEMAS
@@ -148,12 +160,15 @@ class RegisterSchema(Schema):
 
 class EnvironmentalDataSchema(Schema):
     """Environmental data validation schema"""
-    bunker_id = fields.Str(required=True, validate=lambda x: len(x) >= 3)
-    temperature = fields.Float(validate=lambda x: -50 <= x <= 50)
-    humidity = fields.Float(validate=lambda x: 0 <= x <= 100)
-    oxygen_level = fields.Float(validate=lambda x: 0 <= x <= 25)
-    co2_level = fields.Float(validate=lambda x: 0 <= x <= 10000)
-    radiation_level = fields.Float(validate=lambda x: 0 <= x <= 100)
+    bunker_id = fields.Str(required=True, validate=validate.Length(min=3, max=50))
+    temperature = fields.Float(validate=validate.Range(min=-50, max=50))
+    humidity = fields.Float(validate=validate.Range(min=0, max=100))
+    oxygen_level = fields.Float(validate=validate.Range(min=0, max=25))
+    co2_level = fields.Float(validate=validate.Range(min=0, max=10000))
+    radiation_level = fields.Float(validate=validate.Range(min=0, max=100))
+    air_quality_index = fields.Int(validate=validate.Range(min=0, max=500))
+    pressure = fields.Float(validate=validate.Range(min=800, max=1200))
+    timestamp = fields.DateTime()
 
 # ============================================================================
 # CONFIGURATION AND CONSTANTS
@@ -163,11 +178,80 @@ class Config:
     """Application configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'lataupe-bunker-ultra-secret-2025')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-ultra-secret-key')
+    
+    # Verified tokens and user snapshots cached for require_auth (set a name to
+    # share principal invalidations across workers)
+    AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 10000))
+    AUTH_PRINCIPAL_TTL_SECONDS = float(os.environ.get('AUTH_PRINCIPAL_TTL_SECONDS', 60))
+    AUTH_PRINCIPAL_SHM_NAME = os.environ.get('AUTH_PRINCIPAL_SHM_NAME')
+    
+    # Password hashing runs in a process pool; cost calibrated to this latency
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64))
+    PASSWORD_HASH_TARGET_MS = float(os.environ.get('PASSWORD_HASH_TARGET_MS', 250))
+    PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM', 'scrypt')
+    
+    # Rate limits (GCRA, one timestamp per key; set a name to enforce them across workers)
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))
+    RATE_LIMIT_SLOTS = int(os.environ.get('RATE_LIMIT_SLOTS', 65536))
+    RATE_LIMIT_SHM_NAME = os.environ.get('RATE_LIMIT_SHM_NAME')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///lataupe_bunker.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
     ENVIRONMENT = os.environ.get('ENVIRONMENT', 'development')
     
+    # Sensor ingestion (group commit)
+    INGEST_MAX_READINGS_PER_REQUEST = int(os.environ.get('INGEST_MAX_READINGS_PER_REQUEST', 5000))
+    INGEST_GROUP_COMMIT_ROWS = int(os.environ.get('INGEST_GROUP_COMMIT_ROWS', 500))
+    INGEST_GROUP_COMMIT_SECONDS = float(os.environ.get('INGEST_GROUP_COMMIT_SECONDS', 1.0))
+    # Readings kept for retry after a failed commit; beyond this they go to the dead-letter file
+    INGEST_MAX_PENDING = int(os.environ.get('INGEST_MAX_PENDING', 50000))
+    # Commit attempts per batch before it goes to the dead-letter file
+    INGEST_MAX_ATTEMPTS = int(os.environ.get('INGEST_MAX_ATTEMPTS', 3))
+    INGEST_DEAD_LETTER_PATH = os.environ.get('INGEST_DEAD_LETTER_PATH')
+    # Sensor gateways authenticate with X-Device-Key (comma-separated keys) or a bearer token
+    INGEST_DEVICE_KEYS = {key.strip() for key in os.environ.get('INGEST_DEVICE_KEYS', '').split(',') if key.strip()}
+    
+    # Latest readings kept in memory (set a name to share them across workers)
+    LATEST_READINGS_CAPACITY = int(os.environ.get('LATEST_READINGS_CAPACITY', 64))
+    LATEST_READINGS_MAX_BUNKERS = int(os.environ.get('LATEST_READINGS_MAX_BUNKERS', 256))
+    LATEST_READINGS_SHM_NAME = os.environ.get('LATEST_READINGS_SHM_NAME')
+    # Directory for the inter-process lock files of shared-memory segments
+    SHM_LOCK_DIR = os.environ.get('SHM_LOCK_DIR')
+    
+    # Active alerts served from memory (set a name to share invalidations across workers)
+    ACTIVE_ALERTS_MAX_BUNKERS = int(os.environ.get('ACTIVE_ALERTS_MAX_BUNKERS', 10000))
+    ACTIVE_ALERTS_SHM_NAME = os.environ.get('ACTIVE_ALERTS_SHM_NAME')
+    
+    # Live dashboard stream (Server-Sent Events)
+    STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', 100))
+    STREAM_MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 1000))
+    STREAM_HEARTBEAT_SECONDS = float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))
+    
+    # Streaming anomaly detection (EWMA + running median/MAD per bunker and metric)
+    ANOMALY_ALPHA = float(os.environ.get('ANOMALY_ALPHA', 0.05))
+    ANOMALY_THRESHOLD = float(os.environ.get('ANOMALY_THRESHOLD', 4.0))
+    ANOMALY_WARMUP = int(os.environ.get('ANOMALY_WARMUP', 30))
+    
+    # Open threshold alerts close after readings stay clear of the band this long
+    ALERT_COOLDOWN_SECONDS = int(os.environ.get('ALERT_COOLDOWN_SECONDS', 300))
+    
+    # Upper bound on explicit ids in one bulk resolve request
+    ALERT_BULK_MAX_IDS = int(os.environ.get('ALERT_BULK_MAX_IDS', 10000))
+    
+    # Declarative alert thresholds and health bands, re-read when the file changes
+    ALERT_RULES_PATH = os.environ.get('ALERT_RULES_PATH', alert_engine.DEFAULT_RULES_PATH)
+    ALERT_RULES_CHECK_SECONDS = float(os.environ.get('ALERT_RULES_CHECK_SECONDS', 5))
+    
+    # Fleet overview: bunkers without a reading for this long are reported offline
+    FLEET_STALE_MINUTES = int(os.environ.get('FLEET_STALE_MINUTES', 15))
+    
+    # Cold storage: readings older than this are packed into compressed daily blocks
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 30))
+    
+    # Streaming export (rows fetched per server-side cursor round trip)
+    EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', 1000))
+    
     # Stripe Configuration
     STRIPE_PUBLISHABLE_KEY = 'pk_live_51QrrpyAgNXcbbeAvW0sQk7AKth6aNLyiIGLONux6z07z9oRAt0aCvXwq2d5H5jIwSMOgEDieSaGq08Ksvqvq8dB500qVZIIXrF'
     STRIPE_BUY_BUTTON_ID = 'buy_btn_1Rj3FlAgNXcbbeAvd7p20Qgi'
@@ -284,12 +368,18 @@ class User(db.Model):
     last_login = db.Column(db.DateTime)
     
     def set_password(self, password: str):
-        """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        """Set password hash (computed in the hashing pool)"""
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password: str) -> bool:
-        """Check password"""
-        return check_password_hash(self.password_hash, password)
+        """Check password, upgrading a hash weaker than the current policy
+        
+        The caller commits, so the upgrade is saved with the login.
+        """
+        valid, upgraded = password_hasher.verify(self.password_hash, password)
+        if upgraded:
+            self.password_hash = upgraded
+        return valid
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -304,6 +394,54 @@ class User(db.Model):
             'last_login': self.last_login.isoformat() if self.last_login else None
         }
 
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of a User, cached for authenticated requests"""
+    id: int
+    username: str
+    email: str
+    role: str
+    is_premium: bool
+    premium_tier: str
+    created_at: Optional[datetime]
+    last_login: Optional[datetime]
+    
+    @classmethod
+    def from_user(cls, user: 'User') -> 'Principal':
+        return cls(user.id, user.username, user.email, user.role, user.is_premium,
+                   user.premium_tier, user.created_at, user.last_login)
+    
+    # Same attributes as User, so the same serialization applies
+    to_dict = User.to_dict
+
+PRINCIPAL_FIELDS = ('role', 'is_premium', 'premium_tier')
+
+def after_commit(target, key, callback):
+    """Run callback once target's session commits (once per key); dropped on rollback"""
+    db.object_session(target).info.setdefault('after_commit', {})[key] = callback
+
+@event.listens_for(db.session, 'after_commit')
+def run_after_commit(session):
+    for callback in session.info.pop('after_commit', {}).values():
+        callback()
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_after_commit(session):
+    session.info.pop('after_commit', None)
+
+@event.listens_for(User, 'after_update')
+def invalidate_principal(mapper, connection, target):
+    """Role and premium changes take effect on the user's next request, once committed"""
+    state = db.inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS):
+        user_id = target.id
+        after_commit(target, ('principal', user_id), lambda: principal_cache.invalidate(user_id))
+
+@event.listens_for(User, 'after_delete')
+def forget_principal(mapper, connection, target):
+    user_id = target.id
+    after_commit(target, ('principal', user_id), lambda: principal_cache.invalidate(user_id))
+
 class BunkerUser(db.Model):
     """Bunker-specific user data"""
     id = db.Column(db.Integer, primary_key=True)
@@ -316,6 +454,9 @@ class BunkerUser(db.Model):
     
     user = db.relationship('User', backref=db.backref('bunker_profile', uselist=False))
 
+READING_FIELDS = ('temperature', 'humidity', 'oxygen_level', 'co2_level',
+                  'radiation_level', 'air_quality_index', 'pressure')
+
 class EnvironmentalData(db.Model):
     """Environmental monitoring data"""
     id = db.Column(db.Integer, primary_key=True)
@@ -328,6 +469,11 @@ class EnvironmentalData(db.Model):
     radiation_level = db.Column(db.Float)
     air_quality_index = db.Column(db.Integer)
     pressure = db.Column(db.Float)
+    is_anomaly = db.Column(db.Boolean, default=False, index=True)
+    
+    __table_args__ = (
+        db.Index('idx_env_data_bunker_timestamp', 'bunker_id', 'timestamp'),
+    )
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -341,8 +487,42 @@ class EnvironmentalData(db.Model):
             'co2_level': self.co2_level,
             'radiation_level': self.radiation_level,
             'air_quality_index': self.air_quality_index,
-            'pressure': self.pressure
+            'pressure': self.pressure,
+            'is_anomaly': bool(self.is_anomaly)
         }
+    
+    def reading_values(self) -> Dict:
+        """Sensor values keyed by field name"""
+        return {field: getattr(self, field) for field in READING_FIELDS}
+
+class EnvironmentalRollup(db.Model):
+    """Minute/hour/day aggregates of environmental metrics"""
+    __table_args__ = (
+        db.UniqueConstraint('bunker_id', 'resolution', 'bucket_start', 'metric',
+                            name='uq_environmental_rollup_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    bunker_id = db.Column(db.String(50), nullable=False)
+    resolution = db.Column(db.String(10), nullable=False)  # minute, hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    metric = db.Column(db.String(30), nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+    min_value = db.Column(db.Float, nullable=False)
+    max_value = db.Column(db.Float, nullable=False)
+    sum_value = db.Column(db.Float, nullable=False)
+
+class EnvironmentalArchive(db.Model):
+    """Compressed rows block of one bunker-day of archived readings"""
+    __table_args__ = (
+        db.UniqueConstraint('bunker_id', 'day', name='uq_environmental_archive_block'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    bunker_id = db.Column(db.String(50), nullable=False)
+    day = db.Column(db.DateTime, nullable=False)  # midnight UTC
+    sample_count = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)
 
 class Alert(db.Model):
     """Alert management"""
@@ -356,6 +536,14 @@ class Alert(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     resolved_at = db.Column(db.DateTime)
     resolved_by = db.Column(db.String(80))
+    # Sustained incidents update one alert instead of inserting duplicates
+    occurrence_count = db.Column(db.Integer, default=1)
+    last_seen_at = db.Column(db.DateTime)
+    peak_value = db.Column(db.Float)
+    
+    __table_args__ = (
+        db.Index('idx_alerts_status_bunker', 'status', 'bunker_id'),
+    )
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -369,7 +557,10 @@ class Alert(db.Model):
             'status': self.status,
             'created_at': self.created_at.isoformat(),
             'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
-            'resolved_by': self.resolved_by
+            'resolved_by': self.resolved_by,
+            'occurrence_count': self.occurrence_count,
+            'last_seen_at': self.last_seen_at.isoformat() if self.last_seen_at else None,
+            'peak_value': self.peak_value
         }
 
 # ============================================================================
@@ -393,9 +584,13 @@ class AuthService:
     
     @staticmethod
     def verify_token(token: str) -> Optional[Dict]:
-        """Verify JWT token"""
+        """Verify JWT token, skipping the signature check for tokens verified before"""
+        payload = verified_tokens.get(token)
+        if payload is not None:
+            return payload
         try:
             payload = jwt.decode(token, app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+            verified_tokens.put(token, payload)
             return payload
         except jwt.ExpiredSignatureError:
             bunker_logger.warning("Token expired")
@@ -413,13 +608,22 @@ class AuthService:
             if token and token.startswith('Bearer '):
                 token = token[7:]  # Remove 'Bearer ' prefix
                 payload = AuthService.verify_token(token)
-                if payload:
-                    g.current_user = User.query.get(payload['user_id'])
+                principal = AuthService.load_principal(payload['user_id']) if payload else None
+                if principal:
+                    g.current_user = principal
                     return f(*args, **kwargs)
             
             return jsonify({'error': 'Authentication required'}), 401
         return decorated_function
     
+    @staticmethod
+    def load_principal(user_id: int) -> Optional[Principal]:
+        """User snapshot from the principal cache, read from the database when stale"""
+        def load():
+            user = db.session.get(User, user_id)
+            return Principal.from_user(user) if user else None
+        return principal_cache.get(user_id, load)
+    
     @staticmethod
     def require_premium(f):
         """Premium subscription decorator"""
@@ -445,34 +649,7 @@ class EnvironmentalService:
         """Generate test environmental data"""
         try:
             # Define scenario parameters
-            scenarios = {
-                'normal': {
-                    'temp_range': (18, 24),
-                    'humidity_range': (40, 60),
-                    'oxygen_range': (19, 21),
-                    'co2_range': (300, 800),
-                    'radiation_range': (0.1, 0.3),
-                    'aqi_range': (10, 50)
-                },
-                'emergency': {
-                    'temp_range': (10, 35),
-                    'humidity_range': (20, 80),
-                    'oxygen_range': (16, 23),
-                    'co2_range': (800, 2000),
-                    'radiation_range': (0.5, 2.0),
-                    'aqi_range': (50, 150)
-                },
-                'critical': {
-                    'temp_range': (5, 40),
-                    'humidity_range': (10, 90),
-                    'oxygen_range': (14, 25),
-                    'co2_range': (1500, 5000),
-                    'radiation_range': (2.0, 10.0),
-                    'aqi_range': (150, 300)
-                }
-            }
-            
-            params = scenarios.get(scenario, scenarios['normal'])
+            params = simulator.SCENARIOS.get(scenario, simulator.SCENARIOS['normal'])
             
             # Generate data
             data = EnvironmentalData(
@@ -483,14 +660,27 @@ class EnvironmentalService:
                 co2_level=random.uniform(*params['co2_range']),
                 radiation_level=random.uniform(*params['radiation_range']),
                 air_quality_index=random.randint(*params['aqi_range']),
-                pressure=random.uniform(1010, 1030)
+                pressure=random.uniform(1010, 1030),
+                timestamp=datetime.utcnow()
             )
             
+            row = dict(data.reading_values(), bunker_id=data.bunker_id, timestamp=data.timestamp)
+            anomalies, detector_states = IngestionService.detect_anomalies([row])
+            data.is_anomaly = row['is_anomaly']
+            
             db.session.add(data)
+            db.session.flush()
+            RollupService.apply([row])
             db.session.commit()
+            anomaly_detector.commit(detector_states)
+            
+            latest_readings.push(data.bunker_id, data.timestamp, data.reading_values(), data.id)
+            StreamService.publish_readings([data.bunker_id])
             
             # Check for alerts
             AlertService.check_environmental_alerts(data)
+            if anomalies:
+                AlertService.check_anomaly_alerts(anomalies)
             
             bunker_logger.info(f"Test data generated for scenario: {scenario}")
             return True
@@ -501,31 +691,629 @@ class EnvironmentalService:
     
     @staticmethod
     def get_current_data(bunker_id: str) -> Optional[Dict]:
-        """Get current environmental data"""
+        """Get current environmental data
+        
+        Served from the in-memory ring buffer; SQL is only hit on a cold
+        start, after which the row seeds the buffer.
+        """
         try:
+            reading = latest_readings.latest(bunker_id)
+            if reading:
+                reading['timestamp'] = reading['timestamp'].isoformat()
+                return reading
+            
             data = EnvironmentalData.query.filter_by(bunker_id=bunker_id)\
                                          .order_by(EnvironmentalData.timestamp.desc())\
                                          .first()
+            if data:
+                latest_readings.push(data.bunker_id, data.timestamp, data.reading_values(), data.id)
             return data.to_dict() if data else None
         except Exception as e:
             bunker_logger.error(f"Failed to get current data: {str(e)}")
             return None
     
     @staticmethod
-    def get_historical_data(bunker_id: str, hours: int = 24) -> List[Dict]:
-        """Get historical environmental data"""
+    def get_historical_data(bunker_id: str, hours: int = 24, resolution: Optional[str] = None) -> List[Dict]:
+        """Get historical environmental data
+        
+        With a rollup `resolution` (minute, hour or day) one aggregated
+        entry per bucket is returned instead of every raw reading.
+        """
         try:
             since = datetime.utcnow() - timedelta(hours=hours)
+            if resolution in rollups.RESOLUTION_SECONDS:
+                return RollupService.get_buckets(bunker_id, resolution, since)
+            
             data = EnvironmentalData.query.filter(
                 EnvironmentalData.bunker_id == bunker_id,
                 EnvironmentalData.timestamp >= since
             ).order_by(EnvironmentalData.timestamp.desc()).all()
             
-            return [item.to_dict() for item in data]
+            # Windows reaching past the archive cutoff also decode cold blocks
+            readings = [item.to_dict() for item in data] + ArchiveService.get_readings(bunker_id, since)
+            readings.sort(key=lambda reading: reading['timestamp'], reverse=True)
+            return readings
         except Exception as e:
             bunker_logger.error(f"Failed to get historical data: {str(e)}")
             return []
 
+    @staticmethod
+    def get_historical_columns(bunker_id: str, hours: int = 24,
+                               resolution: Optional[str] = None) -> Tuple[List[datetime], Dict[str, List]]:
+        """Historical data as parallel columns, oldest first, straight from query tuples
+
+        Same selection as get_historical_data() without building a dict per
+        reading; rollup resolutions add `<metric>_min` / `<metric>_max` columns.
+        """
+        since = datetime.utcnow() - timedelta(hours=hours)
+        if resolution in rollups.RESOLUTION_SECONDS:
+            rows = db.session.query(
+                EnvironmentalRollup.bucket_start, EnvironmentalRollup.metric, EnvironmentalRollup.sample_count,
+                EnvironmentalRollup.min_value, EnvironmentalRollup.max_value, EnvironmentalRollup.sum_value
+            ).filter(
+                EnvironmentalRollup.bunker_id == bunker_id,
+                EnvironmentalRollup.resolution == resolution,
+                EnvironmentalRollup.bucket_start >= rollups.bucket_start(since, rollups.RESOLUTION_SECONDS[resolution])
+            ).all()
+            return rollups.pivot_columns(rows, READING_FIELDS)
+
+        rows = db.session.query(
+            EnvironmentalData.timestamp, *(getattr(EnvironmentalData, field) for field in READING_FIELDS)
+        ).filter(
+            EnvironmentalData.bunker_id == bunker_id,
+            EnvironmentalData.timestamp >= since
+        ).order_by(EnvironmentalData.timestamp).all()
+
+        archived = [(reading['timestamp'], *(reading[field] for field in READING_FIELDS))
+                    for reading in ArchiveService.iter_rows(bunker_id, since)]
+        if archived:
+            rows = sorted(archived + list(rows), key=lambda row: row[0])
+        if not rows:
+            return [], {field: [] for field in READING_FIELDS}
+
+        timestamps, *values = zip(*rows)
+        return list(timestamps), dict(zip(READING_FIELDS, (list(column) for column in values)))
+
+# ============================================================================
+# ROLLUP SERVICE
+# ============================================================================
+
+class RollupService:
+    """Incremental minute/hour/day rollups of environmental data"""
+    
+    REBUILD_CHUNK_ROWS = 5000
+    
+    @staticmethod
+    def apply(rows: List[Dict]) -> int:
+        """Merge readings into the rollups inside the current transaction"""
+        aggregates = rollups.accumulate(rows, READING_FIELDS)
+        return rollups.upsert(db.session.connection(), EnvironmentalRollup.__table__, aggregates)
+    
+    @staticmethod
+    def get_buckets(bunker_id: str, resolution: str, since: datetime) -> List[Dict]:
+        """Aggregated buckets for a bunker, newest first"""
+        rows = EnvironmentalRollup.query.filter(
+            EnvironmentalRollup.bunker_id == bunker_id,
+            EnvironmentalRollup.resolution == resolution,
+            EnvironmentalRollup.bucket_start >= rollups.bucket_start(since, rollups.RESOLUTION_SECONDS[resolution])
+        ).all()
+        return rollups.pivot(rows, resolution)
+    
+    @staticmethod
+    def rebuild(bunker_id: Optional[str] = None) -> int:
+        """Recompute rollups from raw and archived readings (e.g. after importing history)"""
+        rollup_query = EnvironmentalRollup.query
+        raw_query = db.session.query(EnvironmentalData.bunker_id, EnvironmentalData.timestamp,
+                                     *(getattr(EnvironmentalData, field) for field in READING_FIELDS))
+        if bunker_id:
+            rollup_query = rollup_query.filter_by(bunker_id=bunker_id)
+            raw_query = raw_query.filter(EnvironmentalData.bunker_id == bunker_id)
+        
+        try:
+            rollup_query.delete(synchronize_session=False)
+            processed, chunk = 0, []
+            readings = itertools.chain(
+                (row._asdict() for row in raw_query.yield_per(RollupService.REBUILD_CHUNK_ROWS)),
+                ArchiveService.iter_rows(bunker_id)
+            )
+            for row in readings:
+                chunk.append(row)
+                if len(chunk) >= RollupService.REBUILD_CHUNK_ROWS:
+                    processed += len(chunk)
+                    RollupService.apply(chunk)
+                    chunk = []
+            if chunk:
+                processed += len(chunk)
+                RollupService.apply(chunk)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            bunker_logger.error("Rollup rebuild failed", exc_info=True)
+            raise
+        
+        bunker_logger.info(f"Rollups rebuilt from {processed} readings")
+        return processed
+
+# ============================================================================
+# ARCHIVE SERVICE
+# ============================================================================
+
+class ArchiveService:
+    """Cold storage: old readings packed into compressed per-day blocks"""
+    
+    # Sensor resolution archived values are quantized to
+    METRIC_DECIMALS = {'temperature': 2, 'humidity': 2, 'oxygen_level': 2, 'co2_level': 1,
+                       'radiation_level': 4, 'air_quality_index': 0, 'pressure': 2}
+    CHUNK_ROWS = 5000
+    
+    @staticmethod
+    def archive_old_readings(older_than_days: Optional[int] = None) -> int:
+        """Move readings older than the cutoff (whole UTC days) into archive blocks"""
+        days = app.config['ARCHIVE_AFTER_DAYS'] if older_than_days is None else older_than_days
+        cutoff = _day_of(datetime.utcnow() - timedelta(days=days))
+        table = EnvironmentalData.__table__
+        statement = db.select(table.c.id, table.c.bunker_id, table.c.timestamp,
+                              *(table.c[field] for field in READING_FIELDS))\
+                      .where(table.c.timestamp < cutoff)\
+                      .order_by(table.c.bunker_id, table.c.timestamp)
+        
+        # Only the rows actually encoded are deleted: a late reading committed
+        # after the SELECT also matches `timestamp < cutoff`, but is left for the next run
+        archived, group_key, group, archived_ids = 0, None, [], []
+        try:
+            # Rows arrive grouped by bunker then day, so one day is held in memory at a time
+            for row in db.session.execute(statement.execution_options(yield_per=ArchiveService.CHUNK_ROWS)):
+                key = (row.bunker_id, _day_of(row.timestamp))
+                if key != group_key and group:
+                    ArchiveService._store_day(*group_key, group)
+                    archived += len(group)
+                    group = []
+                group_key = key
+                archived_ids.append(row.id)
+                group.append(row._asdict())
+            if group:
+                ArchiveService._store_day(*group_key, group)
+                archived += len(group)
+            
+            for start in range(0, len(archived_ids), ArchiveService.CHUNK_ROWS):
+                db.session.execute(table.delete().where(
+                    table.c.id.in_(archived_ids[start:start + ArchiveService.CHUNK_ROWS])))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            bunker_logger.error("Archiving old readings failed", exc_info=True)
+            raise
+        
+        bunker_logger.info(f"Archived {archived} readings older than {cutoff.date().isoformat()}")
+        return archived
+    
+    @staticmethod
+    def _store_day(bunker_id: str, day: datetime, rows: List[Dict]):
+        """Encode one bunker-day, merging into an existing block (late data, re-runs)"""
+        timestamps = [_epoch_ms(row['timestamp']) for row in rows]
+        columns = {metric: [row[metric] for row in rows] for metric in READING_FIELDS}
+        block = EnvironmentalArchive.query.filter_by(bunker_id=bunker_id, day=day).first()
+        if block is None:
+            block = EnvironmentalArchive(bunker_id=bunker_id, day=day)
+            db.session.add(block)
+        else:
+            stored_timestamps, stored_columns = cold_storage.decode_rows(block.payload)
+            timestamps = stored_timestamps + timestamps
+            columns = {metric: stored_columns.get(metric, [None] * len(stored_timestamps)) + values
+                       for metric, values in columns.items()}
+        # Stable sort: readings sharing a timestamp keep their order and stay separate rows
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        block.sample_count = len(order)
+        block.payload = cold_storage.encode_rows(
+            [timestamps[i] for i in order],
+            {metric: [values[i] for i in order] for metric, values in columns.items()},
+            ArchiveService.METRIC_DECIMALS)
+    
+    @staticmethod
+    def iter_rows(bunker_id: Optional[str] = None, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None):
+        """Decoded readings (dicts with a datetime timestamp), one bunker-day at a time"""
+        query = EnvironmentalArchive.query
+        if bunker_id:
+            query = query.filter(EnvironmentalArchive.bunker_id == bunker_id)
+        if since:
+            query = query.filter(EnvironmentalArchive.day >= _day_of(since))
+        if until:
+            query = query.filter(EnvironmentalArchive.day <= until)
+        query = query.order_by(EnvironmentalArchive.bunker_id, EnvironmentalArchive.day)
+        
+        for block in query.yield_per(100):
+            timestamps, columns = cold_storage.decode_rows(block.payload)
+            for row, timestamp in enumerate(timestamps):
+                reading = dict.fromkeys(READING_FIELDS)
+                reading.update({metric: values[row] for metric, values in columns.items()})
+                reading.update(bunker_id=block.bunker_id, timestamp=_from_epoch_ms(timestamp))
+                if (since is None or reading['timestamp'] >= since) and (until is None or reading['timestamp'] <= until):
+                    yield reading
+    
+    @staticmethod
+    def get_readings(bunker_id: str, since: datetime) -> List[Dict]:
+        """Archived readings in the history API shape, newest first"""
+        return [
+            dict(reading, id=None, timestamp=reading['timestamp'].isoformat(), archived=True)
+            for reading in reversed(list(ArchiveService.iter_rows(bunker_id, since)))
+        ]
+
+def _day_of(moment: datetime) -> datetime:
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _epoch_ms(moment: datetime) -> int:
+    return round((moment - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+def _from_epoch_ms(milliseconds: int) -> datetime:
+    return datetime(1970, 1, 1) + timedelta(milliseconds=milliseconds)
+
+# ============================================================================
+# EXPORT SERVICE
+# ============================================================================
+
+class ExportService:
+    """Constant-memory export of raw environmental readings"""
+    
+    FORMATS = export.FORMATS
+    COLUMNS = ('id', 'bunker_id', 'timestamp') + READING_FIELDS
+    
+    @staticmethod
+    def iter_chunks(bunker_id: str, hours: int, chunk_rows: int):
+        """Yield lists of plain row tuples, oldest first, via a server-side cursor"""
+        table = EnvironmentalData.__table__
+        statement = db.select(*(table.c[column] for column in ExportService.COLUMNS)).where(
+            table.c.bunker_id == bunker_id,
+            table.c.timestamp >= datetime.utcnow() - timedelta(hours=hours)
+        ).order_by(table.c.timestamp, table.c.id)
+        
+        # Core select: rows come back as tuples, no ORM identity map
+        result = db.session.execute(statement.execution_options(yield_per=chunk_rows))
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+    
+    @staticmethod
+    def generate(bunker_id: str, hours: int, export_format: str, chunk_rows: int = 1000):
+        """Encoded export body, one string per fetched chunk"""
+        chunks = ExportService.iter_chunks(bunker_id, hours, chunk_rows)
+        return export.encode_chunks(chunks, ExportService.COLUMNS, export_format)
+
+# ============================================================================
+# INGESTION SERVICE
+# ============================================================================
+
+class IngestBuffer:
+    """Group-commit buffer for sensor readings
+
+    Readings accumulate until either `max_rows` are pending or `max_delay`
+    seconds have passed since the first pending reading, then the whole
+    batch is written with multi-row INSERT statements in one transaction.
+    A batch whose commit fails is retried on its own, so newer readings
+    are not held up behind it, up to `max_attempts` times. Batches that
+    run out of attempts, or would push the queue past `max_pending`, are
+    appended to `dead_letter_path` as NDJSON.
+    """
+
+    RETRY_SECONDS = 5.0
+
+    def __init__(self, max_rows: int = 500, max_delay: float = 1.0, max_pending: int = 50000,
+                 dead_letter_path: Optional[str] = None, max_attempts: int = 3):
+        self.max_rows = max(1, max_rows)
+        self.max_delay = max_delay
+        self.max_pending = max(self.max_rows, max_pending)
+        self.dead_letter_path = dead_letter_path
+        self.max_attempts = max(1, max_attempts)
+        self._pending: List[Dict] = []
+        self._retries: List[Tuple[List[Dict], int]] = []  # failed batches, oldest first, with attempts so far
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def pending_count(self) -> int:
+        """Number of readings waiting for the next commit, retries included"""
+        return len(self._pending) + sum(len(batch) for batch, _ in self._retries)
+
+    def add(self, rows: List[Dict]) -> bool:
+        """Queue rows, committing right away when the count threshold is hit"""
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) < self.max_rows and self.max_delay > 0:
+                self._arm_timer()
+                return False
+            batch = self._drain()
+
+        return self._write(batch)
+
+    def flush(self) -> int:
+        """Commit every pending reading now, failed batches first; returns the rows written"""
+        with self._lock:
+            retries, self._retries = self._retries, []
+            batch = self._drain()
+
+        written = sum(len(failed) for failed, attempts in retries if self._write(failed, attempts))
+        if batch and self._write(batch):
+            written += len(batch)
+        return written
+
+    def _drain(self) -> List[Dict]:
+        """Take ownership of the pending rows (lock must be held)"""
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _arm_timer(self, delay: Optional[float] = None):
+        """Schedule a time-window flush (lock must be held)"""
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_delay if delay is None else delay, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_in_background(self):
+        """Timer callback: flush with an application context"""
+        try:
+            with app.app_context():
+                self.flush()
+        except Exception:
+            bunker_logger.error("Background ingest flush failed", exc_info=True)
+
+    def _write(self, batch: List[Dict], attempts: int = 0) -> bool:
+        """Insert the batch and run the post-commit hooks once; False when it failed"""
+        table = EnvironmentalData.__table__
+        anomalies, detector_states = IngestionService.detect_anomalies(batch)
+        try:
+            for start in range(0, len(batch), self.max_rows):
+                db.session.execute(table.insert().values(batch[start:start + self.max_rows]))
+            RollupService.apply(batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            bunker_logger.error(f"Failed to commit ingest batch of {len(batch)} readings "
+                                f"(attempt {attempts + 1} of {self.max_attempts})", exc_info=True)
+            self._requeue(batch, attempts + 1)
+            return False
+
+        bunker_logger.info(f"Ingest batch committed: {len(batch)} readings")
+        anomaly_detector.commit(detector_states)
+        IngestionService.on_batch_committed(batch, anomalies)
+        return True
+
+    def _requeue(self, batch: List[Dict], attempts: int):
+        """Keep a failed batch for retry, dead-lettering it once out of attempts or room"""
+        spilled = []
+        with self._lock:
+            if attempts < self.max_attempts:
+                self._retries.append((batch, attempts))
+            else:
+                spilled.append(batch)
+            # Over capacity: give up on the oldest failed batches first
+            while self._retries and self.pending_count > self.max_pending:
+                spilled.append(self._retries.pop(0)[0])
+            if self._retries:
+                self._arm_timer(max(self.max_delay, self.RETRY_SECONDS))
+        for rows in spilled:
+            self._dead_letter(rows)
+
+    def _dead_letter(self, rows: List[Dict]):
+        """Append readings that could not be kept for retry to the dead-letter file"""
+        if not self.dead_letter_path:
+            bunker_logger.error(f"Dropped {len(rows)} readings: not committed and no dead-letter file")
+            return
+        try:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as handle:
+                for row in rows:
+                    handle.write(json.dumps(row, default=lambda value: value.isoformat()) + '\n')
+            bunker_logger.error(f"Gave up on {len(rows)} readings: written to {self.dead_letter_path}")
+        except OSError:
+            bunker_logger.error(f"Dropped {len(rows)} readings: dead-letter write failed", exc_info=True)
+
+class IngestionService:
+    """Bulk sensor ingestion service"""
+
+    NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+    @staticmethod
+    def require_device(f):
+        """Ingestion auth: a configured X-Device-Key, otherwise a user bearer token"""
+        authenticated = AuthService.require_auth(f)
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = request.headers.get('X-Device-Key')
+            if key and any(hmac.compare_digest(key, known) for known in app.config['INGEST_DEVICE_KEYS']):
+                return f(*args, **kwargs)
+            return authenticated(*args, **kwargs)
+        return decorated_function
+
+    @staticmethod
+    def parse_payload(raw: bytes, mimetype: str) -> Dict[str, Any]:
+        """Decode a JSON array (or {"readings": [...]}) or an NDJSON body
+
+        `positions[i]` is where readings[i] sits in the payload (array index
+        or NDJSON line), the `index` reported for rejected readings.
+        """
+        readings, positions, rejected = [], [], []
+
+        if mimetype in IngestionService.NDJSON_MIMETYPES:
+            for line_no, line in enumerate(raw.decode('utf-8').splitlines()):
+                if not line.strip():
+                    continue
+                try:
+                    readings.append(json.loads(line))
+                    positions.append(line_no)
+                except json.JSONDecodeError:
+                    rejected.append({'index': line_no, 'errors': 'Invalid JSON'})
+        else:
+            payload = json.loads(raw.decode('utf-8') or 'null')
+            if isinstance(payload, dict):
+                payload = payload.get('readings', [payload])
+            if not isinstance(payload, list):
+                raise ValueError('Expected a JSON array of readings')
+            readings = payload
+            positions = list(range(len(payload)))
+
+        return {'readings': readings, 'positions': positions, 'rejected': rejected}
+
+    @staticmethod
+    def validate_readings(readings: List[Dict], default_bunker_id: Optional[str] = None) -> Dict[str, Any]:
+        """Validate a whole batch with one schema pass and build insert rows"""
+        if default_bunker_id:
+            readings = [
+                {'bunker_id': default_bunker_id, **item} if isinstance(item, dict) else item
+                for item in readings
+            ]
+
+        schema = EnvironmentalDataSchema()
+        rejected = []
+        try:
+            loaded = schema.load(readings, many=True)
+        except ValidationError as err:
+            bad = set(err.messages) if isinstance(err.messages, dict) else set()
+            rejected = [{'index': index, 'errors': err.messages[index]} for index in sorted(bad)]
+            loaded = schema.load([item for index, item in enumerate(readings) if index not in bad], many=True)
+
+        now = datetime.utcnow()
+        rows = []
+        for item in loaded:
+            timestamp = item.get('timestamp') or now
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            row = {'bunker_id': item['bunker_id'], 'timestamp': timestamp}
+            for field in READING_FIELDS:
+                row[field] = item.get(field)
+            rows.append(row)
+
+        return {'rows': rows, 'rejected': rejected}
+
+    @staticmethod
+    def detect_anomalies(rows: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """Score readings in time order, setting each row's is_anomaly flag
+
+        The detector learns nothing yet: the returned states are passed to
+        anomaly_detector.commit once the rows are stored.
+        """
+        ordered = sorted(rows, key=lambda row: row['timestamp'])
+        scores, states = anomaly_detector.score_many(
+            ((row['bunker_id'], metric), row.get(metric)) for row in ordered for metric in READING_FIELDS)
+        anomalies = []
+        for position, row in enumerate(ordered):
+            row['is_anomaly'] = False
+            for offset, metric in enumerate(READING_FIELDS):
+                score = scores[position * len(READING_FIELDS) + offset]
+                if score is not None:
+                    row['is_anomaly'] = True
+                    anomalies.append({'bunker_id': row['bunker_id'], 'metric': metric, 'value': row[metric],
+                                      'score': score, 'timestamp': row['timestamp']})
+        return anomalies, states
+    
+    @staticmethod
+    def on_batch_committed(rows: List[Dict], anomalies: Optional[List[Dict]] = None):
+        """Post-commit work, run once per batch rather than once per reading"""
+        latest_readings.push_many(rows)
+        StreamService.publish_readings({row['bunker_id'] for row in rows})
+        AlertService.check_batch_alerts(rows)
+        if anomalies:
+            AlertService.check_anomaly_alerts(anomalies)
+
+ingest_buffer = IngestBuffer(
+    max_rows=app.config['INGEST_GROUP_COMMIT_ROWS'],
+    max_delay=app.config['INGEST_GROUP_COMMIT_SECONDS'],
+    max_pending=app.config['INGEST_MAX_PENDING'],
+    dead_letter_path=app.config['INGEST_DEAD_LETTER_PATH'] or os.path.join(app.instance_path, 'ingest_dead_letter.ndjson'),
+    max_attempts=app.config['INGEST_MAX_ATTEMPTS']
+)
+
+latest_readings = LatestReadingBuffer(
+    READING_FIELDS,
+    capacity=app.config['LATEST_READINGS_CAPACITY'],
+    max_bunkers=app.config['LATEST_READINGS_MAX_BUNKERS'],
+    name=app.config['LATEST_READINGS_SHM_NAME'],
+    lock_dir=app.config['SHM_LOCK_DIR']
+)
+
+anomaly_detector = AnomalyDetector(
+    alpha=app.config['ANOMALY_ALPHA'],
+    threshold=app.config['ANOMALY_THRESHOLD'],
+    warmup=app.config['ANOMALY_WARMUP']
+)
+
+active_alert_index = ActiveAlertIndex(
+    time_key='created_at',
+    max_bunkers=app.config['ACTIVE_ALERTS_MAX_BUNKERS'],
+    name=app.config['ACTIVE_ALERTS_SHM_NAME']
+)
+
+alert_rules = alert_engine.RuleBook(app.config['ALERT_RULES_PATH'],
+                                    check_seconds=app.config['ALERT_RULES_CHECK_SECONDS'])
+
+password_hasher = PasswordHasher(
+    workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+    target_seconds=app.config['PASSWORD_HASH_TARGET_MS'] / 1000,
+    algorithm=app.config['PASSWORD_HASH_ALGORITHM']
+)
+# Calibrated on first use (WSGI workers, tests) or at server startup below
+
+rate_limiter = RateLimiter(
+    SharedStore(app.config['RATE_LIMIT_SHM_NAME'], slots=app.config['RATE_LIMIT_SLOTS'],
+                lock_dir=app.config['SHM_LOCK_DIR'])
+    if app.config['RATE_LIMIT_SHM_NAME'] else MemoryStore(max_keys=app.config['RATE_LIMIT_MAX_KEYS'])
+)
+
+verified_tokens = TokenCache(max_entries=app.config['AUTH_TOKEN_CACHE_SIZE'])
+
+principal_cache = PrincipalCache(
+    ttl_seconds=app.config['AUTH_PRINCIPAL_TTL_SECONDS'],
+    name=app.config['AUTH_PRINCIPAL_SHM_NAME']
+)
+
+incident_tracker = alert_engine.IncidentTracker(cooldown_seconds=app.config['ALERT_COOLDOWN_SECONDS'])
+
+event_broker = EventBroker(
+    queue_size=app.config['STREAM_QUEUE_SIZE'],
+    max_subscribers=app.config['STREAM_MAX_SUBSCRIBERS']
+)
+
+# ============================================================================
+# LIVE STREAM SERVICE
+# ============================================================================
+
+class StreamService:
+    """Pushes readings and alerts to open dashboard streams"""
+    
+    @staticmethod
+    def snapshot(bunker_id: str) -> Optional[Dict]:
+        """Latest reading as sent over the stream"""
+        reading = latest_readings.latest(bunker_id)
+        if reading is None:
+            return None
+        return dict(reading, timestamp=reading['timestamp'].isoformat())
+    
+    @staticmethod
+    def publish_readings(bunker_ids):
+        """One event per bunker with its newest reading, however large the batch"""
+        for bunker_id in bunker_ids:
+            if event_broker.subscriber_count(bunker_id):
+                event_broker.publish(bunker_id, 'reading', StreamService.snapshot(bunker_id))
+    
+    @staticmethod
+    def publish_alerts(alerts: List['Alert']):
+        """Alert events carry the new active count so clients never re-query"""
+        counts: Dict[str, int] = {}
+        for alert in alerts:
+            if not event_broker.subscriber_count(alert.bunker_id):
+                continue
+            if alert.bunker_id not in counts:
+                counts[alert.bunker_id] = AlertService.get_active_alerts(alert.bunker_id)['count']
+            event_broker.publish(alert.bunker_id, 'alert', {
+                'alert': alert.to_dict(),
+                'active_count': counts[alert.bunker_id]
+            })
+
 # ============================================================================
 # ALERT SERVICE
 # ============================================================================
@@ -548,6 +1336,8 @@ class AlertService:
             
             db.session.add(alert)
             db.session.commit()
+            AlertService.index_alerts([alert])
+            StreamService.publish_alerts([alert])
             
             bunker_logger.warning(f"Alert created: {title} ({severity})")
             return True
@@ -557,69 +1347,236 @@ class AlertService:
             return False
     
     @staticmethod
-    def check_environmental_alerts(data: EnvironmentalData):
+    def evaluate_reading(bunker_id: str, temperature: Optional[float], oxygen_level: Optional[float],
+                         co2_level: Optional[float], radiation_level: Optional[float]) -> List[Dict]:
+        """Return the alert conditions raised by a single reading"""
+        return alert_engine.evaluate_reading(bunker_id, {
+            'temperature': temperature,
+            'oxygen_level': oxygen_level,
+            'co2_level': co2_level,
+            'radiation_level': radiation_level
+        }, alert_rules.current().rules_for(bunker_id))
+    
+    @staticmethod
+    def check_environmental_alerts(data: EnvironmentalData) -> int:
         """Check environmental data for alert conditions"""
-        alerts_to_create = []
-        
-        # Temperature alerts
-        if data.temperature < 15 or data.temperature > 30:
-            severity = 'critical' if data.temperature < 10 or data.temperature > 35 else 'high'
-            alerts_to_create.append({
-                'type': 'temperature',
-                'severity': severity,
-                'title': f'Temperature Alert: {data.temperature:.1f}°C',
-                'description': f'Temperature is outside safe range in {data.bunker_id}'
-            })
-        
-        # Oxygen alerts
-        if data.oxygen_level < 18:
-            severity = 'critical' if data.oxygen_level < 16 else 'high'
-            alerts_to_create.append({
-                'type': 'oxygen',
-                'severity': severity,
-                'title': f'Low Oxygen: {data.oxygen_level:.1f}%',
-                'description': f'Oxygen level is dangerously low in {data.bunker_id}'
+        values = data.reading_values()
+        violations = [
+            {'bunker_id': data.bunker_id, 'rule': rule, 'value': values[rule.metric],
+             'timestamp': data.timestamp, 'count': 1}
+            for rule in alert_rules.current().rules_for(data.bunker_id) if rule.severity(values.get(rule.metric))
+        ]
+        return AlertService.track_incidents(violations, [dict(values, bunker_id=data.bunker_id,
+                                                               timestamp=data.timestamp)])
+    
+    @staticmethod
+    def check_batch_alerts(rows: List[Dict]) -> int:
+        """Evaluate a whole ingest batch and commit its alerts at once
+        
+        Only the most severe (then most recent) violation per bunker and
+        alert type is kept, with the number of violating readings, so a
+        batch touches at most one alert per condition.
+        """
+        if not rows:
+            return 0
+        
+        table = alert_rules.current()
+        rules = table.rules
+        columns = alert_engine.to_columns(rows, {rule.metric for rule in rules})
+        bunker_ids, groups = np.unique([row['bunker_id'] for row in rows], return_inverse=True)
+        timestamps = np.array([row['timestamp'] for row in rows], dtype='datetime64[us]')
+        
+        # One pass over all readings, each against its own bunker's thresholds
+        found = table.evaluate(columns, bunker_ids[groups])
+        worst = alert_engine.worst_per_group(found, groups, timestamps)
+        codes, counts = np.unique(groups[found.rows] * len(rules) + found.rules, return_counts=True)
+        count_of = dict(zip(codes.tolist(), counts.tolist()))
+        
+        violations = []
+        for row, rule in zip(worst.rows.tolist(), worst.rules.tolist()):
+            bunker_id = str(bunker_ids[groups[row]])
+            violations.append({
+                'bunker_id': bunker_id,
+                'rule': table.rules_for(bunker_id)[rule],
+                'value': rows[row][rules[rule].metric],
+                'timestamp': rows[row]['timestamp'],
+                'count': count_of[int(groups[row]) * len(rules) + rule]
             })
         
-        # CO2 alerts
-        if data.co2_level > 1000:
-            severity = 'critical' if data.co2_level > 2000 else 'high'
-            alerts_to_create.append({
-                'type': 'co2',
-                'severity': severity,
-                'title': f'High CO2: {data.co2_level:.0f} ppm',
-                'description': f'CO2 level is too high in {data.bunker_id}'
-            })
+        # Newest reading per bunker decides whether open incidents settle
+        order = np.lexsort((timestamps, groups))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = groups[order][1:] != groups[order][:-1]
+        latest = [rows[row] for row in order[last].tolist()]
         
-        # Radiation alerts
-        if data.radiation_level > 1.0:
-            severity = 'critical' if data.radiation_level > 5.0 else 'high'
-            alerts_to_create.append({
-                'type': 'radiation',
-                'severity': severity,
-                'title': f'Radiation Alert: {data.radiation_level:.2f} mSv/h',
-                'description': f'Radiation level is elevated in {data.bunker_id}'
-            })
+        return AlertService.track_incidents(violations, latest)
+    
+    @staticmethod
+    def track_incidents(violations: List[Dict], latest: List[Dict]) -> int:
+        """Fold violations into one open alert per (bunker, alert type) and close settled ones
+        
+        `violations` hold bunker_id, rule, value, timestamp and count (violating
+        readings); `latest` is the newest reading of every bunker evaluated.
+        Returns the number of alerts created or updated.
+        """
+        table = alert_rules.current()
+        breached = {(violation['bunker_id'], violation['rule'].alert_type) for violation in violations}
+        checked = {(reading['bunker_id'], rule.alert_type)
+                   for reading in latest for rule in table.rules_for(reading['bunker_id'])}
         
-        # Create alerts
-        for alert_data in alerts_to_create:
-            AlertService.create_alert(
-                data.bunker_id,
-                alert_data['type'],
-                alert_data['severity'],
-                alert_data['title'],
-                alert_data['description']
+        try:
+            keys = breached | checked
+            open_alerts = {}
+            for alert in Alert.query.filter(
+                Alert.status == 'active',
+                Alert.bunker_id.in_({bunker_id for bunker_id, _ in keys}),
+                Alert.alert_type.in_({alert_type for _, alert_type in keys})
+            ).order_by(Alert.created_at):
+                open_alerts[(alert.bunker_id, alert.alert_type)] = alert
+            
+            # Alerts opened before a restart (or evicted from the tracker) are
+            # still open in the database: track them again so they can settle
+            for key in open_alerts.keys() & checked:
+                if not incident_tracker.is_open(key):
+                    incident_tracker.breach(key)
+            settled = [
+                (reading['bunker_id'], rule.alert_type)
+                for reading in latest for rule in table.rules_for(reading['bunker_id'])
+                if (reading['bunker_id'], rule.alert_type) not in breached
+                and incident_tracker.settle((reading['bunker_id'], rule.alert_type), rule,
+                                            reading.get(rule.metric), reading['timestamp'])
+            ]
+            if not breached and not settled:
+                return 0
+            
+            touched = [AlertService._record_violation(violation, open_alerts) for violation in violations]
+            
+            now = datetime.utcnow()
+            closed = [open_alerts[key] for key in settled if key in open_alerts]
+            for alert in closed:
+                alert.status = 'resolved'
+                alert.resolved_at = now
+                alert.resolved_by = 'system'
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            bunker_logger.error(f"Failed to record alerts: {str(e)}")
+            return 0
+        
+        AlertService.index_alerts(touched + closed)
+        StreamService.publish_alerts(touched + closed)
+        if touched:
+            bunker_logger.warning(f"Alerts raised or updated: {len(touched)}")
+        if closed:
+            bunker_logger.info(f"Alerts cleared: {len(closed)}")
+        return len(touched)
+    
+    @staticmethod
+    def _record_violation(violation: Dict, open_alerts: Dict[tuple, 'Alert']) -> 'Alert':
+        """Open the alert of a (bunker, alert type) condition, or fold into the open one
+        
+        Threshold violations carry their `rule`. Other sources pass ready-made
+        `details` (ThresholdRule.describe() shape) and an `excess` function
+        ranking values for the peak; their alerts are closed by hand.
+        """
+        rule, value, seen = violation.get('rule'), violation['value'], violation['timestamp']
+        details = violation.get('details') or rule.describe(violation['bunker_id'], value)
+        excess = violation.get('excess') or rule.excess
+        key = (violation['bunker_id'], details['type'])
+        if rule is not None:
+            incident_tracker.breach(key)
+        
+        alert = open_alerts.get(key)
+        if alert is None:
+            alert = open_alerts[key] = Alert(
+                bunker_id=violation['bunker_id'],
+                alert_type=details['type'],
+                severity=details['severity'],
+                title=details['title'],
+                description=details['description'],
+                occurrence_count=violation['count'],
+                last_seen_at=seen,
+                peak_value=value
             )
+            db.session.add(alert)
+            return alert
+        
+        alert.occurrence_count = (alert.occurrence_count or 1) + violation['count']
+        alert.last_seen_at = max(alert.last_seen_at or seen, seen)
+        if excess(value) > excess(alert.peak_value):
+            alert.peak_value = value
+            alert.title = details['title']
+        if alert_engine.SEVERITY_LEVELS[details['severity']] > alert_engine.SEVERITY_LEVELS.get(alert.severity, 0):
+            alert.severity = details['severity']
+        return alert
+    
+    @staticmethod
+    def check_anomaly_alerts(anomalies: List[Dict]) -> int:
+        """Fold anomalies into one open 'anomaly' alert per bunker
+        
+        The alert counts every anomalous reading and keeps the strongest
+        deviation (in standard deviations) as its peak value and title.
+        """
+        strongest: Dict[str, Dict] = {}
+        counts: Dict[str, int] = {}
+        for anomaly in anomalies:
+            bunker_id = anomaly['bunker_id']
+            counts[bunker_id] = counts.get(bunker_id, 0) + 1
+            if bunker_id not in strongest or abs(anomaly['score']) > abs(strongest[bunker_id]['score']):
+                strongest[bunker_id] = anomaly
+        
+        violations = [{
+            'bunker_id': bunker_id,
+            'value': abs(anomaly['score']),
+            'timestamp': anomaly['timestamp'],
+            'count': counts[bunker_id],
+            'excess': lambda score: float('-inf') if score is None else score,
+            'details': {
+                'type': 'anomaly',
+                'severity': 'medium',
+                'title': f"Anomalous {anomaly['metric'].replace('_', ' ')}: {anomaly['value']:.2f}",
+                'description': f"Reading deviates {abs(anomaly['score']):.1f} standard deviations from "
+                               f"recent behaviour in {bunker_id}"
+            }
+        } for bunker_id, anomaly in strongest.items()]
+        
+        try:
+            open_alerts = {
+                (alert.bunker_id, alert.alert_type): alert
+                for alert in Alert.query.filter(Alert.status == 'active', Alert.alert_type == 'anomaly',
+                                                Alert.bunker_id.in_(strongest)).order_by(Alert.created_at)
+            }
+            alerts = [AlertService._record_violation(violation, open_alerts) for violation in violations]
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            bunker_logger.error(f"Failed to record anomaly alerts: {str(e)}")
+            return 0
+        
+        AlertService.index_alerts(alerts)
+        StreamService.publish_alerts(alerts)
+        bunker_logger.warning(f"Anomaly alerts raised or updated: {len(alerts)}")
+        return len(alerts)
+    
+    @staticmethod
+    def index_alerts(alerts: List['Alert']):
+        """Write committed alert changes through to the active-alert index"""
+        for alert in alerts:
+            if alert.status == 'active':
+                active_alert_index.upsert(alert.to_dict())
+            else:
+                active_alert_index.discard(alert.bunker_id, alert.id)
     
     @staticmethod
     def get_active_alerts(bunker_id: str) -> Dict:
-        """Get active alerts"""
+        """Get active alerts, most severe then newest first, from the in-memory index"""
         try:
-            alerts = Alert.query.filter_by(bunker_id=bunker_id, status='active')\
-                              .order_by(Alert.created_at.desc()).all()
+            alerts = active_alert_index.get(bunker_id, lambda: [
+                alert.to_dict() for alert in Alert.query.filter_by(bunker_id=bunker_id, status='active')
+            ])
             
             return {
-                'alerts': [alert.to_dict() for alert in alerts],
+                'alerts': alerts,
                 'count': len(alerts)
             }
         except Exception as e:
@@ -636,6 +1593,7 @@ class AlertService:
                 alert.resolved_at = datetime.utcnow()
                 alert.resolved_by = resolved_by
                 db.session.commit()
+                AlertService.index_alerts([alert])
                 
                 bunker_logger.info(f"Alert {alert_id} resolved by {resolved_by}")
                 return True
@@ -643,6 +1601,123 @@ class AlertService:
         except Exception as e:
             bunker_logger.error(f"Failed to resolve alert: {str(e)}")
             return False
+    
+    @staticmethod
+    def resolve_alerts(resolved_by: str, alert_ids: Optional[List[int]] = None, bunker_id: Optional[str] = None,
+                       alert_type: Optional[str] = None, severity: Optional[str] = None,
+                       older_than: Optional[datetime] = None) -> int:
+        """Resolve every active alert matching the ids and/or filters in one UPDATE
+        
+        At least one criterion is required, so an empty request never clears
+        the whole table. Resolved alerts are dropped from the index one by one
+        and each affected bunker gets one stream event with its resolved
+        count, so no per-bunker query follows the UPDATE.
+        Returns the number of alerts resolved.
+        """
+        criteria = [Alert.status == 'active']
+        if alert_ids is not None:
+            criteria.append(Alert.id.in_(alert_ids))
+        if bunker_id:
+            criteria.append(Alert.bunker_id == bunker_id)
+        if alert_type:
+            criteria.append(Alert.alert_type == alert_type)
+        if severity:
+            criteria.append(Alert.severity == severity)
+        if older_than:
+            criteria.append(Alert.created_at < older_than)
+        if len(criteria) == 1:
+            raise ValueError('An id list or at least one filter is required')
+        
+        statement = db.update(Alert).where(*criteria).values(
+            status='resolved', resolved_at=datetime.utcnow(), resolved_by=resolved_by
+        ).execution_options(synchronize_session='fetch')
+        try:
+            if db.engine.dialect.update_returning:
+                resolved = db.session.execute(statement.returning(Alert.bunker_id, Alert.id)).all()
+            else:
+                # Without RETURNING, read the affected alerts under the same criteria first
+                resolved = db.session.execute(db.select(Alert.bunker_id, Alert.id).where(*criteria)).all()
+                db.session.execute(statement)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            bunker_logger.error(f"Failed to resolve alerts: {str(e)}")
+            raise
+        
+        counts: Dict[str, int] = {}
+        for bunker, alert_id in resolved:
+            counts[bunker] = counts.get(bunker, 0) + 1
+            active_alert_index.discard(bunker, alert_id)
+        for bunker, count in counts.items():
+            if event_broker.subscriber_count(bunker):
+                event_broker.publish(bunker, 'alerts_resolved', {'resolved': count})
+        
+        bunker_logger.info(f"{len(resolved)} alerts resolved in bulk by {resolved_by}")
+        return len(resolved)
+
+# ============================================================================
+# FLEET SERVICE
+# ============================================================================
+
+class FleetService:
+    """Multi-bunker overview in a constant number of queries"""
+    
+    STATUS_VIEW = 'current_environmental_status'
+    # PostgreSQL schema view column -> integrated reading field
+    VIEW_COLUMNS = {'air_quality': 'air_quality_index', 'atmospheric_pressure': 'pressure'}
+    _has_view = None
+    
+    @staticmethod
+    def _latest_source():
+        """Readings table, or the schema's status view when the database has it"""
+        if FleetService._has_view is None:
+            FleetService._has_view = FleetService.STATUS_VIEW in db.inspect(db.engine).get_view_names()
+        if not FleetService._has_view:
+            table = EnvironmentalData.__table__
+            return table, [table.c.id] + [table.c[field] for field in READING_FIELDS]
+        
+        view_fields = {FleetService.VIEW_COLUMNS.get(name, name): name for name in
+                       ('temperature', 'humidity', 'air_quality', 'oxygen_level', 'co2_level',
+                        'radiation_level', 'atmospheric_pressure')}
+        view = db.table(FleetService.STATUS_VIEW, db.column('bunker_id'), db.column('timestamp'),
+                        *(db.column(name) for name in view_fields.values()))
+        return view, [db.null().label('id')] + [view.c[name].label(field) for field, name in view_fields.items()]
+    
+    @staticmethod
+    def latest_per_bunker() -> Dict[str, Dict]:
+        """Latest reading of every bunker with one window-function query"""
+        source, columns = FleetService._latest_source()
+        ranked = db.select(
+            source.c.bunker_id, source.c.timestamp, *columns,
+            db.func.row_number().over(partition_by=source.c.bunker_id,
+                                      order_by=source.c.timestamp.desc()).label('rank')
+        ).subquery()
+        statement = db.select(*(column for column in ranked.c if column.name != 'rank'))\
+                      .where(ranked.c.rank == 1)
+        
+        latest = {}
+        for row in db.session.execute(statement).mappings():
+            reading = dict(row)
+            reading['timestamp'] = reading['timestamp'].isoformat() if reading['timestamp'] else None
+            latest[reading['bunker_id']] = reading
+        return latest
+    
+    @staticmethod
+    def active_alert_counts() -> Dict[str, Dict[str, int]]:
+        """Active alerts per bunker and severity with one grouped query"""
+        rows = db.session.query(Alert.bunker_id, Alert.severity, db.func.count(Alert.id))\
+                         .filter(Alert.status == 'active')\
+                         .group_by(Alert.bunker_id, Alert.severity).all()
+        counts: Dict[str, Dict[str, int]] = {}
+        for bunker_id, severity, count in rows:
+            counts.setdefault(bunker_id, {})[severity] = count
+        return counts
+    
+    @staticmethod
+    def overview() -> List[Dict]:
+        """Status card per bunker: latest reading, alert counts and overall state"""
+        stale_before = datetime.utcnow() - timedelta(minutes=app.config['FLEET_STALE_MINUTES'])
+        return fleet.status_cards(FleetService.latest_per_bunker(), FleetService.active_alert_counts(), stale_before)
 
 # ============================================================================
 # PREMIUM FEATURES SERVICE
@@ -707,7 +1782,9 @@ class IntegratedTestSuite(unittest.TestCase):
         """Set up test environment"""
         app.config['TESTING'] = True
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        app.config['INGEST_DEVICE_KEYS'] = {'test-device-key'}
         self.app = app.test_client()
+        self.app.environ_base['HTTP_X_DEVICE_KEY'] = 'test-device-key'
         
         with app.app_context():
             db.create_all()
@@ -718,6 +1795,13 @@ class IntegratedTestSuite(unittest.TestCase):
         with app.app_context():
             db.session.remove()
             db.drop_all()
+        latest_readings.clear()
+        anomaly_detector.reset()
+        incident_tracker.reset()
+        active_alert_index.invalidate()
+        verified_tokens.clear()
+        principal_cache.clear()
+        rate_limiter.reset('register_127.0.0.1')
     
     def _create_test_data(self):
         """Create test data"""
@@ -757,7 +1841,64 @@ class IntegratedTestSuite(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertIn('token', data)
-    
+
+    def test_registration_rate_limit(self):
+        """Test registration attempts are limited per client without a fixed-window reset"""
+        statuses = [
+            self.app.post('/api/auth/register', json={'username': 'ab'}).status_code
+            for _ in range(6)
+        ]
+        self.assertEqual(statuses, [400] * 5 + [429])
+        self.assertFalse(SecurityManager.rate_limit_check('register_127.0.0.1', max_requests=5, window=300))
+
+    def test_password_rehash_on_login(self):
+        """Test a login migrates a hash weaker than the calibrated policy"""
+        with app.app_context():
+            user = User.query.filter_by(username='testuser').first()
+            user.password_hash = generate_password_hash('testpass', method='pbkdf2:sha256:1000')
+            db.session.commit()
+
+        response = self.app.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass'})
+        self.assertEqual(response.status_code, 200)
+        with app.app_context():
+            stored = User.query.filter_by(username='testuser').first().password_hash
+            self.assertTrue(stored.startswith(password_hasher.method + '$'))
+
+    def test_auth_caches(self):
+        """Test authenticated requests skip the database until the principal changes"""
+        response = self.app.post('/api/auth/login', json={'username': 'testuser', 'password': 'testpass'})
+        headers = {'Authorization': f"Bearer {json.loads(response.data)['token']}"}
+        self.assertEqual(self.app.get('/api/logs/security', headers=headers).status_code, 200)
+
+        statements = []
+        with app.app_context():
+            engine = db.engine
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            self.assertEqual(self.app.get('/api/logs/security', headers=headers).status_code, 200)
+            self.assertEqual(statements, [])
+
+            # A flushed change that is rolled back never reaches the cache
+            with app.app_context():
+                user = User.query.filter_by(username='testuser').first()
+                user.role = 'resident'
+                db.session.flush()
+                self.assertEqual(self.app.get('/api/logs/security', headers=headers).status_code, 200)
+                db.session.rollback()
+            self.assertEqual(self.app.get('/api/logs/security', headers=headers).status_code, 200)
+
+            with app.app_context():
+                user = User.query.filter_by(username='testuser').first()
+                user.role = 'resident'
+                db.session.commit()
+            self.assertEqual(self.app.get('/api/logs/security', headers=headers).status_code, 403)
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+        self.assertEqual(self.app.get('/api/logs/security', headers={'Authorization': 'Bearer forged'}).status_code, 401)
+        self.assertEqual(len(verified_tokens), 1)
+
     def test_environmental_data(self):
         """Test environmental data endpoints"""
         response = self.app.get('/api/environmental/current?bunker_id=test-bunker')
@@ -772,6 +1913,400 @@ class IntegratedTestSuite(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('tiers', data)
 
+    def test_batch_ingestion(self):
+        """Test bulk ingestion with group commit and batch alerts"""
+        readings = [
+            {'bunker_id': 'batch-bunker', 'temperature': 21.0, 'oxygen_level': 20.5},
+            {'bunker_id': 'batch-bunker', 'temperature': 22.0, 'co2_level': 2500},
+            {'bunker_id': 'batch-bunker', 'temperature': 23.0, 'co2_level': 3000},
+            {'bunker_id': 'batch-bunker', 'temperature': 999}
+        ]
+        response = self.app.post('/api/environmental/batch', json=readings)
+        self.assertIn(response.status_code, (201, 202))
+        data = json.loads(response.data)
+        self.assertEqual(data['accepted'], 3)
+        self.assertEqual([item['index'] for item in data['rejected']], [3])
+
+        ndjson = '\n'.join(json.dumps({'temperature': 20.0 + i}) for i in range(2)) + '\nnot json\n'
+        response = self.app.post('/api/environmental/batch?bunker_id=batch-bunker',
+                                 data=ndjson, content_type='application/x-ndjson')
+        data = json.loads(response.data)
+        self.assertEqual(data['accepted'], 2)
+        self.assertEqual([item['index'] for item in data['rejected']], [2])
+
+        response = self.app.post('/api/environmental/batch', json=readings, headers={'X-Device-Key': 'forged'})
+        self.assertEqual(response.status_code, 401)
+
+        with app.app_context():
+            ingest_buffer.flush()
+            self.assertEqual(EnvironmentalData.query.filter_by(bunker_id='batch-bunker').count(), 5)
+            co2_alerts = Alert.query.filter_by(bunker_id='batch-bunker', alert_type='co2').all()
+            self.assertEqual(len(co2_alerts), 1)
+            self.assertEqual(co2_alerts[0].severity, 'critical')
+
+    def test_ingest_requeue_on_failed_commit(self):
+        """Test readings from a failed group commit are retried, not dropped"""
+        from unittest import mock
+        readings = [{'bunker_id': 'retry-bunker', 'temperature': 20.0 + i} for i in range(3)]
+        self.app.post('/api/environmental/batch', json=readings)
+        with app.app_context():
+            with mock.patch.object(RollupService, 'apply', side_effect=RuntimeError('database is locked')):
+                self.assertEqual(ingest_buffer.flush(), 0)
+            self.assertEqual(ingest_buffer.pending_count, 3)
+            # The failed attempt taught the detector nothing
+            self.assertEqual(len(anomaly_detector), 0)
+            self.assertEqual(ingest_buffer.flush(), 3)
+            self.assertEqual(EnvironmentalData.query.filter_by(bunker_id='retry-bunker').count(), 3)
+            self.assertEqual(anomaly_detector._series[('retry-bunker', 'temperature')].count, 3)
+    
+    def test_ingest_gives_up_on_failing_batch(self):
+        """Test a batch that keeps failing is dead-lettered without holding up newer readings"""
+        from unittest import mock
+        import tempfile
+        apply = RollupService.apply
+        
+        def fail_poisoned(rows):
+            if any(row['bunker_id'] == 'poison-bunker' for row in rows):
+                raise RuntimeError('constraint violated')
+            apply(rows)
+        
+        with tempfile.TemporaryDirectory() as directory, app.app_context():
+            dead_letter_path = os.path.join(directory, 'dead_letter.ndjson')
+            with mock.patch.object(ingest_buffer, 'dead_letter_path', dead_letter_path), \
+                    mock.patch.object(RollupService, 'apply', side_effect=fail_poisoned):
+                self.app.post('/api/environmental/batch', json=[{'bunker_id': 'poison-bunker', 'temperature': 20.0}])
+                self.assertEqual(ingest_buffer.flush(), 0)
+                self.app.post('/api/environmental/batch', json=[{'bunker_id': 'fresh-bunker', 'temperature': 21.0}])
+                self.assertEqual(ingest_buffer.flush(), 1)
+                for _ in range(ingest_buffer.max_attempts - 1):
+                    ingest_buffer.flush()
+            
+            self.assertEqual(ingest_buffer.pending_count, 0)
+            self.assertEqual(EnvironmentalData.query.filter_by(bunker_id='fresh-bunker').count(), 1)
+            with open(dead_letter_path, encoding='utf-8') as handle:
+                self.assertEqual([json.loads(line)['bunker_id'] for line in handle], ['poison-bunker'])
+
+    def test_alert_deduplication(self):
+        """Test a sustained condition updates one alert until it settles"""
+        start = datetime.utcnow() - timedelta(minutes=30)
+        for minute in range(3):
+            readings = [{'bunker_id': 'dedup-bunker', 'co2_level': 1200.0 + 100 * minute + i,
+                         'timestamp': (start + timedelta(minutes=minute, seconds=i)).isoformat()}
+                        for i in range(5)]
+            self.app.post('/api/environmental/batch', json=readings)
+            with app.app_context():
+                ingest_buffer.flush()
+        
+        with app.app_context():
+            alerts = Alert.query.filter_by(bunker_id='dedup-bunker', alert_type='co2').all()
+            self.assertEqual(len(alerts), 1)
+            self.assertEqual(alerts[0].occurrence_count, 15)
+            self.assertEqual(alerts[0].peak_value, 1404.0)
+            self.assertEqual(AlertService.get_active_alerts('dedup-bunker')['count'], 1)
+        
+        # Clear of the band for longer than the cool-down: the incident closes,
+        # even when the tracker lost its state (restart) in between
+        incident_tracker.reset()
+        for minute in (10, 20):
+            self.app.post('/api/environmental/batch', json=[{
+                'bunker_id': 'dedup-bunker', 'co2_level': 600.0,
+                'timestamp': (start + timedelta(minutes=minute)).isoformat()}])
+            with app.app_context():
+                ingest_buffer.flush()
+        with app.app_context():
+            self.assertEqual(db.session.get(Alert, alerts[0].id).status, 'resolved')
+            self.assertEqual(AlertService.get_active_alerts('dedup-bunker')['count'], 0)
+
+    def test_active_alert_index(self):
+        """Test active alerts are served from memory and kept current write-through"""
+        with app.app_context():
+            AlertService.create_alert('index-bunker', 'door', 'low', 'Door ajar')
+            AlertService.create_alert('index-bunker', 'fire', 'critical', 'Smoke detected')
+            self.assertEqual([alert['title'] for alert in AlertService.get_active_alerts('index-bunker')['alerts']],
+                             ['Smoke detected', 'Door ajar'])
+            
+            # Served from the index: rows changed behind its back are not re-read
+            Alert.query.filter_by(bunker_id='index-bunker').update({'title': 'changed'})
+            db.session.commit()
+            active = AlertService.get_active_alerts('index-bunker')['alerts']
+            self.assertEqual(active[0]['title'], 'Smoke detected')
+            
+            AlertService.resolve_alert(active[0]['id'], 'testuser')
+            self.assertEqual([alert['severity'] for alert in AlertService.get_active_alerts('index-bunker')['alerts']],
+                             ['low'])
+
+    def test_bulk_alert_resolution(self):
+        """Test alerts are resolved by ids or filters in one statement"""
+        with app.app_context():
+            for severity in ('low', 'low', 'critical'):
+                AlertService.create_alert('bulk-bunker', 'door', severity, f'Door {severity}')
+            AlertService.create_alert('other-bunker', 'door', 'low', 'Door low')
+            self.assertEqual(AlertService.get_active_alerts('bulk-bunker')['count'], 3)
+            first = AlertService.get_active_alerts('other-bunker')['alerts'][0]['id']
+            token = AuthService.generate_token(User.query.filter_by(username='testuser').first())
+        headers = {'Authorization': f'Bearer {token}'}
+
+        response = self.app.post('/api/alerts/resolve', json={}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+        subscription = event_broker.subscribe('bulk-bunker')
+        try:
+            response = self.app.post('/api/alerts/resolve', json={'bunker_id': 'bulk-bunker', 'severity': 'low'},
+                                     headers=headers)
+            self.assertEqual(json.loads(response.data)['resolved'], 2)
+            event = subscription.get(timeout=1)
+            self.assertEqual((event['event'], event['data']), ('alerts_resolved', {'resolved': 2}))
+        finally:
+            subscription.close()
+        response = self.app.post('/api/alerts/resolve', json={'ids': [first, first + 100]}, headers=headers)
+        self.assertEqual(json.loads(response.data)['resolved'], 1)
+
+        with app.app_context():
+            self.assertEqual([alert['severity'] for alert in AlertService.get_active_alerts('bulk-bunker')['alerts']],
+                             ['critical'])
+            self.assertEqual(AlertService.get_active_alerts('other-bunker')['count'], 0)
+            self.assertEqual(Alert.query.filter_by(status='resolved', resolved_by='testuser').count(), 3)
+
+    def test_history_rollups(self):
+        """Test rollup maintenance and resolution selection"""
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+        readings = [
+            {'bunker_id': 'rollup-bunker', 'timestamp': (hour + timedelta(minutes=10)).isoformat(), 'temperature': 20.0},
+            {'bunker_id': 'rollup-bunker', 'timestamp': (hour + timedelta(minutes=20)).isoformat(), 'temperature': 24.0},
+            {'bunker_id': 'rollup-bunker', 'timestamp': (hour + timedelta(minutes=70)).isoformat(), 'temperature': 19.0}
+        ]
+        self.app.post('/api/environmental/batch', json=readings)
+        with app.app_context():
+            ingest_buffer.flush()
+
+        for rebuild in (False, True):
+            if rebuild:
+                with app.app_context():
+                    self.assertEqual(RollupService.rebuild('rollup-bunker'), 3)
+            response = self.app.get('/api/environmental/history?bunker_id=rollup-bunker&hours=6&points=4')
+            data = json.loads(response.data)
+            self.assertEqual(data['resolution'], 'hour')
+            bucket = next(item for item in data['data'] if item['timestamp'] == hour.isoformat())
+            self.assertEqual(bucket['count'], 2)
+            self.assertAlmostEqual(bucket['temperature'], 22.0)
+            self.assertEqual((bucket['temperature_min'], bucket['temperature_max']), (20.0, 24.0))
+
+        response = self.app.get('/api/environmental/history?bunker_id=rollup-bunker&hours=6')
+        self.assertEqual(json.loads(response.data)['resolution'], 'raw')
+    
+    def test_history_downsampling(self):
+        """Test LTTB keeps spikes when reducing history to `points`"""
+        start = datetime.utcnow() - timedelta(minutes=50)
+        readings = [{'bunker_id': 'lttb-bunker', 'timestamp': (start + timedelta(seconds=15 * i)).isoformat(),
+                     'temperature': 21.0 + (i % 3) * 0.1}
+                    for i in range(200)]
+        readings[137]['temperature'] = 34.0
+        self.app.post('/api/environmental/batch', json=readings)
+        with app.app_context():
+            ingest_buffer.flush()
+        
+        # 1 hour has fewer than 100 minute buckets: raw readings, downsampled
+        data = json.loads(self.app.get('/api/environmental/history?bunker_id=lttb-bunker&hours=1&points=100').data)
+        self.assertEqual(data['resolution'], 'raw')
+        self.assertEqual(data['count'], 100)
+        self.assertIn(34.0, [item['temperature'] for item in data['data']])
+        self.assertEqual(data['data'][0]['timestamp'], max(item['timestamp'] for item in data['data']))
+
+    def test_history_columnar(self):
+        """Test the opt-in columnar history representation"""
+        start = datetime.utcnow() - timedelta(minutes=10)
+        readings = [{'bunker_id': 'columnar-bunker', 'timestamp': (start + timedelta(minutes=i)).isoformat(),
+                     'temperature': 20.0 + i, 'oxygen_level': 20.9}
+                    for i in range(5)]
+        self.app.post('/api/environmental/batch', json=readings)
+        with app.app_context():
+            ingest_buffer.flush()
+
+        url = '/api/environmental/history?bunker_id=columnar-bunker&hours=1'
+        plain = self.app.get(url, headers={'Accept': '*/*'})
+        self.assertEqual(plain.mimetype, 'application/json')
+
+        response = self.app.get(url, headers={'Accept': wire.COLUMNAR_JSON})
+        self.assertEqual(response.mimetype, wire.COLUMNAR_JSON)
+        payload = json.loads(response.data)
+        self.assertEqual(payload['count'], 5)
+        self.assertEqual(payload['columns']['temperature'], [20.0, 21.0, 22.0, 23.0, 24.0])
+        self.assertEqual(payload['timestamps'], sorted(payload['timestamps']))
+        self.assertEqual(payload['timestamps'][1] - payload['timestamps'][0], 60000)
+        self.assertLess(len(response.data), len(plain.data) / 2)
+
+        if wire.msgpack is not None:
+            response = self.app.get(url, headers={'Accept': 'application/msgpack'})
+            self.assertEqual(wire.msgpack.unpackb(response.data), payload)
+
+    def test_environmental_export(self):
+        """Test streaming NDJSON/CSV export"""
+        readings = [{'bunker_id': 'export-bunker', 'temperature': 20.0 + i, 'oxygen_level': 20.9}
+                    for i in range(5)]
+        self.app.post('/api/environmental/batch', json=readings)
+        with app.app_context():
+            ingest_buffer.flush()
+        
+        response = self.app.get('/api/environmental/export?bunker_id=export-bunker&format=ndjson')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([row['temperature'] for row in rows], [20.0, 21.0, 22.0, 23.0, 24.0])
+        self.assertIn('timestamp', rows[0])
+        
+        response = self.app.get('/api/environmental/export?bunker_id=export-bunker&format=csv')
+        lines = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(lines[0][:3], ['id', 'bunker_id', 'timestamp'])
+        self.assertEqual(len(lines), 6)
+        
+        response = self.app.get('/api/environmental/export?format=xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_live_stream(self):
+        """Test SSE push of readings and alerts"""
+        subscription = event_broker.subscribe('stream-bunker')
+        try:
+            self.app.post('/api/environmental/batch', json=[
+                {'bunker_id': 'stream-bunker', 'temperature': 21.0, 'co2_level': 6000}
+            ])
+            with app.app_context():
+                ingest_buffer.flush()
+            
+            reading = subscription.get(timeout=1)
+            self.assertEqual(reading['event'], 'reading')
+            self.assertEqual(reading['data']['temperature'], 21.0)
+            alert = subscription.get(timeout=1)
+            self.assertEqual(alert['event'], 'alert')
+            self.assertEqual(alert['data']['active_count'], 1)
+        finally:
+            subscription.close()
+        
+        response = self.app.get('/api/stream/bunker/stream-bunker', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        chunks = iter(response.response)
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+        self.assertIn(b'"temperature": 21.0', next(chunks))
+        response.close()
+        self.assertEqual(event_broker.subscriber_count('stream-bunker'), 0)
+        
+        # A client that disconnects before the first chunk still frees its slot
+        response = self.app.get('/api/stream/bunker/stream-bunker', buffered=False)
+        self.assertEqual(event_broker.subscriber_count('stream-bunker'), 1)
+        response.close()
+        self.assertEqual(event_broker.subscriber_count('stream-bunker'), 0)
+
+    def test_cold_storage_archive(self):
+        """Test archiving old readings and reading them back through history"""
+        old_day = datetime.utcnow().replace(hour=6, minute=0, second=0, microsecond=0) - timedelta(days=40)
+        readings = [{'bunker_id': 'archive-bunker', 'timestamp': (old_day + timedelta(minutes=i)).isoformat(),
+                     'temperature': 20.0 + i / 100}
+                    for i in range(120)]
+        for reading in readings[1::2]:
+            reading['oxygen_level'] = 20.9
+        # Two readings of one bunker at the same instant must stay two rows
+        readings.append({'bunker_id': 'archive-bunker', 'timestamp': readings[0]['timestamp'], 'humidity': 45.0})
+        readings.append({'bunker_id': 'archive-bunker', 'temperature': 22.5})
+        self.app.post('/api/environmental/batch', json=readings)
+        with app.app_context():
+            ingest_buffer.flush()
+            self.assertEqual(ArchiveService.archive_old_readings(30), 121)
+            self.assertEqual(EnvironmentalData.query.filter_by(bunker_id='archive-bunker').count(), 1)
+            self.assertEqual(EnvironmentalArchive.query.filter_by(bunker_id='archive-bunker').count(), 1)
+        
+        response = self.app.get('/api/environmental/history?bunker_id=archive-bunker&hours=1200')
+        data = json.loads(response.data)['data']
+        self.assertEqual(len(data), 122)
+        self.assertEqual(data[0]['temperature'], 22.5)
+        oldest = data[-2:]
+        self.assertTrue(all(reading['archived'] for reading in oldest))
+        self.assertEqual({reading['timestamp'] for reading in oldest}, {old_day.isoformat()})
+        self.assertEqual({(reading['temperature'], reading['humidity'], reading['oxygen_level']) for reading in oldest},
+                         {(20.0, None, None), (None, 45.0, None)})
+        self.assertEqual(data[-3]['oxygen_level'], 20.9)
+        
+        with app.app_context():
+            self.assertEqual(RollupService.rebuild('archive-bunker'), 122)
+    
+    def test_cold_storage_keeps_late_readings(self):
+        """Test a reading committed while archiving runs is not deleted unarchived"""
+        from unittest import mock
+        old_day = datetime.utcnow() - timedelta(days=40)
+        store_day = ArchiveService._store_day
+        
+        def store_then_ingest_late(bunker_id, day, rows):
+            store_day(bunker_id, day, rows)
+            if bunker_id == 'archive-bunker':
+                db.session.add(EnvironmentalData(bunker_id='late-bunker', timestamp=old_day, temperature=19.0))
+                db.session.flush()
+        
+        with app.app_context():
+            db.session.add(EnvironmentalData(bunker_id='archive-bunker', timestamp=old_day, temperature=20.0))
+            db.session.commit()
+            with mock.patch.object(ArchiveService, '_store_day', side_effect=store_then_ingest_late):
+                self.assertEqual(ArchiveService.archive_old_readings(30), 1)
+            self.assertEqual(EnvironmentalData.query.filter_by(bunker_id='late-bunker').count(), 1)
+            self.assertEqual(ArchiveService.archive_old_readings(30), 1)
+            self.assertEqual(EnvironmentalArchive.query.filter_by(bunker_id='late-bunker').count(), 1)
+
+    def test_anomaly_detection(self):
+        """Test streaming anomaly flags and alerts at ingest time"""
+        start = datetime.utcnow() - timedelta(hours=2)
+        readings = [{'bunker_id': 'anomaly-bunker', 'timestamp': (start + timedelta(minutes=i)).isoformat(),
+                     'humidity': 45.0 + (i % 5) * 0.2}
+                    for i in range(60)]
+        readings.append({'bunker_id': 'anomaly-bunker', 'timestamp': (start + timedelta(minutes=60)).isoformat(),
+                         'humidity': 80.0})
+        self.app.post('/api/environmental/batch', json=readings)
+        with app.app_context():
+            ingest_buffer.flush()
+            flagged = EnvironmentalData.query.filter_by(bunker_id='anomaly-bunker', is_anomaly=True).all()
+            self.assertEqual([row.humidity for row in flagged], [80.0])
+            alerts = Alert.query.filter_by(bunker_id='anomaly-bunker', alert_type='anomaly').all()
+            self.assertEqual(len(alerts), 1)
+            self.assertIn('humidity', alerts[0].title)
+        
+        # A later anomaly updates the open alert instead of adding another
+        self.app.post('/api/environmental/batch', json=[{
+            'bunker_id': 'anomaly-bunker', 'timestamp': (start + timedelta(minutes=61)).isoformat(), 'humidity': 10.0}])
+        with app.app_context():
+            ingest_buffer.flush()
+            alerts = Alert.query.filter_by(bunker_id='anomaly-bunker', alert_type='anomaly').all()
+            self.assertEqual(len(alerts), 1)
+            self.assertEqual(alerts[0].occurrence_count, 2)
+
+    def test_schema_upgrade(self):
+        """Test adding columns missing from a database created before they existed"""
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(db.text('DROP INDEX ix_environmental_data_is_anomaly'))
+                connection.execute(db.text('ALTER TABLE environmental_data DROP COLUMN is_anomaly'))
+                connection.execute(db.text('ALTER TABLE alert DROP COLUMN occurrence_count'))
+            
+            self.assertEqual(upgrade_schema(), ['environmental_data.is_anomaly', 'alert.occurrence_count'])
+            self.assertEqual(upgrade_schema(), [])
+            self.assertEqual(EnvironmentalData.query.filter_by(is_anomaly=False).count(),
+                             EnvironmentalData.query.count())
+            self.assertEqual(Alert.query.filter(Alert.occurrence_count != 1).count(), 0)
+
+    def test_fleet_overview(self):
+        """Test the single-query fleet overview"""
+        now = datetime.utcnow()
+        self.app.post('/api/environmental/batch', json=[
+            {'bunker_id': 'fleet-a', 'timestamp': (now - timedelta(minutes=5)).isoformat(), 'temperature': 20.0},
+            {'bunker_id': 'fleet-a', 'timestamp': (now - timedelta(minutes=1)).isoformat(), 'temperature': 21.0},
+            {'bunker_id': 'fleet-b', 'timestamp': (now - timedelta(minutes=2)).isoformat(), 'co2_level': 2500},
+            {'bunker_id': 'fleet-c', 'timestamp': (now - timedelta(hours=3)).isoformat(), 'temperature': 22.0}
+        ])
+        with app.app_context():
+            ingest_buffer.flush()
+        
+        data = json.loads(self.app.get('/api/fleet/overview').data)
+        fleet = {card['bunker_id']: card for card in data['bunkers']}
+        self.assertEqual(fleet['fleet-a']['latest']['temperature'], 21.0)
+        self.assertEqual(fleet['fleet-a']['status'], 'normal')
+        self.assertEqual(fleet['fleet-b']['status'], 'critical')
+        self.assertEqual(fleet['fleet-b']['alerts_by_severity'], {'critical': 1})
+        self.assertEqual(fleet['fleet-c']['status'], 'offline')
+
 def run_tests():
     """Run the integrated test suite"""
     bunker_logger.info("Running integrated test suite")
@@ -1081,19 +2616,37 @@ MAIN_TEMPLATE = """
         }
         
         // Update dashboard
-        async function updateDashboard() {
-            const envData = await fetchData('environmental/current?bunker_id=bunker-01');
-            const alerts = await fetchData('alerts/active?bunker_id=bunker-01');
-            
+        function renderReading(envData) {
             if (envData) {
                 document.getElementById('temperature').textContent = `${envData.temperature?.toFixed(1) || '--'}°C`;
                 document.getElementById('oxygen').textContent = `${envData.oxygen_level?.toFixed(1) || '--'}%`;
                 document.getElementById('radiation').textContent = `${envData.radiation_level?.toFixed(2) || '--'} mSv/h`;
             }
+        }
+        
+        function renderAlertCount(count) {
+            document.getElementById('alertCount').textContent = count || '0';
+        }
+        
+        async function updateDashboard() {
+            const envData = await fetchData('environmental/current?bunker_id=bunker-01');
+            const alerts = await fetchData('alerts/active?bunker_id=bunker-01');
             
+            renderReading(envData);
             if (alerts) {
-                document.getElementById('alertCount').textContent = alerts.count || '0';
+                renderAlertCount(alerts.count);
+            }
+        }
+        
+        // Live updates pushed by the server (polling only if SSE is unavailable)
+        function connectStream() {
+            if (!window.EventSource) {
+                setInterval(updateDashboard, 30000);
+                return;
             }
+            const stream = new EventSource('/api/stream/bunker/bunker-01');
+            stream.addEventListener('reading', (event) => renderReading(JSON.parse(event.data)));
+            stream.addEventListener('alert', (event) => renderAlertCount(JSON.parse(event.data).active_count));
         }
         
         // Initialize charts
@@ -1156,9 +2709,7 @@ MAIN_TEMPLATE = """
         document.addEventListener('DOMContentLoaded', () => {
             updateDashboard();
             initCharts();
-            
-            // Update dashboard every 30 seconds
-            setInterval(updateDashboard, 30000);
+            connectStream();
         });
         
         // Button handlers
@@ -1246,7 +2797,10 @@ def login():
         else:
             bunker_logger.warning(f"Failed login attempt: {username}")
             return jsonify({'error': 'Invalid credentials'}), 401
-            
+    
+    except HasherBusy:
+        bunker_logger.warning("Login rejected: password hashing queue full")
+        return jsonify({'error': 'Authentication busy, please retry'}), 503
     except Exception as e:
         bunker_logger.error("Login error", exc_info=True)
         return jsonify({'error': 'Login failed'}), 500
@@ -1323,7 +2877,10 @@ def register():
             'token': token,
             'user': user.to_dict()
         }), 201
-        
+    
+    except HasherBusy:
+        bunker_logger.warning("Registration rejected: password hashing queue full")
+        return jsonify({'error': 'Registration busy, please retry'}), 503
     except Exception as e:
         bunker_logger.error("Registration error", exc_info=True)
         return jsonify({'error': 'Registration failed'}), 500
@@ -1354,20 +2911,114 @@ def get_environmental_history():
     try:
         bunker_id = request.args.get('bunker_id', 'bunker-01')
         hours = int(request.args.get('hours', 24))
-        
-        data = EnvironmentalService.get_historical_data(bunker_id, hours)
-        bunker_logger.info(f"Environmental history retrieved for {bunker_id} ({hours} hours)")
-        
-        return jsonify({
+        points = request.args.get('points', type=int)
+        media_type = wire.negotiate(request.accept_mimetypes)
+        
+        # Coarsest rollup that still gives the client `points` buckets,
+        # then LTTB down to exactly `points` so the chart shape survives
+        resolution = rollups.pick_resolution(timedelta(hours=hours), points)
+        if media_type:
+            timestamps, columns = EnvironmentalService.get_historical_columns(bunker_id, hours, resolution)
+            timestamps, columns = downsample.lttb_columns(timestamps, columns, points, READING_FIELDS)
+            payload = wire.columnar(timestamps, columns, bunker_id=bunker_id, period_hours=hours,
+                                    resolution=resolution or 'raw')
+            bunker_logger.info(f"Environmental history retrieved for {bunker_id} ({hours} hours, {resolution or 'raw'}, columnar)")
+            return Response(wire.encode(payload, media_type), mimetype=media_type, headers={'Vary': 'Accept'})
+        
+        data = EnvironmentalService.get_historical_data(bunker_id, hours, resolution)
+        if points:
+            data = downsample.lttb_rows(data, points, READING_FIELDS)
+        bunker_logger.info(f"Environmental history retrieved for {bunker_id} ({hours} hours, {resolution or 'raw'})")
+        
+        response = jsonify({
             'data': data,
             'period_hours': hours,
+            'resolution': resolution or 'raw',
             'count': len(data)
         })
+        response.headers['Vary'] = 'Accept'
+        return response
         
     except Exception as e:
         bunker_logger.error("Error getting environmental history", exc_info=True)
         return jsonify({'error': 'Failed to get environmental history'}), 500
 
+@app.route('/api/environmental/export')
+def export_environmental_data():
+    """Stream raw environmental history as NDJSON or CSV"""
+    bunker_id = request.args.get('bunker_id', 'bunker-01')
+    hours = request.args.get('hours', 24, type=int)
+    export_format = request.args.get('format', 'ndjson').lower()
+    
+    if export_format not in ExportService.FORMATS:
+        return jsonify({'error': f"Unsupported format (use {' or '.join(ExportService.FORMATS)})"}), 400
+    
+    bunker_logger.info(f"Environmental export started for {bunker_id} ({hours} hours, {export_format})")
+    body = ExportService.generate(bunker_id, hours, export_format, app.config['EXPORT_CHUNK_ROWS'])
+    filename = f"{secure_filename(bunker_id)}-environmental.{export_format}"
+    
+    return Response(stream_with_context(body), mimetype=ExportService.FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/api/stream/bunker/<bunker_id>')
+def stream_bunker(bunker_id):
+    """Server-Sent Events feed of readings and alerts for one bunker"""
+    subscription = event_broker.subscribe(bunker_id)
+    if subscription is None:
+        return jsonify({'error': 'Too many open streams, fall back to polling'}), 503
+    
+    def generate():
+        # Reconnect delay hint, then the current state so the page renders at once
+        yield 'retry: 3000\n\n'
+        snapshot = StreamService.snapshot(bunker_id)
+        if snapshot is not None:
+            yield format_sse(snapshot, 'reading')
+        yield from event_broker.stream(subscription, app.config['STREAM_HEARTBEAT_SECONDS'])
+    
+    bunker_logger.info(f"Stream opened for {bunker_id} ({event_broker.subscriber_count(bunker_id)} subscribers)")
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # The server closes the response even when the client leaves before the first
+    # chunk, when a generator's finally block would never run
+    response.call_on_close(subscription.close)
+    return response
+
+@app.route('/api/environmental/batch', methods=['POST'])
+@IngestionService.require_device
+def ingest_environmental_batch():
+    """Bulk sensor ingestion (JSON array or NDJSON) with group commit"""
+    try:
+        try:
+            parsed = IngestionService.parse_payload(request.get_data(), request.mimetype)
+        except (ValueError, UnicodeDecodeError) as e:
+            return jsonify({'error': 'Invalid payload', 'details': str(e)}), 400
+
+        readings = parsed['readings']
+        if not readings and not parsed['rejected']:
+            return jsonify({'error': 'No readings provided'}), 400
+
+        max_readings = app.config['INGEST_MAX_READINGS_PER_REQUEST']
+        if len(readings) > max_readings:
+            return jsonify({'error': f'Too many readings (max {max_readings} per request)'}), 413
+
+        result = IngestionService.validate_readings(readings, request.args.get('bunker_id'))
+        committed = ingest_buffer.add(result['rows']) if result['rows'] else False
+
+        positions = parsed['positions']
+        rejected = parsed['rejected'] + [{**item, 'index': positions[item['index']]} for item in result['rejected']]
+        rejected.sort(key=lambda item: item['index'])
+
+        bunker_logger.info(f"Ingest request: {len(result['rows'])} accepted, {len(rejected)} rejected")
+        return jsonify({
+            'accepted': len(result['rows']),
+            'rejected': rejected,
+            'committed': committed
+        }), 201 if committed else 202
+
+    except Exception as e:
+        bunker_logger.error("Error ingesting environmental batch", exc_info=True)
+        return jsonify({'error': 'Failed to ingest readings'}), 500
+
 @app.route('/api/alerts/active')
 def get_active_alerts():
     """Get active alerts"""
@@ -1381,6 +3032,22 @@ def get_active_alerts():
         bunker_logger.error("Error getting active alerts", exc_info=True)
         return jsonify({'error': 'Failed to get alerts'}), 500
 
+@app.route('/api/fleet/overview')
+def get_fleet_overview():
+    """Latest readings and active alert counts for every bunker (two queries)"""
+    try:
+        cards = FleetService.overview()
+        bunker_logger.info(f"Fleet overview retrieved for {len(cards)} bunkers")
+        return jsonify({
+            'bunkers': cards,
+            'count': len(cards),
+            'generated_at': datetime.utcnow().isoformat()
+        })
+        
+    except Exception as e:
+        bunker_logger.error("Error getting fleet overview", exc_info=True)
+        return jsonify({'error': 'Failed to get fleet overview'}), 500
+
 @app.route('/api/premium/tiers')
 def get_premium_tiers():
     """Get premium tier information"""
@@ -1437,9 +3104,9 @@ def run_api_tests():
 @app.route('/api/translate', methods=['GET'])
 def translate_text():
     """Translation service for multi-language support"""
-    try {
-        lang = request.args.get('lang', 'en');
-        
+    try:
+        lang = request.args.get('lang', 'en')
+
         # Translation dictionaries
         translations = {
             'en': {
@@ -1502,21 +3169,20 @@ def translate_text():
                 'pro_tier': 'Taupe Pro+',
                 'ultra_tier': 'Taupe Ultra'
             }
-        };
-        
-        selected_translations = translations.get(lang, translations['en']);
-        
-        bunker_logger.info(f"Translation requested for language: {lang}");
+        }
+
+        selected_translations = translations.get(lang, translations['en'])
+
+        bunker_logger.info(f"Translation requested for language: {lang}")
         return jsonify({
             'success': True,
             'language': lang,
             'translations': selected_translations
-        });
-        
-    } catch (Exception e) {
-        bunker_logger.error("Translation error", exc_info=True);
-        return jsonify({'error': 'Translation failed'}), 500;
-    }
+        })
+
+    except Exception:
+        bunker_logger.error("Translation error", exc_info=True)
+        return jsonify({'error': 'Translation failed'}), 500
 
 @app.route('/api/alerts/resolve/<int:alert_id>', methods=['POST'])
 @AuthService.require_auth
@@ -1544,6 +3210,47 @@ def resolve_alert(alert_id):
         bunker_logger.error("Error resolving alert", exc_info=True)
         return jsonify({'error': 'Failed to resolve alert'}), 500
 
+@app.route('/api/alerts/resolve', methods=['POST'])
+@AuthService.require_auth
+def resolve_alerts():
+    """Resolve many alerts at once, by id list and/or filters
+    
+    Body: {"ids": [..]} and/or any of "bunker_id", "alert_type",
+    "severity" and "older_than" (ISO 8601 timestamp).
+    """
+    user = g.current_user
+    if user.role not in ('admin', 'security'):
+        return jsonify({'error': 'Insufficient permissions'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        alert_ids = data.get('ids')
+        if alert_ids is not None:
+            if not isinstance(alert_ids, list) or len(alert_ids) > app.config['ALERT_BULK_MAX_IDS']:
+                raise ValueError('ids must be a list of at most '
+                                 f"{app.config['ALERT_BULK_MAX_IDS']} alert ids")
+            alert_ids = [int(alert_id) for alert_id in alert_ids]
+        older_than = data.get('older_than')
+        if older_than:
+            older_than = datetime.fromisoformat(older_than.replace('Z', '+00:00'))
+            if older_than.tzinfo is not None:
+                older_than = older_than.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        resolved = AlertService.resolve_alerts(
+            user.username, alert_ids,
+            bunker_id=data.get('bunker_id'),
+            alert_type=data.get('alert_type'),
+            severity=data.get('severity'),
+            older_than=older_than
+        )
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'error': f'Invalid request: {str(e)}'}), 400
+    except Exception:
+        bunker_logger.error("Error resolving alerts", exc_info=True)
+        return jsonify({'error': 'Failed to resolve alerts'}), 500
+    
+    return jsonify({'success': True, 'resolved': resolved})
+
 @app.route('/api/user/profile', methods=['GET'])
 @AuthService.require_auth
 def get_user_profile():
@@ -1682,12 +3389,49 @@ def get_security_logs():
 # DATABASE INITIALIZATION
 # ============================================================================
 
+# Columns added to existing tables after their first release. db.create_all()
+# only creates missing tables, so upgrade_schema() adds these in place.
+SCHEMA_UPGRADES = [
+    (EnvironmentalData, 'is_anomaly'),
+    (Alert, 'occurrence_count'),
+    (Alert, 'last_seen_at'),
+    (Alert, 'peak_value'),
+]
+
+def upgrade_schema() -> List[str]:
+    """Add SCHEMA_UPGRADES columns missing from existing tables (idempotent)"""
+    inspector = db.inspect(db.engine)
+    dialect = db.engine.dialect
+    quote = dialect.identifier_preparer.quote
+    added = []
+    
+    with db.engine.begin() as connection:
+        for model, name in SCHEMA_UPGRADES:
+            table = model.__table__
+            if name in {column['name'] for column in inspector.get_columns(table.name)}:
+                continue
+            column = table.c[name]
+            ddl = f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect)}'
+            if column.default is not None and column.default.is_scalar:
+                default = db.literal(column.default.arg, column.type)
+                ddl += f' DEFAULT {default.compile(dialect=dialect, compile_kwargs={"literal_binds": True})}'
+            connection.execute(db.text(ddl))
+            for index in table.indexes:
+                if column in index.columns.values():
+                    index.create(connection, checkfirst=True)
+            added.append(f'{table.name}.{name}')
+    
+    if added:
+        bunker_logger.info(f"Schema upgraded: added {', '.join(added)}")
+    return added
+
 def create_tables():
     """Initialize database with sample data"""
     bunker_logger.info("Initializing database tables")
     
     try:
         db.create_all()
+        upgrade_schema()
         
         # Add sample users if none exist
         if User.query.count() == 0:
@@ -1759,6 +3503,12 @@ if __name__ == '__main__':
     with app.app_context():
         create_tables()
     
+    # Move old readings to cold storage if requested (e.g. from a nightly job)
+    if '--archive' in sys.argv:
+        with app.app_context():
+            ArchiveService.archive_old_readings()
+            sys.exit(0)
+    
     # Run tests if requested
     if '--test' in sys.argv:
         bunker_logger.info("Running integrated test suite")
@@ -1768,6 +3518,7 @@ if __name__ == '__main__':
     
     port = int(os.environ.get('PORT', 5001))
     debug = app.config['ENVIRONMENT'] == 'development'
+    bunker_logger.info(f"Password hashing calibrated to {password_hasher.calibrate()}")
     
     bunker_logger.info(f"Application starting on port {port} (debug={debug})")
     bunker_logger.info("Features enabled: Microservices, Logging, Testing, Premium, Stripe, Telegram")
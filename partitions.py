@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Time Partitions
+Monthly partitions for environmental_data, so that range queries only
+touch the months they cover and retention is a metadata operation
+(detach + archive) instead of a DELETE over millions of rows.
+
+PostgreSQL uses native declarative partitioning (RANGE on timestamp):
+upcoming months are pre-created, expired months are detached and moved
+to an archive schema.
+
+SQLite has no partitioning. SQLitePartitionManager keeps each month in
+its own attached database file, but only for callers that route their
+reads and writes through it; the applications use a single
+environmental_data table there, so the scheduled job does nothing on
+SQLite.
+
+Run periodically (cron, Railway scheduled job):
+    python partitions.py --database-url postgresql://... --retention-months 12
+"""
+
+import argparse
+import os
+import re
+import shutil
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import MetaData, Table, create_engine, event, make_url, text, union_all
+
+MONTH_PATTERN = re.compile(r'_y(\d{4})m(\d{2})$')
+
+# SQLite refuses more attached databases than this unless recompiled
+SQLITE_MAX_ATTACHED = 10
+
+# Flask-SQLAlchemy resolves relative SQLite paths against the app's instance folder
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+
+
+def default_database_url() -> str:
+    """DATABASE_URL (or the app's default), with relative SQLite paths in instance/ as the app sees them"""
+    url = make_url(os.environ.get('DATABASE_URL', 'sqlite:///lataupe_bunker.db'))
+    database = url.database
+    if url.get_backend_name() == 'sqlite' and database and database != ':memory:' \
+            and not database.startswith('file:') and not os.path.isabs(database):
+        url = url.set(database=os.path.join(INSTANCE_DIR, database))
+    return url.render_as_string(hide_password=False)
+
+
+def month_start(moment) -> date:
+    """First day of the month containing `moment`"""
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(since, until) -> List[date]:
+    """Month starts covering [since, until]"""
+    months, month = [], month_start(since)
+    while month <= month_start(until):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(table: str, month: date) -> str:
+    return f'{table}_y{month.year:04d}m{month.month:02d}'
+
+
+def parse_month(name: str) -> Optional[date]:
+    match = MONTH_PATTERN.search(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+class PostgresPartitionManager:
+    """Pre-creates and retires monthly partitions of a RANGE-partitioned table"""
+
+    def __init__(self, engine, table: str = 'environmental_data', months_ahead: int = 3,
+                 retention_months: int = 12, archive_schema: Optional[str] = 'archive'):
+        self.engine = engine
+        self.table = table
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.archive_schema = archive_schema
+
+    def partitions(self, connection) -> Dict[date, str]:
+        """Attached monthly partitions keyed by month"""
+        rows = connection.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ), {'table': self.table})
+        return {parse_month(name): name for (name,) in rows if parse_month(name)}
+
+    def ensure(self, today: Optional[date] = None) -> List[str]:
+        """Create the current and `months_ahead` next partitions if missing"""
+        first = month_start(today or datetime.utcnow())
+        created = []
+        with self.engine.begin() as connection:
+            existing = self.partitions(connection)
+            for month in (add_months(first, i) for i in range(self.months_ahead + 1)):
+                if month not in existing:
+                    created.append(self._create(connection, month))
+        return created
+
+    def _create(self, connection, month: date) -> str:
+        name = partition_name(self.table, month)
+        bounds = {'start': month, 'end': add_months(month, 1)}
+        default = f'{self.table}_default'
+
+        stray = connection.execute(text(
+            f'SELECT 1 FROM {default} WHERE timestamp >= :start AND timestamp < :end LIMIT 1'
+        ), bounds).first() if self._has_table(connection, default) else None
+
+        if stray is None:
+            connection.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {self.table} "
+                f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+            ))
+        else:
+            # Rows already landed in the default partition: move them, then attach
+            connection.execute(text(f'CREATE TABLE {name} (LIKE {self.table} INCLUDING DEFAULTS)'))
+            connection.execute(text(
+                f'WITH moved AS (DELETE FROM {default} WHERE timestamp >= :start AND timestamp < :end '
+                f'RETURNING *) INSERT INTO {name} SELECT * FROM moved'
+            ), bounds)
+            connection.execute(text(
+                f"ALTER TABLE {self.table} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+            ))
+        return name
+
+    def expire(self, today: Optional[date] = None) -> List[str]:
+        """Detach partitions older than the retention window and archive them"""
+        cutoff = add_months(month_start(today or datetime.utcnow()), -self.retention_months)
+        expired = []
+        with self.engine.begin() as connection:
+            if self.archive_schema:
+                connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS {self.archive_schema}'))
+            for month, name in sorted(self.partitions(connection).items()):
+                if month >= cutoff:
+                    continue
+                connection.execute(text(f'ALTER TABLE {self.table} DETACH PARTITION {name}'))
+                if self.archive_schema:
+                    connection.execute(text(f'ALTER TABLE {name} SET SCHEMA {self.archive_schema}'))
+                else:
+                    connection.execute(text(f'DROP TABLE {name}'))
+                expired.append(name)
+        return expired
+
+    @staticmethod
+    def _has_table(connection, name: str) -> bool:
+        return connection.execute(text('SELECT to_regclass(:name)'), {'name': name}).scalar() is not None
+
+    def maintain(self, today: Optional[date] = None) -> Dict[str, List[str]]:
+        return {'created': self.ensure(today), 'expired': self.expire(today)}
+
+
+class SQLitePartitionManager:
+    """Monthly partitions as attached SQLite files (`<table>_y2025m01.db`)
+
+    The manager attaches every partition file to each new pooled
+    connection; insert() routes rows to their month and select() builds a
+    UNION ALL over only the months overlapping the requested range. Rows
+    written any other way stay in the main table: the applications do not
+    use this manager, so the CLI leaves SQLite databases alone.
+    """
+
+    def __init__(self, engine, table: Table, directory: str, months_ahead: int = 1,
+                 retention_months: int = 6, archive_directory: Optional[str] = None):
+        if retention_months + months_ahead + 1 > SQLITE_MAX_ATTACHED:
+            raise ValueError(f'SQLite can attach at most {SQLITE_MAX_ATTACHED} monthly partitions')
+        self.engine = engine
+        self.table = table
+        self.directory = directory
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.archive_directory = archive_directory
+        self._tables: Dict[date, Table] = {}
+        os.makedirs(directory, exist_ok=True)
+        event.listen(engine, 'connect', self._attach_all)
+
+    # ------------------------------------------------------------------
+    # Partition files
+    # ------------------------------------------------------------------
+
+    def path_for(self, month: date) -> str:
+        return os.path.join(self.directory, f'{partition_name(self.table.name, month)}.db')
+
+    @staticmethod
+    def schema_for(month: date) -> str:
+        return f'p_y{month.year:04d}m{month.month:02d}'
+
+    def months(self) -> List[date]:
+        """Months that currently have a partition file"""
+        found = (parse_month(os.path.splitext(name)[0]) for name in os.listdir(self.directory)
+                 if name.startswith(self.table.name) and name.endswith('.db'))
+        return sorted(month for month in found if month)
+
+    def ensure(self, today: Optional[date] = None) -> List[str]:
+        """Create the current and upcoming partition files"""
+        first = month_start(today or datetime.utcnow())
+        return [path for path in (self._create(add_months(first, i)) for i in range(self.months_ahead + 1)) if path]
+
+    def _create(self, month: date) -> Optional[str]:
+        path = self.path_for(month)
+        if os.path.exists(path):
+            return None
+        file_engine = create_engine(f'sqlite:///{path}')
+        try:
+            self.table.to_metadata(MetaData()).create(file_engine)
+        finally:
+            file_engine.dispose()
+        return path
+
+    def expire(self, today: Optional[date] = None) -> List[str]:
+        """Detach month files past retention and move them to the archive"""
+        cutoff = add_months(month_start(today or datetime.utcnow()), -self.retention_months)
+        expired = [month for month in self.months() if month < cutoff]
+        if not expired:
+            return []
+
+        # Pooled connections hold the files attached: drop them first
+        self.engine.dispose()
+        archived = []
+        for month in expired:
+            self._tables.pop(month, None)
+            path = self.path_for(month)
+            if self.archive_directory:
+                os.makedirs(self.archive_directory, exist_ok=True)
+                archived.append(shutil.move(path, os.path.join(self.archive_directory, os.path.basename(path))))
+            else:
+                os.remove(path)
+                archived.append(path)
+        return archived
+
+    def maintain(self, today: Optional[date] = None) -> Dict[str, List[str]]:
+        return {'created': self.ensure(today), 'expired': self.expire(today)}
+
+    # ------------------------------------------------------------------
+    # Attachments
+    # ------------------------------------------------------------------
+
+    def _attach_all(self, dbapi_connection, connection_record):
+        for month in self.months():
+            self._attach(dbapi_connection, month)
+
+    def _attach(self, dbapi_connection, month: date):
+        attached = {row[1] for row in dbapi_connection.execute('PRAGMA database_list')}
+        if self.schema_for(month) not in attached:
+            dbapi_connection.execute(f"ATTACH DATABASE '{self.path_for(month)}' AS {self.schema_for(month)}")
+
+    def partition_table(self, connection, month: date) -> Table:
+        """Table object for one month, created and attached on demand"""
+        self._create(month)
+        self._attach(connection.connection.dbapi_connection, month)
+        if month not in self._tables:
+            self._tables[month] = self.table.to_metadata(MetaData(), schema=self.schema_for(month))
+        return self._tables[month]
+
+    # ------------------------------------------------------------------
+    # Reads and writes
+    # ------------------------------------------------------------------
+
+    def insert(self, connection, rows: Iterable[Dict]) -> int:
+        """Route rows to their month's partition, one multi-row INSERT per month"""
+        by_month: Dict[date, List[Dict]] = {}
+        for row in rows:
+            by_month.setdefault(month_start(row['timestamp']), []).append(row)
+        for month, month_rows in by_month.items():
+            connection.execute(self.partition_table(connection, month).insert(), month_rows)
+        return sum(len(month_rows) for month_rows in by_month.values())
+
+    def select(self, connection, since: datetime, until: datetime, *criteria):
+        """UNION ALL over the partitions overlapping [since, until] only"""
+        available = set(self.months())
+        selects = []
+        for month in months_between(since, until):
+            if month not in available:
+                continue
+            partition = self.partition_table(connection, month)
+            selects.append(partition.select().where(
+                partition.c.timestamp >= since, partition.c.timestamp <= until,
+                *(criterion(partition) for criterion in criteria)
+            ))
+        if not selects:
+            return None
+        return selects[0] if len(selects) == 1 else union_all(*selects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maintain monthly environmental_data partitions')
+    parser.add_argument('--database-url', default=default_database_url())
+    parser.add_argument('--table', default='environmental_data')
+    parser.add_argument('--months-ahead', type=int, default=3)
+    parser.add_argument('--retention-months', type=int, default=12)
+    parser.add_argument('--archive-schema', default='archive', help='PostgreSQL schema for detached partitions')
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if engine.dialect.name != 'postgresql':
+        print(f"{engine.dialect.name}: no native partitioning, {args.table} stays a single table. Nothing to do.")
+        return
+
+    manager = PostgresPartitionManager(engine, args.table, args.months_ahead,
+                                       args.retention_months, args.archive_schema)
+    result = manager.maintain()
+    print(f"Partitions created: {len(result['created'])}, expired: {len(result['expired'])}")
+    for name in result['created']:
+        print(f'   + {name}')
+    for name in result['expired']:
+        print(f'   - {name}')
+
+
+if __name__ == '__main__':
+    main()
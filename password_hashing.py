@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Password Hashing
+Password hashes computed off the request threads, at a calibrated cost.
+
+Password hashing is slow on purpose, so a burst of logins hashed on the
+request threads pins every web worker. PasswordHasher hands the work to
+a small process pool behind a bounded queue. When the queue is full the
+caller gets HasherBusy (a 503) at once instead of piling up behind it.
+
+The cost (scrypt N or PBKDF2 iterations) is calibrated once per process
+so one hash takes about `target_seconds` on this host, and never goes
+below werkzeug's defaults. Hashes keep werkzeug's format, so existing
+ones still verify. verify() also returns a fresh hash when the stored
+one is weaker than the current policy, so logins migrate old hashes.
+
+    hasher = PasswordHasher(workers=2, max_pending=64)
+    user.password_hash = hasher.hash(password)
+    valid, upgraded = hasher.verify(user.password_hash, password)
+"""
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# algorithm -> (floor, ceiling) of its cost parameter
+COST_LIMITS = {
+    'scrypt': (2 ** 15, 2 ** 17),             # N; memory is 1 KiB * N with r=8
+    'pbkdf2:sha256': (600000, 10000000)       # iterations
+}
+
+
+class HasherBusy(ServiceUnavailable):
+    """Too many password hashes queued; the client should retry shortly"""
+    description = 'Authentication is busy, please retry in a moment.'
+
+
+def method_for(algorithm: str, cost: int) -> str:
+    """werkzeug method string for an algorithm at a cost"""
+    if algorithm == 'scrypt':
+        return f'scrypt:{cost}:8:1'
+    return f'{algorithm}:{cost}'
+
+
+def parse_method(pwhash: str) -> Tuple[str, int]:
+    """(algorithm, cost) of a stored werkzeug hash; cost 0 when unknown"""
+    method = pwhash.split('$', 1)[0]
+    if method.startswith('scrypt'):
+        parts = method.split(':')
+        return 'scrypt', int(parts[1]) if len(parts) > 1 else 2 ** 15
+    algorithm, _, cost = method.rpartition(':')
+    if algorithm and cost.isdigit():
+        return algorithm, int(cost)
+    return method, 0
+
+
+def calibrate(algorithm: str = 'scrypt', target_seconds: float = 0.25) -> str:
+    """Method string whose hashes take about `target_seconds` here
+
+    One hash is timed at the floor cost and scaled (both algorithms are
+    linear in their cost); scrypt's N is rounded down to a power of two.
+    """
+    floor, ceiling = COST_LIMITS[algorithm]
+    started = time.perf_counter()
+    generate_password_hash('calibration', method=method_for(algorithm, floor))
+    elapsed = max(time.perf_counter() - started, 1e-6)
+
+    cost = floor * target_seconds / elapsed
+    if algorithm == 'scrypt':
+        cost = 2 ** int(math.log2(max(cost, 1)))
+    else:
+        cost = int(cost // 10000 * 10000)
+    return method_for(algorithm, min(max(cost, floor), ceiling))
+
+
+def needs_rehash(pwhash: str, method: str) -> bool:
+    """True when a stored hash uses another algorithm or a lower cost than `method`"""
+    stored, cost = parse_method(pwhash)
+    wanted, wanted_cost = parse_method(method + '$')
+    return stored != wanted or cost < wanted_cost
+
+
+class PasswordHasher:
+    """Bounded process pool for password hashes at a calibrated cost
+
+    With `workers=0` hashes run on the calling thread (still bounded by
+    `max_pending`), for hosts where a process pool is not an option.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 64, target_seconds: float = 0.25,
+                 algorithm: str = 'scrypt', method: Optional[str] = None, timeout: float = 30.0):
+        if algorithm not in COST_LIMITS:
+            raise ValueError(f'Unsupported password hash algorithm: {algorithm}')
+        self.workers = workers
+        self.target_seconds = target_seconds
+        self.algorithm = algorithm
+        self.timeout = timeout
+        self._method = method
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def method(self) -> str:
+        """Current hashing policy, calibrated on first use"""
+        if self._method is None:
+            self.calibrate()
+        return self._method
+
+    def calibrate(self) -> str:
+        with self._lock:
+            if self._method is None:
+                self._method = calibrate(self.algorithm, self.target_seconds)
+        return self._method
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def run(self, function: Callable, *args) -> Any:
+        """Run a CPU-bound hashing function in the pool
+
+        Raises HasherBusy when the queue is full or the job outlives
+        `timeout`. A pool job keeps its slot until it really finishes, so
+        jobs abandoned by a timeout still count against `max_pending`.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            pool = self._pool()
+            future = pool.submit(function, *args) if pool is not None else None
+        except BrokenProcessPool:
+            self._discard(pool)
+            future = None
+        except BaseException:
+            self._slots.release()
+            raise
+        if future is None:
+            try:
+                return function(*args)
+            finally:
+                self._slots.release()
+
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            future.cancel()  # frees the slot at once if the job never started
+            raise HasherBusy()
+        except BrokenProcessPool:
+            self._discard(pool)
+            return function(*args)
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        """A worker died (e.g. OOM-killed): start a fresh pool next time"""
+        with self._lock:
+            if self._executor is pool:
+                self._executor = None
+
+    def hash(self, password: str) -> str:
+        return self.run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> Tuple[bool, Optional[str]]:
+        """(valid, upgraded hash or None); store the upgrade when it is not None"""
+        if not pwhash or not self.run(check_password_hash, pwhash, password):
+            return False, None
+        if needs_rehash(pwhash, self.method):
+            return True, self.hash(password)
+        return True, None
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_default: Optional[PasswordHasher] = None
+_default_lock = threading.Lock()
+
+
+def default_hasher() -> PasswordHasher:
+    """Process-wide hasher configured from PASSWORD_HASH_* environment variables"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PasswordHasher(
+                workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+                max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64)),
+                target_seconds=float(os.environ.get('PASSWORD_HASH_TARGET_MS', 250)) / 1000,
+                algorithm=os.environ.get('PASSWORD_HASH_ALGORITHM', 'scrypt')
+            )
+        return _default
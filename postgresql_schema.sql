@@ -93,9 +93,9 @@ CREATE INDEX idx_bunker_users_bunker_id ON bunker_users(bunker_id);
 CREATE INDEX idx_bunker_users_access_level ON bunker_users(access_level);
 CREATE INDEX idx_bunker_users_security_clearance ON bunker_users(security_clearance);
 
--- Table des données environnementales (optimisée)
+-- Table des données environnementales (optimisée, partitionnée par mois)
 CREATE TABLE environmental_data (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
     temperature DECIMAL(5,2),
     humidity DECIMAL(5,2),
@@ -109,21 +109,43 @@ CREATE TABLE environmental_data (
     sensor_id VARCHAR(50),
     data_quality_score DECIMAL(3,2) DEFAULT 1.0,
     is_anomaly BOOLEAN DEFAULT false,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
 
 -- Index pour les données environnementales
 CREATE INDEX idx_env_data_timestamp ON environmental_data(timestamp);
-CREATE INDEX idx_env_data_bunker_timestamp ON environmental_data(bunker_id, timestamp);
+CREATE INDEX idx_env_data_bunker_timestamp ON environmental_data(bunker_id, timestamp, id);
 CREATE INDEX idx_env_data_sensor ON environmental_data(sensor_id);
 CREATE INDEX idx_env_data_anomaly ON environmental_data(is_anomaly);
 
 -- Partitioning par mois pour les données environnementales
-CREATE TABLE environmental_data_y2025m01 PARTITION OF environmental_data
-    FOR VALUES FROM ('2025-01-01') TO ('2025-02-01');
-CREATE TABLE environmental_data_y2025m02 PARTITION OF environmental_data
-    FOR VALUES FROM ('2025-02-01') TO ('2025-03-01');
--- Ajouter d'autres partitions selon les besoins
+-- Partition par défaut : une insertion hors des mois créés n'échoue jamais
+CREATE TABLE environmental_data_default PARTITION OF environmental_data DEFAULT;
+
+-- Crée les partitions manquantes du mois courant et des `months_ahead` suivants.
+-- partitions.py les maintient ensuite (pré-création, détachement et archivage).
+CREATE OR REPLACE FUNCTION ensure_environmental_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        partition_name := format('environmental_data_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF environmental_data FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month_start, (month_start + INTERVAL '1 month')::DATE);
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_environmental_partitions(3);
 
 -- Table des alertes (améliorée)
 CREATE TABLE alerts (
@@ -145,6 +167,7 @@ CREATE TABLE alerts (
     resolution_notes TEXT,
     auto_resolved BOOLEAN DEFAULT false,
     escalation_level INTEGER DEFAULT 1,
+    escalated_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
     -- Contraintes
@@ -155,9 +178,10 @@ CREATE TABLE alerts (
 -- Index pour les alertes
 CREATE INDEX idx_alerts_timestamp ON alerts(timestamp);
 CREATE INDEX idx_alerts_bunker_severity ON alerts(bunker_id, severity, timestamp);
+CREATE INDEX idx_alerts_bunker_resolved_timestamp ON alerts(bunker_id, is_resolved, timestamp, id);
 CREATE INDEX idx_alerts_resolved ON alerts(is_resolved);
 CREATE INDEX idx_alerts_type ON alerts(alert_type);
-CREATE INDEX idx_alerts_escalation ON alerts(escalation_level);
+CREATE INDEX idx_alerts_escalation ON alerts(escalation_level, escalated_at) WHERE is_resolved = false;
 
 -- Table des messages d'urgence (améliorée)
 CREATE TABLE emergency_messages (
@@ -189,6 +213,7 @@ CREATE INDEX idx_emergency_messages_timestamp ON emergency_messages(timestamp);
 CREATE INDEX idx_emergency_messages_status ON emergency_messages(status);
 CREATE INDEX idx_emergency_messages_priority ON emergency_messages(priority);
 CREATE INDEX idx_emergency_messages_bunker ON emergency_messages(bunker_id);
+CREATE INDEX idx_emergency_messages_bunker_timestamp ON emergency_messages(bunker_id, timestamp, id);
 CREATE INDEX idx_emergency_messages_scheduled ON emergency_messages(scheduled_for);
 
 -- Table des catégories de quiz
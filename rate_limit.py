@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Rate Limiting
+One GCRA (generic cell rate algorithm) limiter for every rate limit.
+
+GCRA is a token bucket stored as a single number per key: the
+theoretical arrival time (TAT) of the next request. Allowing `limit`
+requests per `window` means each request pushes the TAT forward by
+window / limit, and a request is refused when that would put the TAT
+more than `window` ahead of now. That is O(1) time and one float per
+key, instead of a list of timestamps rescanned on every request.
+
+A key whose TAT has passed is indistinguishable from a new one, so idle
+keys can be dropped at any time. MemoryStore keeps its TATs in a
+min-heap and pops the expired ones on every write, whatever their
+window; at its key cap it evicts the key closest to expiring, so a
+flood of new keys cannot wipe out the limits of busy ones. SharedStore
+is a fixed-size, 4-way set-associative table in named shared memory
+where expired slots are simply reused, so every worker on the host
+enforces the same limits in constant memory.
+
+    limiter = RateLimiter(SharedStore('lataupe_rate_limits'))
+    if not limiter.allow(f'login:{ip}', limit=5, window=60):
+        return jsonify({'error': 'Too many attempts'}), 429
+"""
+
+import hashlib
+import heapq
+import itertools
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover - Python < 3.8
+    shared_memory = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+_RATE = re.compile(r'^\s*(\d+)\s*(?:per|/)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$', re.IGNORECASE)
+
+# (value, Decision) from a store transaction step; None as value means "do not store"
+Step = Callable[[Optional[float]], Tuple[Optional[float], 'Decision']]
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    remaining: int       # further requests allowed right now
+    retry_after: float   # seconds until the next request would be allowed (0 when allowed)
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """'5 per minute', '100/hour' or '10 per 30 seconds' -> (limit, window seconds)"""
+    match = _RATE.match(rate)
+    if not match:
+        raise ValueError(f'Invalid rate: {rate!r}')
+    count, multiple, period = match.groups()
+    return int(count), int(multiple or 1) * PERIODS[period.lower()]
+
+
+class MemoryStore:
+    """Per-process TATs with an expiry min-heap; expired keys are popped on write"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tats: Dict[str, Tuple[float, int]] = {}  # key -> (TAT, generation)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._generations = itertools.count()
+        self._lock = threading.Lock()
+
+    def transact(self, key: str, now: float, step: Step) -> 'Decision':
+        with self._lock:
+            entry = self._tats.get(key)
+            tat, decision = step(entry[0] if entry is not None else None)
+            if tat is not None:
+                generation = next(self._generations)
+                self._tats[key] = (tat, generation)
+                heapq.heappush(self._heap, (tat, generation, key))
+            self._sweep(now)
+            return decision
+
+    def _sweep(self, now: float):
+        # Stale heap entries (overwritten or deleted keys) are skipped as they surface
+        while self._heap:
+            tat, generation, key = self._heap[0]
+            entry = self._tats.get(key)
+            if entry is not None and entry[1] == generation:
+                if tat > now and len(self._tats) <= self.max_keys:
+                    break
+                del self._tats[key]  # expired, or the closest to expiring when over the cap
+            heapq.heappop(self._heap)
+        if len(self._heap) > 2 * len(self._tats) + 64:
+            self._heap = [(tat, generation, key) for key, (tat, generation) in self._tats.items()]
+            heapq.heapify(self._heap)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._tats.pop(key, None)
+
+    def __len__(self):
+        return len(self._tats)
+
+
+_SLOT = struct.Struct('Qd')  # key fingerprint, TAT
+
+
+class SharedStore:
+    """Fixed-size set-associative TAT table in named shared memory
+
+    A key lives in one of `ways` slots of its bucket. Expired slots are
+    reused first; when a bucket is full of live keys, the one closest to
+    expiring is evicted (that key just gets a fresh allowance).
+    """
+
+    def __init__(self, name: Optional[str] = None, slots: int = 65536, ways: int = 4,
+                 lock_dir: Optional[str] = None):
+        self.ways = ways
+        self.buckets = max(slots // ways, 1)
+        size = self.buckets * ways * _SLOT.size
+        self._shm = None
+        self._lock_file = None
+        if name and shared_memory is not None:
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                try:
+                    self._shm = shared_memory.SharedMemory(name=name, track=False)
+                except TypeError:  # Python < 3.13 has no `track` argument
+                    self._shm = shared_memory.SharedMemory(name=name)
+                # Some platforms round segments up to whole pages
+                if not size <= self._shm.size < size + mmap.PAGESIZE:
+                    actual = self._shm.size
+                    self._shm.close()
+                    self._shm = None
+                    raise ValueError(f"Shared memory segment '{name}' holds {actual} bytes, "
+                                     f"{size} expected for {slots} slots")
+            self._buf = self._shm.buf
+            if fcntl is not None:
+                self._lock_file = open(os.path.join(lock_dir or tempfile.gettempdir(), f'{name}.lock'), 'a+b')
+        else:
+            self._buf = memoryview(bytearray(size))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(key: str) -> int:
+        # Never 0, which marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') | 1
+
+    def _locate(self, fingerprint: int, now: float) -> Tuple[int, Optional[float]]:
+        """Offset of the key's slot (or the slot to claim) and its live TAT"""
+        base = (fingerprint % self.buckets) * self.ways * _SLOT.size
+        victim, victim_tat = base, float('inf')
+        for way in range(self.ways):
+            offset = base + way * _SLOT.size
+            stored, tat = _SLOT.unpack_from(self._buf, offset)
+            if stored == fingerprint:
+                return offset, tat if tat > now else None
+            candidate_tat = float('-inf') if stored == 0 or tat <= now else tat
+            if candidate_tat < victim_tat:
+                victim, victim_tat = offset, candidate_tat
+        return victim, None
+
+    def transact(self, key: str, now: float, step: Step) -> 'Decision':
+        fingerprint = self.fingerprint(key)
+        with self._lock:
+            if self._lock_file is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                offset, tat = self._locate(fingerprint, now)
+                new_tat, decision = step(tat)
+                if new_tat is not None:
+                    _SLOT.pack_into(self._buf, offset, fingerprint, new_tat)
+                return decision
+            finally:
+                if self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def delete(self, key: str):
+        fingerprint = self.fingerprint(key)
+        with self._lock:
+            if self._lock_file is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                offset, _ = self._locate(fingerprint, float('inf'))
+                if _SLOT.unpack_from(self._buf, offset)[0] == fingerprint:
+                    _SLOT.pack_into(self._buf, offset, 0, 0.0)
+            finally:
+                if self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def close(self):
+        if self._shm is not None:
+            self._buf = None
+            self._shm.close()
+            self._shm = None
+
+
+class RateLimiter:
+    """GCRA limiter: `limit` requests per `window` seconds, bursts of up to `limit`"""
+
+    def __init__(self, store=None, clock: Callable[[], float] = time.time):
+        self.store = store if store is not None else MemoryStore()
+        self.clock = clock
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> Decision:
+        """Count a request of weight `cost` against `key` if it fits"""
+        if limit <= 0:
+            return Decision(False, 0, float(window))
+        interval = window / limit
+        now = self.clock()
+
+        def step(tat: Optional[float]) -> Tuple[Optional[float], Decision]:
+            new_tat = max(tat or now, now) + interval * cost
+            if new_tat - now > window:
+                return None, Decision(False, 0, new_tat - window - now)
+            return new_tat, Decision(True, int((window - (new_tat - now)) / interval + 1e-9), 0.0)
+
+        return self.store.transact(key, now, step)
+
+    def allow(self, key: str, limit: int, window: float, cost: int = 1) -> bool:
+        return self.hit(key, limit, window, cost).allowed
+
+    def reset(self, key: str):
+        self.store.delete(key)
+
+
+_default: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def default_limiter() -> RateLimiter:
+    """Process-wide limiter; shared between workers when RATE_LIMIT_SHM_NAME is set"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            name = os.environ.get('RATE_LIMIT_SHM_NAME')
+            _default = RateLimiter(SharedStore(name, int(os.environ.get('RATE_LIMIT_SLOTS', 65536)),
+                                               lock_dir=os.environ.get('SHM_LOCK_DIR'))
+                                   if name else MemoryStore(int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100000))))
+        return _default
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Latest Reading Buffer
+Fixed-size ring of the most recent sensor readings per bunker.
+
+The buffer lives either in a private bytearray (single process) or in a
+named multiprocessing.shared_memory segment so that every web worker on
+the host reads the same readings without touching the database.
+
+Layout: a small header followed by `max_bunkers` slots. Each slot holds
+the bunker id, a sequence counter (seqlock), a write counter and a ring
+of `capacity` records of float64 values: [timestamp, id, *fields].
+Missing values are stored as NaN.
+
+Readers never block: a slot that stays mid-write for `read_retries`
+attempts (e.g. its writer died) reads as empty, so callers fall back to
+the database, and the next writer repairs the sequence counter.
+"""
+
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover - Python < 3.8
+    shared_memory = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+_MAGIC = b'LTPRING1'
+_HEADER = struct.Struct('8sIII')      # magic, capacity, max_bunkers, field_count
+_SLOT_HEADER = struct.Struct('64sQQ')  # bunker_id, seqlock, write count
+_NAN = float('nan')
+_EPOCH = datetime(1970, 1, 1)
+
+
+class LatestReadingBuffer:
+    """Ring buffer of the last N readings per bunker_id"""
+
+    def __init__(self, fields: Sequence[str], capacity: int = 64,
+                 max_bunkers: int = 256, name: Optional[str] = None,
+                 lock_dir: Optional[str] = None, read_retries: int = 100):
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.max_bunkers = max_bunkers
+        self.name = name
+        self.read_retries = read_retries
+        self._record_width = 2 + len(self.fields)
+        self._slot_size = _SLOT_HEADER.size + capacity * self._record_width * 8
+        size = _HEADER.size + max_bunkers * self._slot_size
+
+        self._shm = None
+        self._lock_file = None
+        if name and shared_memory is not None:
+            self._shm = self._open_shared(name, size)
+            self._buf = self._shm.buf
+            if fcntl is not None:
+                self._lock_file = open(os.path.join(lock_dir or tempfile.gettempdir(), f'{name}.lock'), 'a+b')
+        else:
+            self._buf = memoryview(bytearray(size))
+
+        magic, *layout = _HEADER.unpack_from(self._buf, 0)
+        if magic == b'\0' * 8:
+            _HEADER.pack_into(self._buf, 0, _MAGIC, capacity, max_bunkers, len(self.fields))
+        elif magic != _MAGIC or tuple(layout) != (capacity, max_bunkers, len(self.fields)):
+            raise ValueError(f"Shared memory segment '{name}' has an incompatible layout")
+
+        self._thread_lock = threading.Lock()
+        self._slots: Dict[str, int] = {}
+
+    @staticmethod
+    def _open_shared(name: str, size: int):
+        """Create the named segment, or attach to it if another worker did"""
+        try:
+            return shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            try:
+                return shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:  # Python < 3.13 has no `track` argument
+                return shared_memory.SharedMemory(name=name)
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+
+    def push(self, bunker_id: str, timestamp: datetime, values: Dict,
+             record_id: Optional[int] = None):
+        """Append one reading to the bunker's ring"""
+        self.push_many([dict(values, bunker_id=bunker_id, timestamp=timestamp, id=record_id)])
+
+    def push_many(self, rows: Iterable[Dict]):
+        """Append readings (dicts with bunker_id, timestamp and fields)"""
+        with self._write_lock():
+            for row in rows:
+                slot = self._slot_for(row['bunker_id'], create=True)
+                if slot is None:
+                    continue
+                offset = self._slot_offset(slot)
+                _, seq, count = _SLOT_HEADER.unpack_from(self._buf, offset)
+                if seq % 2:
+                    # A writer died mid-record; its record was never counted
+                    seq += 1
+                _SLOT_HEADER.pack_into(self._buf, offset, row['bunker_id'].encode('utf-8'), seq + 1, count)
+
+                record = [_to_epoch(row['timestamp']), _to_float(row.get('id'))]
+                record.extend(_to_float(row.get(field)) for field in self.fields)
+                struct.pack_into(f'{self._record_width}d', self._buf,
+                                 self._record_offset(slot, count % self.capacity), *record)
+
+                _SLOT_HEADER.pack_into(self._buf, offset, row['bunker_id'].encode('utf-8'), seq + 2, count + 1)
+
+    def clear(self):
+        """Forget every reading and bunker slot, for every attached process
+
+        Other processes notice on their next lookup: a cached slot is only
+        trusted while it still carries the bunker's name.
+        """
+        with self._write_lock():
+            start = _HEADER.size
+            self._buf[start:start + self.max_bunkers * self._slot_size] = bytes(self.max_bunkers * self._slot_size)
+            self._slots.clear()
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+
+    def latest(self, bunker_id: str) -> Optional[Dict]:
+        """Most recent reading for a bunker, or None on a cold buffer"""
+        readings = self.recent(bunker_id, 1)
+        return readings[0] if readings else None
+
+    def recent(self, bunker_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Up to `limit` readings for a bunker, newest first ([] if unreadable)"""
+        slot = self._slot_for(bunker_id)
+        if slot is None:
+            return []
+
+        records = self._read_slot(slot)
+        if records is None:
+            return []
+        records.sort(key=lambda record: record[0], reverse=True)
+        return [self._to_reading(bunker_id, record) for record in records[:limit]]
+
+    def bunker_ids(self) -> List[str]:
+        """Bunkers currently present in the buffer"""
+        return [self._slot_name(slot) for slot in range(self.max_bunkers) if self._slot_name(slot)]
+
+    def _read_slot(self, slot: int) -> Optional[List[tuple]]:
+        """Consistent snapshot of a slot, or None if no writer-free moment came up"""
+        offset = self._slot_offset(slot)
+        record_format = struct.Struct(f'{self._record_width}d')
+        for attempt in range(self.read_retries):
+            if attempt:
+                time.sleep(0)  # yield to the writer instead of spinning on the GIL
+            _, seq_before, count = _SLOT_HEADER.unpack_from(self._buf, offset)
+            if seq_before % 2:
+                continue
+            records = [
+                record_format.unpack_from(self._buf, self._record_offset(slot, index))
+                for index in range(min(count, self.capacity))
+            ]
+            _, seq_after, _ = _SLOT_HEADER.unpack_from(self._buf, offset)
+            if seq_before == seq_after:
+                return records
+        return None
+
+    def _to_reading(self, bunker_id: str, record: tuple) -> Dict:
+        """Turn a raw record back into a reading dict"""
+        reading = {
+            'id': None if math.isnan(record[1]) else int(record[1]),
+            'bunker_id': bunker_id,
+            'timestamp': datetime.fromtimestamp(record[0], timezone.utc).replace(tzinfo=None)
+        }
+        for field, value in zip(self.fields, record[2:]):
+            reading[field] = None if math.isnan(value) else value
+        return reading
+
+    # ------------------------------------------------------------------
+    # Slot bookkeeping
+    # ------------------------------------------------------------------
+
+    def _slot_for(self, bunker_id: str, create: bool = False) -> Optional[int]:
+        """Slot index of a bunker; slots only move when clear() empties the directory"""
+        slot = self._slots.get(bunker_id)
+        if slot is not None:
+            if self._slot_name(slot) == bunker_id:
+                return slot
+            # Cleared (possibly by another process) and maybe reassigned since
+            del self._slots[bunker_id]
+        if len(bunker_id.encode('utf-8')) > 64:
+            return None
+
+        for index in range(self.max_bunkers):
+            name = self._slot_name(index)
+            if name == bunker_id:
+                self._slots[bunker_id] = index
+                return index
+            if not name:
+                if not create:
+                    return None
+                # Claim the free slot (caller holds the write lock)
+                _SLOT_HEADER.pack_into(self._buf, self._slot_offset(index), bunker_id.encode('utf-8'), 0, 0)
+                self._slots[bunker_id] = index
+                return index
+        return None
+
+    def _slot_name(self, slot: int) -> str:
+        raw = _SLOT_HEADER.unpack_from(self._buf, self._slot_offset(slot))[0]
+        return raw.rstrip(b'\0').decode('utf-8')
+
+    def _slot_offset(self, slot: int) -> int:
+        return _HEADER.size + slot * self._slot_size
+
+    def _record_offset(self, slot: int, index: int) -> int:
+        return self._slot_offset(slot) + _SLOT_HEADER.size + index * self._record_width * 8
+
+    def _write_lock(self):
+        return _WriteLock(self._thread_lock, self._lock_file)
+
+    def close(self):
+        """Detach from the shared segment (the segment itself is kept)"""
+        if self._shm is not None:
+            self._buf = None
+            self._shm.close()
+            self._shm = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+class _WriteLock:
+    """Thread lock plus, for shared segments, an inter-process file lock"""
+
+    def __init__(self, thread_lock: threading.Lock, lock_file=None):
+        self.thread_lock = thread_lock
+        self.lock_file = lock_file
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.lock_file is not None:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        if self.lock_file is not None:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        self.thread_lock.release()
+
+
+def _to_epoch(timestamp) -> float:
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return (timestamp - _EPOCH).total_seconds()
+    return float(timestamp)
+
+
+def _to_float(value) -> float:
+    return _NAN if value is None else float(value)
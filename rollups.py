@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Environmental Rollups
+Incremental min/max/avg/count aggregates at minute, hour and day resolution.
+
+Rollup rows are keyed by (bunker_id, resolution, bucket_start, metric) and
+store sample_count, min_value, max_value and sum_value, so merging a new
+batch into an existing bucket is a single upsert per key and the average
+is sum_value / sample_count at read time.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case
+
+# Coarsest first: pick_resolution walks this list
+RESOLUTIONS: Tuple[Tuple[str, int], ...] = (('day', 86400), ('hour', 3600), ('minute', 60))
+RESOLUTION_SECONDS = dict(RESOLUTIONS)
+ROLLUP_KEY = ('bunker_id', 'resolution', 'bucket_start', 'metric')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(timestamp: datetime, seconds: int) -> datetime:
+    """Floor a naive UTC timestamp to its bucket"""
+    offset = int((timestamp - _EPOCH).total_seconds()) // seconds * seconds
+    return _EPOCH + timedelta(seconds=offset)
+
+
+def accumulate(rows: Iterable[Dict], fields: Sequence[str]) -> Dict[tuple, List[float]]:
+    """Fold raw readings into {rollup key: [count, min, max, sum]}"""
+    aggregates: Dict[tuple, List[float]] = {}
+    for row in rows:
+        for resolution, seconds in RESOLUTIONS:
+            start = bucket_start(row['timestamp'], seconds)
+            for field in fields:
+                value = row.get(field)
+                if value is None:
+                    continue
+                key = (row['bunker_id'], resolution, start, field)
+                current = aggregates.get(key)
+                if current is None:
+                    aggregates[key] = [1, value, value, value]
+                else:
+                    current[0] += 1
+                    if value < current[1]:
+                        current[1] = value
+                    if value > current[2]:
+                        current[2] = value
+                    current[3] += value
+    return aggregates
+
+
+def upsert(connection, table, aggregates: Dict[tuple, List[float]]) -> int:
+    """Merge aggregates into the rollup table with one statement per batch"""
+    if not aggregates:
+        return 0
+
+    values = [
+        dict(zip(ROLLUP_KEY, key), sample_count=count, min_value=low, max_value=high, sum_value=total)
+        for key, (count, low, high, total) in aggregates.items()
+    ]
+
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return _merge_row_by_row(connection, table, values)
+
+    statement = insert(table)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            'sample_count': table.c.sample_count + excluded.sample_count,
+            'sum_value': table.c.sum_value + excluded.sum_value,
+            'min_value': case((excluded.min_value < table.c.min_value, excluded.min_value),
+                              else_=table.c.min_value),
+            'max_value': case((excluded.max_value > table.c.max_value, excluded.max_value),
+                              else_=table.c.max_value)
+        }
+    )
+    connection.execute(statement, values)
+    return len(values)
+
+
+def _merge_row_by_row(connection, table, values: List[Dict]) -> int:
+    """Portable fallback for dialects without ON CONFLICT"""
+    for value in values:
+        match = and_(*(table.c[column] == value[column] for column in ROLLUP_KEY))
+        existing = connection.execute(table.select().where(match)).mappings().first()
+        if existing is None:
+            connection.execute(table.insert().values(**value))
+        else:
+            connection.execute(table.update().where(match).values(
+                sample_count=existing['sample_count'] + value['sample_count'],
+                sum_value=existing['sum_value'] + value['sum_value'],
+                min_value=min(existing['min_value'], value['min_value']),
+                max_value=max(existing['max_value'], value['max_value'])
+            ))
+    return len(values)
+
+
+def pick_resolution(window: timedelta, points: Optional[int]) -> Optional[str]:
+    """Coarsest resolution that still yields at least `points` buckets
+
+    Returns None when raw readings are needed (no budget given, or even
+    minute buckets would be too sparse for the requested budget).
+    """
+    if not points or points <= 0:
+        return None
+    window_seconds = window.total_seconds()
+    for resolution, seconds in RESOLUTIONS:
+        if window_seconds / seconds >= points:
+            return resolution
+    return None
+
+
+def pivot(rollup_rows: Iterable, resolution: str) -> List[Dict]:
+    """Turn long-format rollup rows into one dict per bucket, newest first
+
+    Each metric keeps its raw-reading key (holding the average) plus
+    `<metric>_min` / `<metric>_max`, so charting code works on either shape.
+    """
+    buckets: Dict[tuple, Dict] = {}
+    for row in rollup_rows:
+        key = (row.bunker_id, row.bucket_start)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {
+                'bunker_id': row.bunker_id,
+                'timestamp': row.bucket_start.isoformat(),
+                'resolution': resolution,
+                'count': 0
+            }
+        bucket[row.metric] = row.sum_value / row.sample_count
+        bucket[f'{row.metric}_min'] = row.min_value
+        bucket[f'{row.metric}_max'] = row.max_value
+        bucket['count'] = max(bucket['count'], row.sample_count)
+
+    return [buckets[key] for key in sorted(buckets, key=lambda key: key[1], reverse=True)]
+
+
+def pivot_columns(rollup_tuples: Iterable[tuple], fields: Sequence[str]) -> Tuple[List[datetime], Dict[str, List]]:
+    """Columnar pivot of (bucket_start, metric, sample_count, min, max, sum) tuples, oldest first
+
+    Returns the bucket starts and one parallel list per `<metric>`,
+    `<metric>_min` and `<metric>_max` (None where a bucket lacks a metric).
+    """
+    starts: List[datetime] = []
+    index: Dict[datetime, int] = {}
+    columns = {name: [] for field in fields for name in (field, f'{field}_min', f'{field}_max')}
+    for start, metric, count, low, high, total in sorted(rollup_tuples, key=lambda row: row[0]):
+        position = index.get(start)
+        if position is None:
+            position = index[start] = len(starts)
+            starts.append(start)
+            for values in columns.values():
+                values.append(None)
+        if metric in fields:
+            columns[metric][position] = total / count
+            columns[f'{metric}_min'][position] = low
+            columns[f'{metric}_max'][position] = high
+    return starts, columns
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Telemetry Simulator
+Realistic, correlated sensor series for capacity testing.
+
+Every bunker carries a few latent processes (occupancy, thermal drift,
+weather) as AR(1) series plus a daily cycle. The sensors are derived from
+them, so CO2 rises while oxygen falls with occupancy, humidity follows
+temperature, and radiation has rare spikes. Values stay inside the ranges
+of the `normal` / `emergency` / `critical` scenarios.
+
+Generation is vectorized over bunkers and streamed in chunks. Months of
+data for thousands of bunkers never sit in memory at once.
+
+    # Bulk load 90 days of minute data for 1000 bunkers (COPY on PostgreSQL)
+    python simulator.py load --bunkers 1000 --days 90 --interval 60 --scenario mixed
+
+    # Replay one simulated hour of 50 bunkers at 60x speed against the API
+    python simulator.py replay --url http://localhost:5001 --bunkers 50 --hours 1 --speed 60
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from partitions import default_database_url
+
+FIELDS = ('temperature', 'humidity', 'oxygen_level', 'co2_level',
+          'radiation_level', 'air_quality_index', 'pressure')
+
+SCENARIOS = {
+    'normal': {
+        'temp_range': (18, 24),
+        'humidity_range': (40, 60),
+        'oxygen_range': (19, 21),
+        'co2_range': (300, 800),
+        'radiation_range': (0.1, 0.3),
+        'aqi_range': (10, 50)
+    },
+    'emergency': {
+        'temp_range': (10, 35),
+        'humidity_range': (20, 80),
+        'oxygen_range': (16, 23),
+        'co2_range': (800, 2000),
+        'radiation_range': (0.5, 2.0),
+        'aqi_range': (50, 150)
+    },
+    'critical': {
+        'temp_range': (5, 40),
+        'humidity_range': (10, 90),
+        'oxygen_range': (14, 25),
+        'co2_range': (1500, 5000),
+        'radiation_range': (2.0, 10.0),
+        'aqi_range': (150, 300)
+    }
+}
+
+# Share of bunkers per scenario for --scenario mixed
+MIXED_WEIGHTS = {'normal': 0.9, 'emergency': 0.08, 'critical': 0.02}
+
+# Column names of the dashboard / PostgreSQL schema, for the same readings
+SCHEMA_ALIASES = {'air_quality_index': 'air_quality', 'pressure': 'atmospheric_pressure'}
+
+_RANGE_KEYS = {'temperature': 'temp_range', 'humidity': 'humidity_range', 'oxygen_level': 'oxygen_range',
+               'co2_level': 'co2_range', 'radiation_level': 'radiation_range', 'air_quality_index': 'aqi_range'}
+
+
+class TelemetrySimulator:
+    """Vectorized generator of correlated readings for many bunkers"""
+
+    def __init__(self, bunker_ids: Sequence[str], scenarios: Sequence[str],
+                 interval_seconds: int = 60, seed: Optional[int] = None):
+        if len(bunker_ids) != len(scenarios):
+            raise ValueError('one scenario per bunker is required')
+        self.bunker_ids = np.asarray(bunker_ids)
+        self.interval = interval_seconds
+        self.rng = np.random.default_rng(seed)
+        count = len(bunker_ids)
+
+        self.low = {field: np.array([SCENARIOS[s][key][0] for s in scenarios], dtype=np.float64)
+                    for field, key in _RANGE_KEYS.items()}
+        self.high = {field: np.array([SCENARIOS[s][key][1] for s in scenarios], dtype=np.float64)
+                     for field, key in _RANGE_KEYS.items()}
+
+        # Latent AR(1) processes (stationary N(0, 1)) and per-bunker daily phase
+        self.occupancy = self.rng.standard_normal(count)
+        self.thermal = self.rng.standard_normal(count)
+        self.weather = self.rng.standard_normal(count)
+        self.phase = self.rng.uniform(0, 2 * math.pi, count)
+
+    @classmethod
+    def fleet(cls, bunkers: int, scenario: str = 'normal', interval_seconds: int = 60,
+              seed: Optional[int] = None) -> 'TelemetrySimulator':
+        """`bunkers` bunkers named bunker-00001...; scenario 'mixed' draws from MIXED_WEIGHTS"""
+        names = [f'bunker-{i:05d}' for i in range(1, bunkers + 1)]
+        if scenario == 'mixed':
+            rng = np.random.default_rng(seed)
+            scenarios = rng.choice(list(MIXED_WEIGHTS), size=bunkers, p=list(MIXED_WEIGHTS.values())).tolist()
+        else:
+            scenarios = [scenario] * bunkers
+        return cls(names, scenarios, interval_seconds, seed)
+
+    def _step(self, process: np.ndarray, rho: float) -> np.ndarray:
+        process *= rho
+        process += math.sqrt(1 - rho * rho) * self.rng.standard_normal(len(process))
+        return process
+
+    def chunks(self, start: datetime, end: datetime, rows_per_chunk: int = 100000) -> Iterator[Dict[str, np.ndarray]]:
+        """Time-ordered column chunks covering [start, end)"""
+        count = len(self.bunker_ids)
+        total_steps = int((end - start).total_seconds() // self.interval)
+        steps_per_chunk = max(1, rows_per_chunk // max(count, 1))
+        epoch = (start - datetime(1970, 1, 1)).total_seconds()
+
+        for first in range(0, total_steps, steps_per_chunk):
+            steps = min(steps_per_chunk, total_steps - first)
+            yield self._generate(epoch + first * self.interval, steps)
+
+    def _generate(self, epoch: float, steps: int) -> Dict[str, np.ndarray]:
+        count = len(self.bunker_ids)
+        shape = (steps, count)
+        occupancy, thermal, weather = np.empty(shape), np.empty(shape), np.empty(shape)
+        for step in range(steps):
+            occupancy[step] = self._step(self.occupancy, 0.995)
+            thermal[step] = self._step(self.thermal, 0.999)
+            weather[step] = self._step(self.weather, 0.9995)
+
+        seconds = epoch + np.arange(steps)[:, None] * self.interval
+        daily = np.sin(2 * math.pi * seconds / 86400 + self.phase)
+        noise = self.rng.standard_normal((len(FIELDS), steps, count))
+        spikes = (self.rng.random(shape) < 1e-4) * 4.0
+
+        signals = {
+            'temperature': 0.6 * daily + 0.5 * thermal + 0.1 * noise[0],
+            'humidity': 0.4 * thermal + 0.4 * occupancy + 0.2 * noise[1],
+            'oxygen_level': -0.8 * occupancy - 0.2 * weather + 0.1 * noise[2],
+            'co2_level': 0.9 * occupancy + 0.1 * noise[3],
+            'radiation_level': 0.3 * weather + 0.2 * noise[4] + spikes,
+            'air_quality_index': 0.7 * occupancy + 0.3 * noise[5]
+        }
+        columns = {}
+        for field, signal in signals.items():
+            middle = (self.low[field] + self.high[field]) / 2
+            half = (self.high[field] - self.low[field]) / 2
+            columns[field] = middle + half * np.tanh(signal)
+        columns['air_quality_index'] = np.rint(columns['air_quality_index']).astype(np.int64)
+        columns['pressure'] = 1020 + 10 * np.tanh(weather) + 0.3 * noise[6]
+
+        columns = {field: np.round(values, 3).ravel() if values.dtype.kind == 'f' else values.ravel()
+                   for field, values in columns.items()}
+        columns['bunker_id'] = np.tile(self.bunker_ids, steps)
+        columns['timestamp'] = np.repeat((seconds[:, 0] * 1e6).astype(np.int64).astype('datetime64[us]'), count)
+        return columns
+
+
+def to_rows(chunk: Dict[str, np.ndarray], aliases: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """Column chunk to row dicts (native Python types) for executemany / JSON"""
+    aliases = aliases or {}
+    names = [aliases.get(name, name) for name in chunk]
+    return [dict(zip(names, values)) for values in zip(*(column.tolist() for column in chunk.values()))]
+
+
+def bulk_load(engine, chunks: Iterator[Dict[str, np.ndarray]], table_name: str = 'environmental_data') -> int:
+    """Insert chunks with COPY (PostgreSQL) or executemany, one transaction per chunk"""
+    from sqlalchemy import MetaData, Table
+
+    table = Table(table_name, MetaData(), autoload_with=engine)
+    aliases = {field: alias for field, alias in SCHEMA_ALIASES.items()
+               if field not in table.c and alias in table.c}
+    loaded = 0
+    for chunk in chunks:
+        rows = to_rows(chunk, aliases)
+        if engine.dialect.name == 'postgresql':
+            _copy(engine, table_name, rows)
+        else:
+            with engine.begin() as connection:
+                connection.execute(table.insert(), rows)
+        loaded += len(rows)
+    return loaded
+
+
+def _copy(engine, table_name: str, rows: List[Dict]):
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row[column] for column in columns)
+    buffer.seek(0)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def replay(base_url: str, simulator: TelemetrySimulator, duration: timedelta, speed: float = 1.0,
+           batch_size: int = 5000, path: str = '/api/environmental/batch',
+           device_key: Optional[str] = None) -> Dict:
+    """POST simulated readings to the ingest API, `speed` times faster than real time
+
+    Readings are stamped with the wall-clock time they are sent, so a
+    dashboard watching the target sees a live (if accelerated) feed.
+    `device_key` is sent as X-Device-Key (see INGEST_DEVICE_KEYS).
+    """
+    headers = {'Content-Type': 'application/x-ndjson'}
+    if device_key:
+        headers['X-Device-Key'] = device_key
+    started = time.monotonic()
+    start = datetime.utcnow()
+    latencies, sent, errors = [], 0, 0
+
+    for chunk in simulator.chunks(start, start + duration, rows_per_chunk=batch_size):
+        rows = to_rows(chunk)
+        for step_rows in _group_by_timestamp(rows):
+            offset = (step_rows[0]['timestamp'] - start).total_seconds() / speed
+            delay = started + offset - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            now = datetime.utcnow().isoformat()
+            for first in range(0, len(step_rows), batch_size):
+                body = '\n'.join(json.dumps(dict(row, timestamp=now)) for row in step_rows[first:first + batch_size])
+                request = urllib.request.Request(base_url.rstrip('/') + path, data=body.encode('utf-8'),
+                                                 headers=headers)
+                sent_at = time.monotonic()
+                try:
+                    with urllib.request.urlopen(request, timeout=30) as response:
+                        response.read()
+                    sent += min(batch_size, len(step_rows) - first)
+                except OSError:
+                    errors += 1
+                latencies.append(time.monotonic() - sent_at)
+
+    latencies.sort()
+    return {
+        'readings_sent': sent,
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+        'elapsed_seconds': round(time.monotonic() - started, 1)
+    }
+
+
+def _group_by_timestamp(rows: List[Dict]) -> Iterator[List[Dict]]:
+    group = []
+    for row in rows:
+        if group and row['timestamp'] != group[0]['timestamp']:
+            yield group
+            group = []
+        group.append(row)
+    if group:
+        yield group
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bunker telemetry simulator')
+    parser.add_argument('mode', choices=('load', 'replay'))
+    parser.add_argument('--bunkers', type=int, default=100)
+    parser.add_argument('--scenario', choices=tuple(SCENARIOS) + ('mixed',), default='normal')
+    parser.add_argument('--interval', type=int, default=60, help='Seconds between readings')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--days', type=float, default=1.0, help='load: history length, ending now')
+    parser.add_argument('--database-url', default=default_database_url())
+    parser.add_argument('--table', default='environmental_data')
+    parser.add_argument('--url', default='http://localhost:5001', help='replay: application base URL')
+    parser.add_argument('--hours', type=float, default=1.0, help='replay: simulated duration')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay: speed-up factor')
+    parser.add_argument('--device-key', default=os.environ.get('INGEST_DEVICE_KEY'), help='replay: X-Device-Key')
+    args = parser.parse_args()
+
+    simulator = TelemetrySimulator.fleet(args.bunkers, args.scenario, args.interval, args.seed)
+
+    if args.mode == 'load':
+        from sqlalchemy import create_engine
+
+        end = datetime.utcnow()
+        started = time.monotonic()
+        loaded = bulk_load(create_engine(args.database_url),
+                           simulator.chunks(end - timedelta(days=args.days), end), args.table)
+        elapsed = time.monotonic() - started
+        print(f"Loaded {loaded} readings in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):.0f} rows/s)")
+    else:
+        stats = replay(args.url, simulator, timedelta(hours=args.hours), args.speed, device_key=args.device_key)
+        print(json.dumps(stats, indent=2))
+
+
+if __name__ == '__main__':
+    main()
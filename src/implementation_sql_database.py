@@ -108,9 +108,9 @@ CREATE INDEX idx_bunker_users_bunker_id ON bunker_users(bunker_id);
 CREATE INDEX idx_bunker_users_access_level ON bunker_users(access_level);
 CREATE INDEX idx_bunker_users_security_clearance ON bunker_users(security_clearance);
 
--- Table des données environnementales (optimisée)
+-- Table des données environnementales (optimisée, partitionnée par mois)
 CREATE TABLE environmental_data (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
     temperature DECIMAL(5,2),
     humidity DECIMAL(5,2),
@@ -124,21 +124,43 @@ CREATE TABLE environmental_data (
     sensor_id VARCHAR(50),
     data_quality_score DECIMAL(3,2) DEFAULT 1.0,
     is_anomaly BOOLEAN DEFAULT false,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
 
 -- Index pour les données environnementales
 CREATE INDEX idx_env_data_timestamp ON environmental_data(timestamp);
-CREATE INDEX idx_env_data_bunker_timestamp ON environmental_data(bunker_id, timestamp);
+CREATE INDEX idx_env_data_bunker_timestamp ON environmental_data(bunker_id, timestamp, id);
 CREATE INDEX idx_env_data_sensor ON environmental_data(sensor_id);
 CREATE INDEX idx_env_data_anomaly ON environmental_data(is_anomaly);
 
 -- Partitioning par mois pour les données environnementales
-CREATE TABLE environmental_data_y2025m01 PARTITION OF environmental_data
-    FOR VALUES FROM ('2025-01-01') TO ('2025-02-01');
-CREATE TABLE environmental_data_y2025m02 PARTITION OF environmental_data
-    FOR VALUES FROM ('2025-02-01') TO ('2025-03-01');
--- Ajouter d'autres partitions selon les besoins
+-- Partition par défaut : une insertion hors des mois créés n'échoue jamais
+CREATE TABLE environmental_data_default PARTITION OF environmental_data DEFAULT;
+
+-- Crée les partitions manquantes du mois courant et des `months_ahead` suivants.
+-- partitions.py les maintient ensuite (pré-création, détachement et archivage).
+CREATE OR REPLACE FUNCTION ensure_environmental_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        partition_name := format('environmental_data_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF environmental_data FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month_start, (month_start + INTERVAL '1 month')::DATE);
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_environmental_partitions(3);
 
 -- Table des alertes (améliorée)
 CREATE TABLE alerts (
@@ -160,6 +182,7 @@ CREATE TABLE alerts (
     resolution_notes TEXT,
     auto_resolved BOOLEAN DEFAULT false,
     escalation_level INTEGER DEFAULT 1,
+    escalated_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
     -- Contraintes
@@ -170,9 +193,10 @@ CREATE TABLE alerts (
 -- Index pour les alertes
 CREATE INDEX idx_alerts_timestamp ON alerts(timestamp);
 CREATE INDEX idx_alerts_bunker_severity ON alerts(bunker_id, severity, timestamp);
+CREATE INDEX idx_alerts_bunker_resolved_timestamp ON alerts(bunker_id, is_resolved, timestamp, id);
 CREATE INDEX idx_alerts_resolved ON alerts(is_resolved);
 CREATE INDEX idx_alerts_type ON alerts(alert_type);
-CREATE INDEX idx_alerts_escalation ON alerts(escalation_level);
+CREATE INDEX idx_alerts_escalation ON alerts(escalation_level, escalated_at) WHERE is_resolved = false;
 
 -- Table des messages d'urgence (améliorée)
 CREATE TABLE emergency_messages (
@@ -204,6 +228,7 @@ CREATE INDEX idx_emergency_messages_timestamp ON emergency_messages(timestamp);
 CREATE INDEX idx_emergency_messages_status ON emergency_messages(status);
 CREATE INDEX idx_emergency_messages_priority ON emergency_messages(priority);
 CREATE INDEX idx_emergency_messages_bunker ON emergency_messages(bunker_id);
+CREATE INDEX idx_emergency_messages_bunker_timestamp ON emergency_messages(bunker_id, timestamp, id);
 CREATE INDEX idx_emergency_messages_scheduled ON emergency_messages(scheduled_for);
 
 -- Table des catégories de quiz
@@ -796,9 +821,9 @@ def create_advanced_models():
     
     models_code = """from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.dialects.postgresql import UUID, JSONB, INET
-from sqlalchemy import func, Index
+from sqlalchemy import bindparam, event, func, Index, update
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_hashing import default_hasher
 import uuid
 
 db = SQLAlchemy()
@@ -830,10 +855,14 @@ class User(db.Model):
     audit_logs = db.relationship('AuditLog', backref='user', cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = default_hasher().hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        # Hashes below the calibrated cost are upgraded; the login commit saves them
+        valid, upgraded = default_hasher().verify(self.password_hash, password)
+        if upgraded:
+            self.password_hash = upgraded
+        return valid
     
     def is_locked(self):
         return self.locked_until and self.locked_until > datetime.utcnow()
@@ -1008,11 +1037,14 @@ class Alert(db.Model):
     resolved_at = db.Column(db.DateTime)
     resolution_notes = db.Column(db.Text)
     auto_resolved = db.Column(db.Boolean, default=False)
-    escalation_level = db.Column(db.Integer, default=1, index=True)
+    escalation_level = db.Column(db.Integer, default=1)
+    escalated_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     __table_args__ = (
         Index('idx_alerts_bunker_severity', 'bunker_id', 'severity', 'timestamp'),
+        Index('idx_alerts_escalation', 'escalation_level', 'escalated_at',
+              postgresql_where=db.text('is_resolved = false')),
         db.CheckConstraint('escalation_level >= 1 AND escalation_level <= 5'),
     )
     
@@ -1022,9 +1054,14 @@ class Alert(db.Model):
         self.resolved_at = datetime.utcnow()
         self.resolution_notes = notes
     
-    def escalate(self):
+    def escalate(self, at=None):
         if self.escalation_level < 5:
             self.escalation_level += 1
+            self.escalated_at = at or datetime.utcnow()
+    
+    def escalation_since(self):
+        # When the alert reached its current level: the next escalation is timed from here
+        return self.escalated_at or self.timestamp
     
     def to_dict(self):
         return {
@@ -1045,7 +1082,8 @@ class Alert(db.Model):
             'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
             'resolution_notes': self.resolution_notes,
             'auto_resolved': self.auto_resolved,
-            'escalation_level': self.escalation_level
+            'escalation_level': self.escalation_level,
+            'escalated_at': self.escalated_at.isoformat() if self.escalated_at else None
         }
 
 # Autres modèles (QuizCategory, BunkerQuiz, etc.) restent similaires mais avec les améliorations PostgreSQL
@@ -1090,6 +1128,49 @@ class AuditLog(db.Model):
         )
         db.session.add(log)
         return log
+
+# Escalation: unresolved alerts are loaded once into a deadline heap and
+# escalated by a background thread; level changes are written in batches.
+
+def start_escalation_scheduler(app, **options):
+    from escalation import EscalationScheduler
+    
+    alerts = Alert.__table__
+    statement = update(alerts).where(
+        alerts.c.id == bindparam('alert_id'), alerts.c.is_resolved.is_(False)
+    ).values(escalation_level=bindparam('level'), escalated_at=bindparam('at'))
+    
+    def persist_escalations(batch):
+        with app.app_context():
+            try:
+                db.session.execute(statement, [
+                    {'alert_id': item.alert_id, 'level': item.level, 'at': item.escalated_at} for item in batch
+                ])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Failed to persist %d alert escalations; they stay queued', len(batch))
+                raise
+    
+    scheduler = EscalationScheduler(persist_escalations, **options)
+    with app.app_context():
+        scheduler.load(db.session.query(
+            Alert.id, Alert.severity, Alert.escalation_level, func.coalesce(Alert.escalated_at, Alert.timestamp)
+        ).filter(Alert.is_resolved.is_(False), Alert.escalation_level < scheduler.max_level).yield_per(1000))
+    
+    @event.listens_for(Alert, 'after_insert')
+    def schedule_alert(mapper, connection, target):
+        scheduler.schedule(target.id, target.severity, target.escalation_level or 1, target.escalation_since())
+    
+    @event.listens_for(Alert, 'after_update')
+    def reschedule_alert(mapper, connection, target):
+        if target.is_resolved:
+            scheduler.cancel(target.id)
+        else:
+            scheduler.schedule(target.id, target.severity, target.escalation_level, target.escalation_since())
+    
+    scheduler.start()
+    return scheduler
 """
     
     return models_code
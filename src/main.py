@@ -1,6 +1,5 @@
 import os
 import logging
-import random
 from datetime import datetime, timedelta
 from flask import Flask, send_from_directory, jsonify, request, session
 from flask_cors import CORS
@@ -10,6 +9,8 @@ from src.models.user import user_bp
 from src.routes.auth import auth_bp
 from src.routes.dashboard import dashboard_bp
 from src.routes.emergency import emergency_bp
+from password_hashing import default_hasher
+from simulator import SCHEMA_ALIASES, TelemetrySimulator, to_rows
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -173,21 +174,13 @@ def create_tables():
         db.session.add(admin_bunker)
         db.session.add(resident_bunker)
         
-        # Add sample environmental data
-        for i in range(24):
-            env_data = EnvironmentalsData(
-                timestamp=datetime.utcnow() - timedelta(hours=i),
-                temperature=random.uniform(18, 24),
-                humidity=random.uniform(40, 60),
-                air_quality=random.uniform(80, 100),
-                oxygen_level=random.uniform(19, 21),
-                co2_level=random.uniform(400, 800),
-                radiation_level=random.uniform(0.1, 0.5),
-                atmospheric_pressure=random.uniform(1010, 1020),
-                bunker_id='bunker-01',
-                sensor_location='Central Hub'
-            )
-            db.session.add(env_data)
+        # Add sample environmental data: one simulated day, hourly, in a single executemany
+        now = datetime.utcnow()
+        sample = TelemetrySimulator(['bunker-01'], ['normal'], interval_seconds=3600)
+        rows = [dict(row, sensor_location='Central Hub')
+                for chunk in sample.chunks(now - timedelta(hours=24), now)
+                for row in to_rows(chunk, SCHEMA_ALIASES)]
+        db.session.execute(EnvironmentalsData.__table__.insert(), rows)
         
         db.session.commit()
         logger.info("Database initialized with sample data")
@@ -242,5 +235,7 @@ if __name__ == '__main__':
         create_tables()
     
     port = int(os.environ.get('PORT', 5001))
+    # Calibrate before serving; WSGI workers calibrate on their first hash instead
+    logger.info(f"Password hashing calibrated to {default_hasher().calibrate()}")
     logger.info(f"Starting Lataupe Bunker Tech on port {port}")
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -22,7 +22,7 @@ from src.utils.security import SecurityValidator, RateLimiter, SessionManager
 from src.utils.email import EmailService
 
 # Imports des modèles et routes
-from src.models.advanced_models import db, User, BunkerUser, EnvironmentalData, Alert, AuditLog
+from src.models.advanced_models import db, User, BunkerUser, EnvironmentalData, Alert, AuditLog, start_escalation_scheduler
 from src.routes.registration import registration_bp
 from src.routes.quiz import quiz_bp
 from src.routes.api import api_bp
@@ -49,6 +49,7 @@ class SecureBunkerApp:
         self.encryption_manager = None
         self.secure_storage = None
         self.input_sanitizer = None
+        self.escalation_scheduler = None
         
     def create_app(self, config_name='production'):
         """Crée et configure l'application Flask sécurisée"""
@@ -162,6 +163,9 @@ class SecureBunkerApp:
                 logger.info("Database tables created/verified")
             except Exception as e:
                 logger.error(f"Database initialization error: {e}")
+        
+        # Escalade des alertes non résolues (thread de fond, une seule requête au démarrage)
+        self.escalation_scheduler = start_escalation_scheduler(self.app)
     
     def _register_blueprints(self):
         """Enregistre tous les blueprints"""
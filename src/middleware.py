@@ -8,13 +8,15 @@ import ipaddress
 from datetime import datetime, timedelta
 import logging
 
+from rate_limit import default_limiter
+
 class SecurityMiddleware:
     """Middleware de sécurité avancé"""
     
     def __init__(self, app=None):
         self.app = app
         self.blocked_ips = set()
-        self.rate_limits = {}
+        self.rate_limiter = default_limiter()
         self.suspicious_activities = {}
         
         if app:
@@ -83,28 +85,12 @@ class SecurityMiddleware:
         return ip in self.blocked_ips
     
     def _check_rate_limit(self, ip):
-        """Vérifie les limites de taux"""
-        now = time.time()
-        window = 60  # 1 minute
-        limit = 100  # 100 requêtes par minute
-        
-        if ip not in self.rate_limits:
-            self.rate_limits[ip] = []
-        
-        # Nettoyer les anciennes requêtes
-        self.rate_limits[ip] = [
-            req_time for req_time in self.rate_limits[ip]
-            if now - req_time < window
-        ]
-        
-        # Vérifier la limite
-        if len(self.rate_limits[ip]) >= limit:
-            self._add_suspicious_activity(ip, 'rate_limit_exceeded')
-            return True
+        """Vérifie les limites de taux (100 requêtes par minute et par IP)"""
+        if self.rate_limiter.allow(f'ip:{ip}', limit=100, window=60):
+            return False
         
-        # Enregistrer cette requête
-        self.rate_limits[ip].append(now)
-        return False
+        self._add_suspicious_activity(ip, 'rate_limit_exceeded')
+        return True
     
     def _verify_request_integrity(self):
         """Vérifie l'intégrité de la requête"""
@@ -28,6 +28,9 @@ class BunkerUser(db.Model):
 
 class EnvironmentalsData(db.Model):
     __tablename__ = 'environmental_data'
+    __table_args__ = (
+        db.Index('idx_env_data_bunker_timestamp', 'bunker_id', 'timestamp', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -56,8 +59,28 @@ class EnvironmentalsData(db.Model):
             'sensor_location': self.sensor_location
         }
 
+class EnvironmentalRollup(db.Model):
+    __tablename__ = 'environmental_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('bunker_id', 'resolution', 'bucket_start', 'metric',
+                            name='uq_environmental_rollup_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    bunker_id = db.Column(db.String(50), nullable=False)
+    resolution = db.Column(db.String(10), nullable=False)  # minute, hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    metric = db.Column(db.String(50), nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    min_value = db.Column(db.Float)
+    max_value = db.Column(db.Float)
+    sum_value = db.Column(db.Float)
+
 class Alert(db.Model):
     __tablename__ = 'alerts'
+    __table_args__ = (
+        db.Index('idx_alerts_bunker_resolved_timestamp', 'bunker_id', 'is_resolved', 'timestamp', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -88,6 +111,9 @@ class Alert(db.Model):
 
 class EmergencyMessage(db.Model):
     __tablename__ = 'emergency_messages'
+    __table_args__ = (
+        db.Index('idx_emergency_messages_bunker_timestamp', 'bunker_id', 'timestamp', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
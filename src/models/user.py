@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from password_hashing import default_hasher
 
 db = SQLAlchemy()
 
@@ -17,12 +17,15 @@ class User(db.Model):
     last_login = db.Column(db.DateTime)
 
     def set_password(self, password):
-        """Hash and set the password."""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set the password (in the shared hashing pool)."""
+        self.password_hash = default_hasher().hash(password)
 
     def check_password(self, password):
-        """Check if the provided password matches the hash."""
-        return check_password_hash(self.password_hash, password)
+        """Check the password; an outdated hash is upgraded for the caller to commit."""
+        valid, upgraded = default_hasher().verify(self.password_hash, password)
+        if upgraded:
+            self.password_hash = upgraded
+        return valid
 
     def to_dict(self):
         """Convert user object to dictionary."""
@@ -0,0 +1,62 @@
+"""
+Keyset pagination on (timestamp, id), newest first.
+
+Each page continues strictly after the last row of the previous one,
+`WHERE (timestamp, id) < (:timestamp, :id) ORDER BY timestamp DESC, id DESC
+LIMIT :n`. With a composite index ending in (timestamp, id) this is an
+index range scan, so page 1000 costs the same as page 1 (OFFSET would
+read and discard every earlier row). The cursor is opaque to clients:
+they pass back the `X-Next-Cursor` header value as `?cursor=`.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from flask import jsonify
+from sqlalchemy import tuple_
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor(); raises ValueError for anything it did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def page_size(limit: Optional[int], default: int) -> int:
+    return min(max(limit or default, 1), MAX_PAGE_SIZE)
+
+
+def keyset_page(query, model, limit: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """One page of `query` (newest first) and the cursor of the next page, if any"""
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.timestamp, model.id) < tuple_(timestamp, row_id))
+
+    # One extra row tells whether another page exists without a COUNT
+    rows = query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.timestamp, last.id)
+
+
+def page_response(items: List[dict], next_cursor: Optional[str]):
+    """JSON array of `items`, with the next cursor in a header so the body shape is unchanged"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, session, render_template, flash,
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, EmailField, SelectField, TextAreaField, BooleanField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError, Regexp
-from werkzeug.security import generate_password_hash
+from password_hashing import HasherBusy
 from src.models.advanced_models import db, User, BunkerUser, UserSubscription, AuditLog
 from src.utils.security import SecurityValidator, RateLimiter
 from src.utils.email import EmailService
@@ -221,6 +221,10 @@ def register():
             # Rediriger vers la page de vérification
             return redirect(url_for('registration.verify_email', user_id=user.id))
             
+        except HasherBusy:
+            db.session.rollback()
+            flash('Registration is busy right now. Please try again in a moment.', 'warning')
+            return render_template('auth/register.html', form=form)
         except Exception as e:
             db.session.rollback()
             
@@ -1,11 +1,100 @@
 from flask import Blueprint, request, jsonify, session
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
 from src.models.user import db, User
-from src.models.bunker import BunkerUser, EnvironmentalsData, Alert
-from datetime import datetime, timedelta
+from src.models.bunker import BunkerUser, EnvironmentalsData, EnvironmentalRollup, Alert
+from src.pagination import keyset_page, page_response, page_size
+from reading_buffer import LatestReadingBuffer
+from alert_index import ActiveAlertIndex
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from types import SimpleNamespace
+import numpy as np
+import os
 import random
+import threading
+import alert_engine
+import downsample
+import rollups
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/api/dashboard')
 
+READING_FIELDS = ('temperature', 'humidity', 'air_quality', 'oxygen_level',
+                  'co2_level', 'radiation_level', 'atmospheric_pressure')
+
+# Last readings per bunker, shared between workers when a segment name is set
+latest_readings = LatestReadingBuffer(
+    READING_FIELDS,
+    capacity=int(os.environ.get('LATEST_READINGS_CAPACITY', 64)),
+    name=os.environ.get('DASHBOARD_READINGS_SHM_NAME'),
+    lock_dir=os.environ.get('SHM_LOCK_DIR')
+)
+
+# In-memory mirrors are only updated once the rows they mirror are committed;
+# mapper events queue the work here and a rollback throws it away.
+def after_commit(target, key, callback):
+    """Run callback when target's session commits (once per key)."""
+    object_session(target).info.setdefault('dashboard_after_commit', {})[key] = callback
+
+@event.listens_for(db.session, 'after_commit')
+def run_after_commit(session):
+    for callback in session.info.pop('dashboard_after_commit', {}).values():
+        callback()
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_after_commit(session):
+    session.info.pop('dashboard_after_commit', None)
+
+def push_reading(reading):
+    latest_readings.push(reading.bunker_id, reading.timestamp,
+                         {field: getattr(reading, field) for field in READING_FIELDS}, reading.id)
+
+@event.listens_for(EnvironmentalsData, 'after_insert')
+def remember_reading(mapper, connection, target):
+    """Write-through: every committed reading lands in the ring buffer."""
+    reading = SimpleNamespace(id=target.id, bunker_id=target.bunker_id, timestamp=target.timestamp,
+                              **{field: getattr(target, field) for field in READING_FIELDS})
+    after_commit(target, ('reading', target.id), lambda: push_reading(reading))
+
+@event.listens_for(EnvironmentalsData, 'after_insert')
+def update_rollups(mapper, connection, target):
+    """Fold every inserted reading into its minute/hour/day buckets."""
+    row = {field: getattr(target, field) for field in READING_FIELDS}
+    row.update(bunker_id=target.bunker_id, timestamp=target.timestamp)
+    rollups.upsert(connection, EnvironmentalRollup.__table__, rollups.accumulate([row], READING_FIELDS))
+
+# Unresolved alerts per bunker, kept current by the Alert mapper events below
+active_alerts = ActiveAlertIndex(
+    time_key='timestamp',
+    name=os.environ.get('DASHBOARD_ALERTS_SHM_NAME')
+)
+
+@event.listens_for(Alert, 'after_insert')
+@event.listens_for(Alert, 'after_update')
+def index_alert(mapper, connection, target):
+    """Inserts and resolutions drop the bunker from the active-alert index, once committed."""
+    bunker_id = target.bunker_id
+    after_commit(target, ('alerts', bunker_id), lambda: active_alerts.invalidate(bunker_id))
+
+def get_active_alerts(bunker_id):
+    """Unresolved alerts, most severe then newest first, from memory unless cold."""
+    return active_alerts.get(bunker_id, lambda: [
+        alert.to_dict() for alert in Alert.query.filter_by(bunker_id=bunker_id, is_resolved=False)
+    ])
+
+def get_latest_reading(bunker_id):
+    """Latest reading for a bunker, from memory unless the buffer is cold."""
+    reading = latest_readings.latest(bunker_id)
+    if reading is None:
+        latest_data = EnvironmentalsData.query.filter_by(bunker_id=bunker_id)\
+                                              .order_by(EnvironmentalsData.timestamp.desc())\
+                                              .first()
+        if latest_data is None:
+            return None
+        push_reading(latest_data)
+        reading = latest_readings.latest(bunker_id)
+    return reading
+
 @dashboard_bp.route('/system-status', methods=['GET'])
 def system_status():
     """Get overall system status."""
@@ -18,27 +107,29 @@ def system_status():
     bunker_id = bunker_user.bunker_id if bunker_user else 'bunker-01'
     
     # Get latest environmental data
-    latest_data = EnvironmentalsData.query.filter_by(bunker_id=bunker_id)\
-                                          .order_by(EnvironmentalsData.timestamp.desc())\
-                                          .first()
+    latest_data = get_latest_reading(bunker_id)
     
     # Get active alerts
-    active_alerts = Alert.query.filter_by(bunker_id=bunker_id, is_resolved=False)\
-                              .order_by(Alert.timestamp.desc())\
-                              .limit(5).all()
+    alerts = get_active_alerts(bunker_id)[:5]
     
     # Calculate system health score
-    health_score = calculate_health_score(latest_data)
+    health_score = calculate_health_score(SimpleNamespace(**latest_data) if latest_data else None)
     
     return jsonify({
         'bunker_id': bunker_id,
         'health_score': health_score,
-        'latest_environmental_data': latest_data.to_dict() if latest_data else None,
-        'active_alerts': [alert.to_dict() for alert in active_alerts],
+        'latest_environmental_data': dict(latest_data, timestamp=latest_data['timestamp'].isoformat())
+                                     if latest_data else None,
+        'active_alerts': alerts,
         'total_residents': User.query.join(BunkerUser).filter_by(bunker_id=bunker_id).count(),
         'system_uptime': get_system_uptime()
     })
 
+# Chart requests are bounded whatever the query string asks for: at most
+# CHART_MAX_POINTS points, downsampled from at most CHART_MAX_RAW_ROWS readings.
+CHART_MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 5000))
+CHART_MAX_RAW_ROWS = int(os.environ.get('CHART_MAX_RAW_ROWS', 50000))
+
 @dashboard_bp.route('/environmental-data', methods=['GET'])
 def environmental_data():
     """Get environmental data for charts."""
@@ -48,6 +139,9 @@ def environmental_data():
     # Get query parameters
     hours = request.args.get('hours', 24, type=int)
     limit = request.args.get('limit', 100, type=int)
+    points = request.args.get('points', type=int)
+    if points is not None:
+        points = min(max(points, 1), CHART_MAX_POINTS)
     
     user = User.query.get(session['user_id'])
     bunker_user = BunkerUser.query.filter_by(user_id=user.id).first()
@@ -56,12 +150,29 @@ def environmental_data():
     # Get data from the last N hours
     since = datetime.utcnow() - timedelta(hours=hours)
     
-    data = EnvironmentalsData.query.filter_by(bunker_id=bunker_id)\
-                                   .filter(EnvironmentalsData.timestamp >= since)\
-                                   .order_by(EnvironmentalsData.timestamp.desc())\
-                                   .limit(limit).all()
+    # Long windows are served from the rollups instead of raw readings
+    resolution = rollups.pick_resolution(timedelta(hours=hours), points)
+    if resolution:
+        since = rollups.bucket_start(since, rollups.RESOLUTION_SECONDS[resolution])
+        buckets = EnvironmentalRollup.query.filter_by(bunker_id=bunker_id, resolution=resolution)\
+                                           .filter(EnvironmentalRollup.bucket_start >= since)\
+                                           .all()
+        return jsonify(downsample.lttb_rows(rollups.pivot(buckets, resolution), points, READING_FIELDS))
+    
+    query = EnvironmentalsData.query.filter_by(bunker_id=bunker_id)\
+                                    .filter(EnvironmentalsData.timestamp >= since)
+    
+    # With a `points` budget the window (newest readings first, capped) is downsampled instead of paged
+    if points:
+        data = query.order_by(EnvironmentalsData.timestamp.desc()).limit(CHART_MAX_RAW_ROWS).all()
+        return jsonify(downsample.lttb_rows([item.to_dict() for item in data], points, READING_FIELDS))
+    
+    try:
+        data, next_cursor = keyset_page(query, EnvironmentalsData, page_size(limit, 100), request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     
-    return jsonify([item.to_dict() for item in data])
+    return page_response([item.to_dict() for item in data], next_cursor)
 
 @dashboard_bp.route('/alerts', methods=['GET'])
 def get_alerts():
@@ -83,9 +194,12 @@ def get_alerts():
     if severity:
         query = query.filter_by(severity=severity)
     
-    alerts = query.order_by(Alert.timestamp.desc()).limit(limit).all()
+    try:
+        alerts, next_cursor = keyset_page(query, Alert, page_size(limit, 50), request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     
-    return jsonify([alert.to_dict() for alert in alerts])
+    return page_response([alert.to_dict() for alert in alerts], next_cursor)
 
 @dashboard_bp.route('/alerts/<int:alert_id>/resolve', methods=['POST'])
 def resolve_alert(alert_id):
@@ -113,6 +227,74 @@ def resolve_alert(alert_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to resolve alert'}), 500
 
+BULK_RESOLVE_MAX_IDS = int(os.environ.get('ALERT_BULK_MAX_IDS', 10000))
+
+@dashboard_bp.route('/alerts/resolve', methods=['POST'])
+def resolve_alerts():
+    """Resolve many alerts in one UPDATE, by id list and/or filters.
+    
+    Body: {"ids": [..]} and/or any of "bunker_id", "alert_type", "severity"
+    and "older_than" (ISO 8601), plus optional "notes".
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    user = User.query.get(session['user_id'])
+    if user.role not in ['admin', 'security']:
+        return jsonify({'error': 'Insufficient permissions'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    criteria = [Alert.is_resolved == False]
+    try:
+        if data.get('ids') is not None:
+            if not isinstance(data['ids'], list) or len(data['ids']) > BULK_RESOLVE_MAX_IDS:
+                raise ValueError(f'ids must be a list of at most {BULK_RESOLVE_MAX_IDS} alert ids')
+            criteria.append(Alert.id.in_([int(alert_id) for alert_id in data['ids']]))
+        if data.get('older_than'):
+            older_than = datetime.fromisoformat(data['older_than'].replace('Z', '+00:00'))
+            if older_than.tzinfo is not None:
+                older_than = older_than.astimezone(timezone.utc).replace(tzinfo=None)
+            criteria.append(Alert.timestamp < older_than)
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'error': f'Invalid request: {e}'}), 400
+    for field in ('bunker_id', 'alert_type', 'severity'):
+        if data.get(field):
+            criteria.append(getattr(Alert, field) == data[field])
+    if len(criteria) == 1:
+        return jsonify({'error': 'An id list or at least one filter is required'}), 400
+    
+    # A bulk UPDATE skips the mapper events, so the index is invalidated below
+    statement = db.update(Alert).where(*criteria).values(
+        is_resolved=True, resolved_by=user.id, resolved_at=datetime.utcnow(),
+        resolution_notes=data.get('notes', '')
+    ).execution_options(synchronize_session='fetch')
+    try:
+        if db.engine.dialect.update_returning:
+            bunker_ids = db.session.execute(statement.returning(Alert.bunker_id)).scalars().all()
+        else:
+            bunker_ids = db.session.scalars(db.select(Alert.bunker_id).where(*criteria)).all()
+            db.session.execute(statement)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to resolve alerts'}), 500
+    
+    for bunker_id in set(bunker_ids):
+        active_alerts.invalidate(bunker_id)
+    return jsonify({'message': 'Alerts resolved successfully', 'resolved': len(bunker_ids)})
+
+# Health score penalties per metric come from the shared rules file (the
+# "health" bands, outermost first, with per-bunker overrides): a reading
+# outside (low, high) loses `penalty` points; only the first matching band counts.
+health_rules = alert_engine.RuleBook(
+    os.environ.get('ALERT_RULES_PATH', alert_engine.DEFAULT_RULES_PATH),
+    check_seconds=float(os.environ.get('ALERT_RULES_CHECK_SECONDS', 5))
+)
+
+def health_penalties(bunker_id=None):
+    """Penalty bands per metric in effect for a bunker."""
+    return health_rules.current().health_for(bunker_id)
+
 def calculate_health_score(environmental_data):
     """Calculate system health score based on environmental data."""
     if not environmental_data:
@@ -120,43 +302,154 @@ def calculate_health_score(environmental_data):
     
     score = 100
     
-    # Temperature check (optimal: 18-24°C)
-    if environmental_data.temperature:
-        if environmental_data.temperature < 15 or environmental_data.temperature > 28:
-            score -= 20
-        elif environmental_data.temperature < 18 or environmental_data.temperature > 24:
-            score -= 10
-    
-    # Humidity check (optimal: 40-60%)
-    if environmental_data.humidity:
-        if environmental_data.humidity < 30 or environmental_data.humidity > 70:
-            score -= 15
-        elif environmental_data.humidity < 40 or environmental_data.humidity > 60:
-            score -= 5
-    
-    # Oxygen level check (critical: >19%)
-    if environmental_data.oxygen_level:
-        if environmental_data.oxygen_level < 19:
-            score -= 30
-        elif environmental_data.oxygen_level < 20:
-            score -= 15
-    
-    # CO2 level check (critical: >1000 ppm)
-    if environmental_data.co2_level:
-        if environmental_data.co2_level > 1000:
-            score -= 25
-        elif environmental_data.co2_level > 800:
-            score -= 10
-    
-    # Radiation level check (warning: >1 µSv/h)
-    if environmental_data.radiation_level:
-        if environmental_data.radiation_level > 5:
-            score -= 40
-        elif environmental_data.radiation_level > 1:
-            score -= 20
+    for metric, bands in health_penalties(getattr(environmental_data, 'bunker_id', None)).items():
+        value = getattr(environmental_data, metric)
+        if not value:
+            continue
+        for low, high, penalty in bands:
+            if (low is not None and value < low) or (high is not None and value > high):
+                score -= penalty
+                break
     
     return max(0, score)
 
+def calculate_health_scores(columns, penalties=None):
+    """Vectorized calculate_health_score over {metric: float array} columns."""
+    length = len(next(iter(columns.values())))
+    score = np.full(length, 100, dtype=np.int64)
+    
+    for metric, bands in (penalties or health_penalties()).items():
+        values = np.asarray(columns[metric], dtype=np.float64)
+        # Missing and zero readings are skipped, as in the single-reading score
+        pending = ~np.isnan(values) & (values != 0)
+        for low, high, penalty in bands:
+            outside = np.zeros(length, dtype=bool)
+            if low is not None:
+                outside |= values < low
+            if high is not None:
+                outside |= values > high
+            hit = pending & outside
+            score[hit] -= penalty
+            pending &= ~hit
+    
+    return np.maximum(score, 0)
+
+# Closed buckets never change unless a late reading lands in them, so their
+# scores are computed once and shared by every viewer.
+HEALTH_BUCKET_SECONDS = (300, 900, 3600, 86400)
+# Longest timeline served; requests for more hours are clamped to it
+HEALTH_MAX_HOURS = int(os.environ.get('HEALTH_MAX_HOURS', 24 * 30))
+HEALTH_CACHE_MAX_ENTRIES = int(os.environ.get('HEALTH_CACHE_MAX_ENTRIES', 50000))
+_health_cache = OrderedDict()
+_health_cache_lock = threading.Lock()
+
+@health_rules.on_reload
+def forget_health_scores(table):
+    """Cached bucket scores were computed with the previous bands."""
+    with _health_cache_lock:
+        _health_cache.clear()
+
+@event.listens_for(EnvironmentalsData, 'after_insert')
+def invalidate_health_buckets(mapper, connection, target):
+    """Drop cached scores for the buckets a (possibly late) reading falls in, once committed."""
+    epoch = int((target.timestamp - datetime(1970, 1, 1)).total_seconds())
+    keys = [(target.bunker_id, seconds, epoch // seconds * seconds) for seconds in HEALTH_BUCKET_SECONDS]
+    
+    def forget():
+        with _health_cache_lock:
+            for key in keys:
+                _health_cache.pop(key, None)
+    after_commit(target, ('health', keys[0]), forget)
+
+def health_timeline(bunker_id, since, until, bucket_seconds):
+    """Per-bucket health (avg/min score, count) between two naive UTC times."""
+    first = int((since - datetime(1970, 1, 1)).total_seconds()) // bucket_seconds * bucket_seconds
+    now = int((until - datetime(1970, 1, 1)).total_seconds())
+    starts = range(first, now + 1, bucket_seconds)
+    
+    buckets = {}
+    with _health_cache_lock:
+        for start in starts:
+            key = (bunker_id, bucket_seconds, start)
+            if key in _health_cache:
+                _health_cache.move_to_end(key)
+                buckets[start] = _health_cache[key]
+    
+    missing = [start for start in starts if start not in buckets]
+    if missing:
+        computed = score_buckets(bunker_id, missing[0], now, bucket_seconds)
+        with _health_cache_lock:
+            for start in missing:
+                buckets[start] = computed.get(start)
+                # The open bucket is still filling up: never cache it
+                if start + bucket_seconds <= now:
+                    _health_cache[(bunker_id, bucket_seconds, start)] = buckets[start]
+            while len(_health_cache) > HEALTH_CACHE_MAX_ENTRIES:
+                _health_cache.popitem(last=False)
+    
+    return [
+        dict(buckets[start], timestamp=datetime.utcfromtimestamp(start).isoformat())
+        for start in starts if buckets[start] is not None
+    ]
+
+def score_buckets(bunker_id, first, last, bucket_seconds):
+    """Score every reading from `first` to `last` (epoch seconds) and aggregate per bucket."""
+    penalties = health_penalties(bunker_id)
+    columns = [getattr(EnvironmentalsData, metric) for metric in penalties]
+    rows = db.session.query(EnvironmentalsData.timestamp, *columns)\
+                     .filter(EnvironmentalsData.bunker_id == bunker_id)\
+                     .filter(EnvironmentalsData.timestamp >= datetime.utcfromtimestamp(first))\
+                     .filter(EnvironmentalsData.timestamp <= datetime.utcfromtimestamp(last))\
+                     .all()
+    if not rows:
+        return {}
+    
+    timestamps, *values = zip(*rows)
+    scores = calculate_health_scores({
+        metric: np.array(column, dtype=np.float64) for metric, column in zip(penalties, values)
+    }, penalties)
+    epochs = np.array(timestamps, dtype='datetime64[s]').astype(np.int64)
+    index = (epochs - first) // bucket_seconds
+    
+    count = np.bincount(index)
+    total = np.bincount(index, weights=scores)
+    lowest = np.full(len(count), 100, dtype=np.int64)
+    np.minimum.at(lowest, index, scores)
+    
+    return {
+        first + int(i) * bucket_seconds: {
+            'score': round(float(total[i] / count[i]), 1),
+            'min_score': int(lowest[i]),
+            'count': int(count[i])
+        }
+        for i in np.flatnonzero(count)
+    }
+
+@dashboard_bp.route('/health-timeline', methods=['GET'])
+def get_health_timeline():
+    """Get the health score trend for charts."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    hours = request.args.get('hours', 24, type=int)
+    bucket_seconds = request.args.get('bucket', 3600, type=int)
+    if hours <= 0:
+        return jsonify({'error': 'hours must be a positive integer'}), 400
+    if bucket_seconds not in HEALTH_BUCKET_SECONDS:
+        return jsonify({'error': f'bucket must be one of {list(HEALTH_BUCKET_SECONDS)} seconds'}), 400
+    hours = min(hours, HEALTH_MAX_HOURS)
+    
+    user = User.query.get(session['user_id'])
+    bunker_user = BunkerUser.query.filter_by(user_id=user.id).first()
+    bunker_id = bunker_user.bunker_id if bunker_user else 'bunker-01'
+    
+    now = datetime.utcnow()
+    return jsonify({
+        'bunker_id': bunker_id,
+        'bucket_seconds': bucket_seconds,
+        'timeline': health_timeline(bunker_id, now - timedelta(hours=hours), now, bucket_seconds)
+    })
+
 def get_system_uptime():
     """Get system uptime (placeholder implementation)."""
     return "72 hours, 15 minutes"
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 from src.models.user import db, User
 from src.models.bunker import BunkerUser, EmergencyMessage
+from src.pagination import keyset_page, page_response, page_size
 from datetime import datetime
 
 emergency_bp = Blueprint('emergency', __name__, url_prefix='/api/emergency')
@@ -28,9 +29,12 @@ def get_messages():
     if status:
         query = query.filter_by(status=status)
     
-    messages = query.order_by(EmergencyMessage.timestamp.desc()).limit(limit).all()
+    try:
+        messages, next_cursor = keyset_page(query, EmergencyMessage, page_size(limit, 50), request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     
-    return jsonify([msg.to_dict() for msg in messages])
+    return page_response([msg.to_dict() for msg in messages], next_cursor)
 
 @emergency_bp.route('/messages', methods=['POST'])
 def send_message():
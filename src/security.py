@@ -2,11 +2,14 @@ import hashlib
 import secrets
 import re
 import time
+import math
 from datetime import datetime, timedelta
-from flask import request, session
+from flask import request, session, jsonify
 from functools import wraps
 import ipaddress
 
+from rate_limit import default_limiter, parse_rate
+
 class SecurityValidator:
     """Validateur de sécurité pour l'enregistrement"""
     
@@ -97,53 +100,28 @@ class SecurityValidator:
         return hashlib.sha256(data.encode()).hexdigest()[:16]
 
 class RateLimiter:
-    """Limiteur de taux pour les requêtes"""
-    
-    _requests = {}
+    """Limiteur de taux pour les requêtes (GCRA partagé, voir rate_limit.py)"""
     
     @classmethod
     def limit(cls, rate_string):
-        """Décorateur pour limiter le taux de requêtes"""
+        """Décorateur pour limiter le taux de requêtes (ex: "5 per minute")"""
+        limit, window = parse_rate(rate_string)
+        period = rate_string.split()[-1]
+        
         def decorator(f):
             @wraps(f)
             def decorated_function(*args, **kwargs):
-                # Parser le taux (ex: "5 per minute")
-                parts = rate_string.split()
-                limit = int(parts[0])
-                period = parts[2]  # minute, hour, etc.
-                
-                # Calculer la fenêtre de temps
-                if period == 'minute':
-                    window = 60
-                elif period == 'hour':
-                    window = 3600
-                else:
-                    window = 60  # défaut: minute
-                
                 # Identifier le client
                 client_id = request.environ.get('HTTP_X_FORWARDED_FOR', request.remote_addr)
-                key = f"{f.__name__}:{client_id}"
-                
-                now = time.time()
+                decision = default_limiter().hit(f"{f.__name__}:{client_id}", limit, window)
                 
-                # Nettoyer les anciennes requêtes
-                if key in cls._requests:
-                    cls._requests[key] = [
-                        req_time for req_time in cls._requests[key]
-                        if now - req_time < window
-                    ]
-                else:
-                    cls._requests[key] = []
-                
-                # Vérifier la limite
-                if len(cls._requests[key]) >= limit:
-                    return jsonify({
+                if not decision.allowed:
+                    response = jsonify({
                         'error': 'Rate limit exceeded',
                         'message': f'Maximum {limit} requests per {period}'
-                    }), 429
-                
-                # Enregistrer cette requête
-                cls._requests[key].append(now)
+                    })
+                    response.headers['Retry-After'] = str(math.ceil(decision.retry_after))
+                    return response, 429
                 
                 return f(*args, **kwargs)
             
@@ -0,0 +1,136 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import alert_engine
+from alert_engine import ALERT_RULES, SEVERITY_LEVELS
+
+
+def test_vectorized_matches_single_reading_rules():
+    rng = random.Random(7)
+    rows = [{
+        'temperature': rng.choice([None, rng.uniform(0, 45)]),
+        'oxygen_level': rng.uniform(12, 22),
+        'co2_level': rng.uniform(300, 3000),
+        'radiation_level': rng.uniform(0, 8)
+    } for _ in range(500)]
+
+    violations = alert_engine.evaluate(alert_engine.to_columns(rows, [rule.metric for rule in ALERT_RULES]))
+    vectorized = sorted(zip(violations.rows.tolist(), violations.rules.tolist(), violations.severities.tolist()))
+
+    expected = []
+    for index, row in enumerate(rows):
+        for rule_index, rule in enumerate(ALERT_RULES):
+            for alert in alert_engine.evaluate_reading('bunker-01', row, [rule]):
+                expected.append((index, rule_index, SEVERITY_LEVELS[alert['severity']]))
+    assert vectorized == sorted(expected)
+
+
+def test_boundaries_and_missing_values():
+    columns = {'temperature': np.array([15.0, 30.0, 30.1, 35.1, np.nan]),
+               'oxygen_level': np.array([18.0, 17.9, 15.9, np.nan, np.nan])}
+    violations = alert_engine.evaluate(columns)
+    found = {(row, ALERT_RULES[rule].alert_type): severity
+             for row, rule, severity in zip(*map(np.ndarray.tolist, violations))}
+    assert found == {(2, 'temperature'): 3, (3, 'temperature'): 4,
+                     (1, 'oxygen'): 3, (2, 'oxygen'): 4}
+
+
+def test_worst_per_group_prefers_severity_then_recency():
+    columns = {'co2_level': np.array([1500.0, 2500.0, 1200.0, 1100.0, 1300.0])}
+    groups = np.array([0, 0, 0, 1, 1])
+    timestamps = np.array([1, 2, 3, 1, 2])
+    worst = alert_engine.worst_per_group(alert_engine.evaluate(columns), groups, timestamps)
+    assert sorted(worst.rows.tolist()) == [1, 4]
+
+
+def test_incident_closes_only_after_clear_margin_and_cooldown():
+    co2 = next(rule for rule in ALERT_RULES if rule.alert_type == 'co2')
+    tracker = alert_engine.IncidentTracker(cooldown_seconds=300)
+    start = datetime(2025, 1, 1)
+    key = ('bunker-01', 'co2')
+
+    assert not tracker.settle(key, co2, 500.0, start)  # nothing open yet
+    tracker.breach(key)
+    assert not tracker.settle(key, co2, 990.0, start)  # inside the hysteresis band
+    assert not tracker.settle(key, co2, 900.0, start + timedelta(minutes=1))
+    assert not tracker.settle(key, co2, 980.0, start + timedelta(minutes=7))  # back in the band: restart
+    assert not tracker.settle(key, co2, 900.0, start + timedelta(minutes=8))
+    assert tracker.settle(key, co2, 900.0, start + timedelta(minutes=13))
+    assert not tracker.is_open(key)
+
+
+def test_excess_ranks_peaks_in_either_direction():
+    temperature = ALERT_RULES[0]
+    assert temperature.excess(22.0) == 0.0
+    assert temperature.excess(8.0) > temperature.excess(33.0) > 0
+    assert temperature.excess(None) < 0
+    assert temperature.clears(28.5) and not temperature.clears(29.5)
+
+
+def test_rule_table_applies_bunker_overrides_in_one_pass():
+    spec = json.load(open(alert_engine.DEFAULT_RULES_PATH, encoding='utf-8'))
+    spec['bunkers'] = {
+        'bunker-02': {'temperature': {'alert': {'high': 25}}, 'radiation_level': {'alert': None}},
+        'bunker-03': {'humidity': {'health': [{'low': 20, 'high': 80, 'penalty': 30}]}}
+    }
+    table = alert_engine.compile_rules(spec)
+    assert table.rules == ALERT_RULES
+
+    bunkers = ['bunker-01', 'bunker-02', 'bunker-02', 'bunker-03']
+    columns = {'temperature': [27, 27, 20, 27], 'radiation_level': [0.5, 6.0, 0.5, 0.5]}
+    violations = table.evaluate(columns, bunkers)
+    assert list(zip(violations.rows.tolist(), violations.rules.tolist())) == [(1, 0)]
+    assert table.rules_for('bunker-02')[0].high == 25
+    assert table.health_for('bunker-03')['humidity'] == ((20, 80, 30),)
+    assert table.health_for('bunker-01') == table.health
+
+    # Without bunker ids every reading is scored against the defaults
+    defaults = table.evaluate(columns)
+    assert sorted(zip(defaults.rows.tolist(), defaults.rules.tolist())) == [(1, 3)]
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        alert_engine.compile_rules({'metrics': {'co2_level': {'alert': {'type': 'co2', 'low': 900, 'high': 800}}}})
+    with pytest.raises(ValueError):
+        alert_engine.compile_rules({'metrics': {'co2_level': {'alert': {'type': 'co2', 'high': 800}}},
+                                    'bunkers': {'b1': {'oxygen': {'alert': {'low': 1}}}}})
+    # Misspelled metrics would never fire; quoted numbers would compare as strings
+    with pytest.raises(ValueError, match='unknown metrics'):
+        alert_engine.compile_rules({'metrics': {'oxgen_level': {'alert': {'type': 'oxygen', 'low': 18}}}})
+    for bad in ({'alert': {'type': 'co2', 'high': '900'}},
+                {'alert': {'type': 'co2', 'high': 900, 'clear_margin': None}},
+                {'alert': {'type': 'co2', 'high': True}},
+                {'health': [{'high': 1000, 'penalty': '10'}]},
+                {'health': [{'high': 1000}]}):
+        with pytest.raises(ValueError, match='must be a number'):
+            alert_engine.compile_rules({'metrics': {'co2_level': bad}})
+    with pytest.raises(ValueError, match='must be a number'):
+        alert_engine.compile_rules({'metrics': {'co2_level': {'alert': {'type': 'co2', 'high': 800}}},
+                                    'bunkers': {'b1': {'co2_level': {'alert': {'high': '900'}}}}})
+
+
+def test_rule_book_hot_reloads_and_keeps_last_good_table(tmp_path):
+    path = tmp_path / 'rules.json'
+    spec = {'metrics': {'co2_level': {'alert': {'type': 'co2', 'high': 1000}}}}
+    path.write_text(json.dumps(spec))
+    book = alert_engine.RuleBook(str(path), check_seconds=0)
+    reloaded = []
+    book.on_reload(reloaded.append)
+    assert book.current().rules[0].high == 1000
+
+    spec['metrics']['co2_level']['alert']['high'] = 1200
+    path.write_text(json.dumps(spec) + ' ')
+    assert book.current().rules[0].high == 1200
+    assert book.current().version == 2 and len(reloaded) == 1
+
+    path.write_text('{"metrics": {')
+    assert book.current().rules[0].high == 1200
+    assert book.last_error
+
+    path.write_text(json.dumps({'metrics': {'co2_levl': {'alert': {'type': 'co2', 'high': 900}}}}))
+    assert book.current().rules[0].high == 1200 and book.current().rules[0].metric == 'co2_level'
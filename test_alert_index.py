@@ -0,0 +1,41 @@
+import os
+
+from alert_index import ActiveAlertIndex
+
+
+def alert(alert_id, severity, created_at, bunker_id='bunker-01'):
+    return {'id': alert_id, 'bunker_id': bunker_id, 'severity': severity, 'created_at': created_at}
+
+
+def test_loads_once_then_writes_through_in_order():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [alert(1, 'low', '2025-01-01T00:00:00'), alert(2, 'critical', '2025-01-01T00:01:00')]
+
+    index = ActiveAlertIndex()
+    assert [item['id'] for item in index.get('bunker-01', loader)] == [2, 1]
+
+    index.upsert(alert(3, 'critical', '2025-01-01T00:05:00'))
+    index.upsert(alert(1, 'high', '2025-01-01T00:00:00'))  # escalated in place
+    index.discard('bunker-01', 2)
+    assert [item['id'] for item in index.get('bunker-01', loader)] == [3, 1]
+    assert len(loads) == 1
+
+
+def test_shared_versions_invalidate_other_workers():
+    name = f'lataupe_test_alerts_{os.getpid()}'
+    rows = [alert(1, 'low', '2025-01-01T00:00:00')]
+    reader, writer = ActiveAlertIndex(name=name), ActiveAlertIndex(name=name)
+    try:
+        assert reader.count('bunker-01', lambda: list(rows)) == 1
+
+        rows.append(alert(2, 'medium', '2025-01-01T00:01:00'))
+        writer.upsert(rows[-1])
+        assert [item['id'] for item in reader.get('bunker-01', lambda: list(rows))] == [2, 1]
+        assert reader.count('bunker-02', lambda: []) == 0
+    finally:
+        writer.versions.close()
+        reader.versions._shm.unlink()
+        reader.versions.close()
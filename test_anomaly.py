@@ -0,0 +1,41 @@
+import random
+
+from anomaly import AnomalyDetector
+
+
+def test_spike_is_flagged_after_warmup_only():
+    detector = AnomalyDetector(warmup=30)
+    assert detector.update(('bunker-01', 'co2_level'), 5000.0) is None  # first value: no history
+    rng = random.Random(5)
+    flagged = [detector.update(('bunker-01', 'co2_level'), 450 + rng.gauss(0, 10)) for _ in range(500)]
+    assert sum(score is not None for score in flagged) <= 2
+
+    assert detector.update(('bunker-01', 'co2_level'), 900.0) > 4
+    # The spike was clipped, so normal readings are still normal afterwards
+    assert detector.update(('bunker-01', 'co2_level'), 452.0) is None
+
+
+def test_series_are_independent_and_bounded():
+    detector = AnomalyDetector(warmup=0, max_series=2)
+    for value in (20.0, 20.1, 19.9, 20.0):
+        detector.update('a', value)
+    detector.update('b', 1000.0)
+    detector.update('c', 1.0)
+    assert len(detector) == 2
+    assert detector.update('a', None) is None
+
+
+def test_score_many_learns_only_on_commit():
+    detector = AnomalyDetector(warmup=0)
+    readings = [('a', 20.0), ('a', 20.2), ('a', None), ('a', 19.8)]
+    first, staged = detector.score_many(readings)
+    assert len(detector) == 0 and len(first) == 4 and first[2] is None
+
+    # A retried batch scores the same, as nothing was learned in between
+    assert detector.score_many(readings)[0] == first
+    detector.commit(staged)
+    assert len(detector) == 1
+    assert detector._series['a'].count == 3
+
+    live = [detector.update('b', value) for value in (20.0, 20.2, 19.8)]
+    assert detector.score_many([('c', 20.0), ('c', 20.2), ('c', 19.8)])[0] == live
@@ -0,0 +1,66 @@
+import os
+
+from auth_cache import PrincipalCache, TokenCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_cache_honours_exp_and_bounds():
+    clock = Clock()
+    cache = TokenCache(max_entries=2, clock=clock)
+    cache.put('token-a', {'user_id': 1, 'exp': 1010})
+    cache.put('token-b', {'user_id': 2, 'exp': 2000})
+    cache.put('token-c', {'user_id': 3})  # no exp: never cached
+    assert cache.get('token-a') == {'user_id': 1, 'exp': 1010}
+    assert cache.get('token-c') is None
+
+    cache.put('token-d', {'user_id': 4, 'exp': 2000})  # evicts the least recently used
+    assert cache.get('token-b') is None and len(cache) == 2
+
+    clock.now = 1010
+    assert cache.get('token-a') is None
+    assert cache.get('token-d')['user_id'] == 4
+
+
+def test_principal_cache_ttl_and_invalidation():
+    clock = Clock()
+    cache = PrincipalCache(ttl_seconds=30, clock=clock)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return ('alice', 'admin')
+
+    assert cache.get(1, loader) == ('alice', 'admin')
+    assert cache.get(1, loader) == ('alice', 'admin')
+    assert len(loads) == 1
+
+    cache.invalidate(1)
+    cache.get(1, loader)
+    clock.now += 30
+    cache.get(1, loader)
+    assert len(loads) == 3
+
+    assert cache.get(2, lambda: None) is None and len(cache) == 1
+
+
+def test_shared_versions_invalidate_other_workers():
+    name = f'lataupe_test_principals_{os.getpid()}'
+    reader, writer = PrincipalCache(name=name), PrincipalCache(name=name)
+    try:
+        role = ['admin']
+        assert reader.get(7, lambda: role[0]) == 'admin'
+        role[0] = 'resident'
+        assert reader.get(7, lambda: role[0]) == 'admin'
+        writer.invalidate(7)
+        assert reader.get(7, lambda: role[0]) == 'resident'
+    finally:
+        writer.versions.close()
+        reader.versions._shm.unlink()
+        reader.versions.close()
@@ -0,0 +1,44 @@
+import random
+
+from cold_storage import decode_rows, decode_series, encode_rows, encode_series
+
+
+def make_series(count, seed=3):
+    rng = random.Random(seed)
+    timestamps, values = [1735689600000], [20.0]
+    for _ in range(count - 1):
+        # Once a minute with occasional jitter, slowly drifting values
+        timestamps.append(timestamps[-1] + (60000 if rng.random() < 0.95 else rng.choice([59999, 61000, 3600000])))
+        values.append(values[-1] + rng.gauss(0, 0.05))
+    return timestamps, values
+
+
+def test_lossless_round_trip():
+    timestamps, values = make_series(1440)
+    values[10] = values[9]
+    values[20] = -1e300
+    assert decode_series(encode_series(timestamps, values)) == (timestamps, values)
+
+
+def test_quantized_round_trip_is_compact():
+    timestamps, values = make_series(1440)
+    block = encode_series(timestamps, values, decimals=2)
+    decoded_timestamps, decoded_values = decode_series(block)
+    assert decoded_timestamps == timestamps
+    assert decoded_values == [round(value, 2) for value in values]
+    # 16 bytes per (timestamp, float64) pair uncompressed
+    assert len(block) * 8 < len(timestamps) * 16
+
+
+def test_short_series():
+    assert decode_series(encode_series([], [])) == ([], [])
+    assert decode_series(encode_series([5], [1.5], decimals=1)) == ([5], [1.5])
+
+
+def test_rows_keep_readings_that_share_a_timestamp():
+    timestamps = [1000, 1000, 61000, 121000]
+    columns = {'temperature': [20.5, None, 20.75, 21.0], 'humidity': [None, 45.0, None, None],
+               'pressure': [None] * 4}
+    block = encode_rows(timestamps, columns, {'temperature': 2})
+    assert decode_rows(block) == (timestamps, columns)
+    assert decode_rows(encode_rows([], {'temperature': []})) == ([], {'temperature': []})
@@ -0,0 +1,159 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from src.models.user import db, User
+from src.models.bunker import Alert, EnvironmentalsData
+from src.routes import dashboard
+
+HOUR = 3600
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SECRET_KEY='test', TESTING=True)
+    db.init_app(app)
+    app.register_blueprint(dashboard.dashboard_bp)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    dashboard.latest_readings.clear()
+    dashboard.active_alerts.invalidate()
+    with dashboard._health_cache_lock:
+        dashboard._health_cache.clear()
+
+
+def test_vectorized_health_scores_match_the_single_reading_score():
+    rng = random.Random(7)
+    penalties = dashboard.health_penalties()
+    readings = [
+        {metric: rng.choice([None, 0.0, rng.uniform(-20, 60), rng.uniform(0, 6000)]) for metric in penalties}
+        for _ in range(500)
+    ]
+    columns = {
+        metric: np.array([np.nan if reading[metric] is None else reading[metric] for reading in readings])
+        for metric in penalties
+    }
+    expected = [dashboard.calculate_health_score(SimpleNamespace(**reading)) for reading in readings]
+    assert dashboard.calculate_health_scores(columns, penalties).tolist() == expected
+    assert min(expected) < 100
+
+
+def test_late_reading_invalidates_only_its_buckets(app):
+    start = datetime(2025, 6, 1, 8)
+    for hour in range(3):
+        for minute in (10, 40):
+            db.session.add(EnvironmentalsData(bunker_id='bunker-01', timestamp=start + timedelta(hours=hour, minutes=minute),
+                                              temperature=21.0, oxygen_level=20.9))
+    db.session.commit()
+
+    until = start + timedelta(hours=3)
+    timeline = dashboard.health_timeline('bunker-01', start, until, HOUR)
+    assert [bucket['count'] for bucket in timeline] == [2, 2, 2]
+    cached = {key[2] for key in dashboard._health_cache if key[:2] == ('bunker-01', HOUR)}
+    assert len(cached) == 3
+
+    # A late, unhealthy reading for the middle hour: only that bucket is recomputed
+    middle = int((start + timedelta(hours=1) - datetime(1970, 1, 1)).total_seconds())
+    db.session.add(EnvironmentalsData(bunker_id='bunker-01', timestamp=start + timedelta(hours=1, minutes=5),
+                                      temperature=45.0, oxygen_level=15.0))
+    db.session.flush()
+    assert ('bunker-01', HOUR, middle) in dashboard._health_cache
+    db.session.commit()
+    assert {key[2] for key in dashboard._health_cache if key[:2] == ('bunker-01', HOUR)} == cached - {middle}
+
+    timeline = dashboard.health_timeline('bunker-01', start, until, HOUR)
+    assert [bucket['count'] for bucket in timeline] == [2, 3, 2]
+    assert timeline[1]['min_score'] < 100 and timeline[0]['min_score'] == timeline[2]['min_score'] == 100
+
+
+def test_alert_index_follows_commits_not_flushes(app):
+    def alert(message):
+        return Alert(alert_type='co2', severity='high', message=message, bunker_id='bunker-01')
+
+    assert dashboard.get_active_alerts('bunker-01') == []
+
+    # Rolled back: the index never sees the alert
+    db.session.add(alert('Rolled back'))
+    db.session.flush()
+    db.session.rollback()
+    assert dashboard.get_active_alerts('bunker-01') == []
+
+    db.session.add(alert('Committed'))
+    db.session.flush()
+    assert dashboard.get_active_alerts('bunker-01') == []
+    db.session.commit()
+    assert [item['message'] for item in dashboard.get_active_alerts('bunker-01')] == ['Committed']
+
+
+def test_chart_points_and_raw_rows_are_capped(app, monkeypatch):
+    monkeypatch.setattr(dashboard, 'CHART_MAX_POINTS', 100)
+    monkeypatch.setattr(dashboard, 'CHART_MAX_RAW_ROWS', 50)
+    user = User(username='viewer', email='viewer@bunker.tech', password_hash='x')
+    db.session.add(user)
+    start = datetime.utcnow() - timedelta(minutes=100)
+    db.session.add_all(EnvironmentalsData(bunker_id='bunker-01', timestamp=start + timedelta(minutes=minute),
+                                          temperature=20.0 + minute % 7)
+                       for minute in range(100))
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = user.id
+    # Budget clamped to 100 points: a 2 hour window is served from the minute rollups
+    assert len(client.get('/api/dashboard/environmental-data?hours=2&points=1000000').get_json()) == 100
+
+    # 100 points cannot come from 60 minute buckets: raw readings, newest 50 only
+    data = client.get('/api/dashboard/environmental-data?hours=1&points=1000000').get_json()
+    assert len(data) == 50
+    oldest_kept = (start + timedelta(minutes=50)).isoformat()
+    assert min(item['timestamp'] for item in data) >= oldest_kept
+
+
+def test_bulk_resolve_updates_the_alert_index(app):
+    admin = User(username='admin', email='admin@bunker.tech', password_hash='x', role='admin')
+    db.session.add(admin)
+    for bunker_id, severity in (('bunker-01', 'low'), ('bunker-01', 'low'), ('bunker-01', 'critical'),
+                                ('bunker-02', 'low')):
+        db.session.add(Alert(alert_type='door', severity=severity, message=f'Door {severity}', bunker_id=bunker_id))
+    db.session.commit()
+    assert len(dashboard.get_active_alerts('bunker-01')) == 3
+    assert len(dashboard.get_active_alerts('bunker-02')) == 1
+
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = admin.id
+    assert client.post('/api/dashboard/alerts/resolve', json={}).status_code == 400
+    assert client.post('/api/dashboard/alerts/resolve', json={'ids': 'all'}).status_code == 400
+
+    response = client.post('/api/dashboard/alerts/resolve', json={'bunker_id': 'bunker-01', 'severity': 'low'})
+    assert response.get_json()['resolved'] == 2
+    assert [alert['severity'] for alert in dashboard.get_active_alerts('bunker-01')] == ['critical']
+    assert len(dashboard.get_active_alerts('bunker-02')) == 1
+    assert Alert.query.filter_by(is_resolved=True, resolved_by=admin.id).count() == 2
+
+
+def test_health_timeline_hours_are_bounded(app, monkeypatch):
+    monkeypatch.setattr(dashboard, 'HEALTH_MAX_HOURS', 2)
+    user = User(username='viewer', email='viewer@bunker.tech', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = user.id
+    assert client.get('/api/dashboard/health-timeline?hours=0').status_code == 400
+    assert client.get('/api/dashboard/health-timeline?hours=-5').status_code == 400
+
+    requested = []
+    monkeypatch.setattr(dashboard, 'health_timeline',
+                        lambda bunker_id, since, until, bucket: requested.append(until - since) or [])
+    assert client.get('/api/dashboard/health-timeline?hours=100000000&bucket=300').status_code == 200
+    assert requested == [timedelta(hours=2)]
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from downsample import lttb_indices, lttb_rows
+
+
+def test_keeps_endpoints_and_spikes():
+    x = np.arange(5000)
+    y = np.sin(x / 400.0)
+    y[1234] = 25.0
+    y[4000] = -25.0
+    keep = lttb_indices(x, y, 60)
+    assert len(keep) == 60
+    assert keep[0] == 0 and keep[-1] == 4999
+    assert 1234 in keep and 4000 in keep
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_spike_in_any_metric_survives_and_missing_values_are_tolerated():
+    x = np.arange(1000)
+    y = np.column_stack([np.full(1000, 21.0), np.full(1000, np.nan)])
+    y[500, 1] = 9.0
+    assert 500 in lttb_indices(x, y, 10)
+
+
+def test_rows_keep_their_order():
+    start = datetime(2025, 6, 1)
+    rows = [{'timestamp': (start + timedelta(minutes=i)).isoformat(), 'temperature': float(i % 4)}
+            for i in range(300)][::-1]
+    sampled = lttb_rows(rows, 25, ['temperature'])
+    assert len(sampled) == 25
+    assert sampled == sorted(sampled, key=lambda row: row['timestamp'], reverse=True)
+    assert lttb_rows(rows[:10], 25, ['temperature']) == rows[:10]
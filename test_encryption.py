@@ -0,0 +1,82 @@
+import base64
+
+import pytest
+
+import encryption
+from encryption import EncryptionManager, KeyRing
+from ttl_store import MemoryBackend
+
+
+def test_round_trip_is_compact_and_single_encoded():
+    manager = EncryptionManager('master-secret')
+    token = manager.encrypt_string('sensitive')
+    assert manager.decrypt_string(token) == 'sensitive'
+    # version byte + nonce + 9 bytes + tag, base64url without padding
+    assert len(token) == len(base64.urlsafe_b64encode(bytes(1 + 12 + 9 + 16)).rstrip(b'='))
+    assert manager.encrypt_string('sensitive') != token
+    assert manager.decrypt_string(token[:-2] + 'AA') is None
+
+
+def test_keys_are_derived_once_per_process():
+    EncryptionManager('derive-once').encrypt_string('w')
+    derived = len(encryption._derived_keys)
+    EncryptionManager('derive-once').encrypt_string('x')
+    EncryptionManager('derive-once').encrypt_string('y')
+    assert len(encryption._derived_keys) == derived
+
+
+def test_rotation_keeps_old_versions_readable():
+    old = EncryptionManager(key_ring=KeyRing({1: 'old-secret'}))
+    token = old.encrypt_string('archived')
+    rotated = EncryptionManager(key_ring=KeyRing({1: 'old-secret', 2: 'new-secret'}, current=2))
+    assert rotated.decrypt_string(token) == 'archived'
+    assert encryption._b64decode(rotated.encrypt_string('fresh'))[0] == 2
+    assert old.decrypt_string(rotated.encrypt_string('fresh')) is None
+    with pytest.raises(ValueError):
+        KeyRing({64: 'too-high'})
+
+
+def test_legacy_fernet_tokens_still_decrypt():
+    manager = EncryptionManager('legacy-secret')
+    legacy = base64.urlsafe_b64encode(manager.fernet.encrypt('before'.encode('utf-8'))).decode('utf-8')
+    assert manager.decrypt_string(legacy) == 'before'
+
+    # Written before a rotation: the retired secret still opens it
+    rotated = EncryptionManager(key_ring=KeyRing({1: 'legacy-secret', 2: 'new-secret'}, current=2))
+    assert rotated.decrypt_string(legacy) == 'before'
+
+
+def test_batch_apis_and_response_decorator(monkeypatch):
+    manager = EncryptionManager('batch-secret')
+    tokens = manager.encrypt_many(['a', '', 'b'])
+    assert tokens[1] is None
+    assert manager.decrypt_many(tokens) == ['a', None, 'b']
+
+    monkeypatch.setenv('MASTER_KEY', 'batch-secret')
+
+    @encryption.encrypt_response_data(['ssn'])
+    def view():
+        return [{'ssn': '123', 'name': 'a'}, {'name': 'b'}, {'ssn': 456}]
+
+    rows = view()
+    assert rows[1] == {'name': 'b'}
+    assert manager.decrypt_many([rows[0]['ssn'], rows[2]['ssn']]) == ['123', '456']
+
+
+def test_secure_storage_is_bounded_and_bound_to_keys():
+    storage = encryption.SecureStorage(EncryptionManager('storage-secret'), MemoryBackend(max_bytes=200))
+    storage.store_sensitive_data('user:1', {'card': '4111'})
+    assert storage.retrieve_sensitive_data('user:1') == {'card': '4111'}
+
+    # A ciphertext copied under another key does not decrypt
+    storage.storage.put('user:2', storage.storage.get('user:1'), 1e12)
+    assert storage.retrieve_sensitive_data('user:2') is None
+
+    for index in range(20):
+        storage.store_sensitive_data(f'bulk:{index}', {'index': index})
+    assert storage.storage.nbytes <= 200
+    assert storage.retrieve_sensitive_data('bulk:19') == {'index': 19}
+
+    storage.store_sensitive_data('gone', {'a': 1}, ttl=-1)
+    assert storage.retrieve_sensitive_data('gone') is None
+    assert storage.cleanup_expired_data() >= 0
@@ -0,0 +1,61 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from escalation import EscalationScheduler
+
+START = datetime(2025, 1, 1)
+
+
+def test_due_alerts_escalate_level_by_level_and_catch_up():
+    scheduler = EscalationScheduler(lambda batch: None, policy={'critical': 300, 'low': 3600})
+    assert scheduler.load([(1, 'critical', 1, START), (2, 'low', 1, START), (3, 'unknown', 1, START)]) == 2
+
+    assert scheduler.run_due(START + timedelta(minutes=4)) == []
+    fired = scheduler.run_due(START + timedelta(minutes=11))
+    assert [(item.alert_id, item.level) for item in fired] == [(1, 2), (1, 3)]
+    assert fired[1].escalated_at == START + timedelta(minutes=10)
+    assert scheduler.next_deadline() == START + timedelta(minutes=15)
+
+
+def test_cancelled_and_maxed_alerts_stop_escalating():
+    scheduler = EscalationScheduler(lambda batch: None, policy={'critical': 60}, max_level=3)
+    scheduler.schedule(1, 'critical', 1, START)
+    scheduler.schedule(2, 'critical', 1, START)
+    scheduler.cancel(2)
+    fired = scheduler.run_due(START + timedelta(hours=1))
+    assert [(item.alert_id, item.level) for item in fired] == [(1, 2), (1, 3)]
+    assert len(scheduler) == 0 and scheduler.next_deadline() is None
+
+
+def test_flush_batches_and_keeps_failed_changes():
+    batches, fail = [], [True]
+
+    def persist(batch):
+        if fail[0]:
+            raise RuntimeError('database unavailable')
+        batches.append([item.alert_id for item in batch])
+
+    scheduler = EscalationScheduler(persist, policy={'high': 60}, batch_size=2)
+    scheduler.load((alert_id, 'high', 1, START) for alert_id in range(5))
+    scheduler.run_due(START + timedelta(seconds=61))
+    with pytest.raises(RuntimeError):
+        scheduler.flush()
+    fail[0] = False
+    assert scheduler.flush() == 5
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+def test_background_thread_fires_at_deadline():
+    persisted = []
+    scheduler = EscalationScheduler(persisted.extend, policy={'critical': 0.2}, flush_seconds=0.05)
+    scheduler.start()
+    try:
+        scheduler.schedule(7, 'critical', 1, datetime.utcnow())
+        deadline = time.monotonic() + 3
+        while not persisted and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        scheduler.stop()
+    assert persisted and persisted[0].alert_id == 7 and persisted[0].level == 2
@@ -0,0 +1,38 @@
+from event_stream import EventBroker, format_sse
+
+
+def test_publish_fans_out_per_topic():
+    broker = EventBroker(queue_size=4)
+    first = broker.subscribe('bunker-01')
+    second = broker.subscribe('bunker-01')
+    other = broker.subscribe('bunker-02')
+
+    assert broker.publish('bunker-01', 'reading', {'temperature': 21.0}) == 2
+    assert first.get(timeout=0)['data'] == {'temperature': 21.0}
+    assert second.get(timeout=0)['event'] == 'reading'
+    assert other.get(timeout=0) is None
+
+    first.close()
+    assert broker.subscriber_count('bunker-01') == 1
+
+
+def test_slow_subscriber_keeps_newest_events():
+    broker = EventBroker(queue_size=2)
+    subscription = broker.subscribe('bunker-01')
+    for i in range(5):
+        broker.publish('bunker-01', 'reading', {'n': i})
+
+    assert [subscription.get(timeout=0)['data']['n'] for _ in range(2)] == [3, 4]
+    assert subscription.dropped == 3
+
+
+def test_capacity_and_heartbeat():
+    broker = EventBroker(max_subscribers=1)
+    subscription = broker.subscribe('bunker-01')
+    assert broker.subscribe('bunker-02') is None
+
+    stream = broker.stream(subscription, heartbeat=0.01)
+    assert next(stream) == ': heartbeat\n\n'
+    stream.close()
+    assert broker.subscriber_count() == 0
+    assert format_sse({'a': 1}, 'alert', 7) == 'id: 7\nevent: alert\ndata: {"a": 1}\n\n'
@@ -0,0 +1,43 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from export import FORMATS, encode_chunks
+
+COLUMNS = ('id', 'bunker_id', 'timestamp', 'temperature')
+CHUNKS = [
+    [(1, 'bunker-01', datetime(2025, 6, 1, 10, 0), 21.5), (2, 'bunker-01', datetime(2025, 6, 1, 10, 1), None)],
+    [(3, 'bunker-01', None, 22.0)]
+]
+
+
+def test_ndjson_one_object_per_row_and_one_string_per_chunk():
+    body = list(encode_chunks(iter(CHUNKS), COLUMNS, 'ndjson'))
+    assert len(body) == 2
+    rows = [json.loads(line) for line in ''.join(body).splitlines()]
+    assert rows[0] == {'id': 1, 'bunker_id': 'bunker-01', 'timestamp': '2025-06-01T10:00:00', 'temperature': 21.5}
+    assert rows[1]['temperature'] is None and rows[2]['timestamp'] is None
+
+
+def test_csv_header_then_rows():
+    body = list(encode_chunks(iter(CHUNKS), COLUMNS, 'csv'))
+    assert len(body) == 3
+    lines = list(csv.reader(io.StringIO(''.join(body))))
+    assert lines[0] == list(COLUMNS)
+    assert lines[1] == ['1', 'bunker-01', '2025-06-01T10:00:00', '21.5']
+    assert lines[2][3] == '' and lines[3][2] == ''
+
+
+def test_chunks_are_consumed_lazily_and_formats_checked():
+    def chunks():
+        yield CHUNKS[0]
+        raise AssertionError('second chunk fetched before the first was sent')
+
+    body = encode_chunks(chunks(), COLUMNS, 'ndjson')
+    assert next(body).count('\n') == 2
+    assert set(FORMATS) == {'ndjson', 'csv'}
+    with pytest.raises(ValueError):
+        list(encode_chunks([], COLUMNS, 'xml'))
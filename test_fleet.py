@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from fleet import status_cards, worst_severity
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+def reading(minutes_ago):
+    return {'timestamp': (NOW - timedelta(minutes=minutes_ago)).isoformat(), 'temperature': 21.0}
+
+
+def test_worst_severity_ranks_known_levels_first():
+    assert worst_severity({'low': 3, 'critical': 1, 'high': 2}) == 'critical'
+    assert worst_severity({'custom': 1, 'medium': 1}) == 'medium'
+    assert worst_severity({}) is None
+
+
+def test_status_cards_merge_readings_and_alert_counts():
+    latest = {'a': reading(1), 'b': reading(2), 'c': reading(180), 'd': reading(3)}
+    alerts = {'b': {'critical': 1, 'low': 2}, 'd': {'medium': 1}, 'e': {'high': 1}}
+    cards = status_cards(latest, alerts, stale_before=NOW - timedelta(minutes=15))
+
+    assert [card['bunker_id'] for card in cards] == ['a', 'b', 'c', 'd', 'e']
+    assert [card['status'] for card in cards] == ['normal', 'critical', 'offline', 'warning', 'offline']
+    assert cards[1]['active_alerts'] == 3 and cards[1]['alerts_by_severity'] == {'critical': 1, 'low': 2}
+    assert cards[0]['latest'] is latest['a'] and cards[4]['latest'] is None
+    assert cards[0]['active_alerts'] == 0
+
+
+def test_reading_without_timestamp_counts_as_offline():
+    cards = status_cards({'a': {'timestamp': None}}, {}, stale_before=NOW)
+    assert cards[0]['status'] == 'offline'
@@ -0,0 +1,7 @@
+import os
+
+# Config reads DATABASE_URL at import; keep the suite off instance/lataupe_bunker.db
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+# The integrated app keeps its suite next to the code; import it so pytest collects it
+from lataupe_integrated_app import IntegratedTestSuite  # noqa: E402,F401
@@ -0,0 +1,83 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, declarative_base
+
+from src.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, keyset_page, page_size
+
+Base = declarative_base()
+
+
+class Reading(Base):
+    __tablename__ = 'readings'
+    id = sa.Column(sa.Integer, primary_key=True)
+    timestamp = sa.Column(sa.DateTime, nullable=False)
+
+
+@pytest.fixture
+def session():
+    engine = sa.create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_cursor_round_trip():
+    moment = datetime(2025, 6, 1, 10, 30, 15, 123456)
+    cursor = encode_cursor(moment, 42)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (moment, 42)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64 !',
+    base64.urlsafe_b64encode(b'\xff\xfe').decode('ascii'),
+    base64.urlsafe_b64encode(b'{"a": 1}').decode('ascii'),
+    base64.urlsafe_b64encode(b'["2025-06-01T10:00:00"]').decode('ascii'),
+    base64.urlsafe_b64encode(b'["yesterday", 5]').decode('ascii'),
+    base64.urlsafe_b64encode(b'["2025-06-01T10:00:00", "five"]').decode('ascii'),
+    encode_cursor(datetime(2025, 6, 1), 7)[:-3],
+])
+def test_invalid_or_tampered_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_page_size_is_clamped():
+    assert page_size(None, 100) == 100
+    assert page_size(0, 50) == 50
+    assert page_size(-5, 50) == 1
+    assert page_size(10 ** 6, 50) == MAX_PAGE_SIZE
+
+
+def test_pages_are_newest_first_and_split_timestamp_ties(session):
+    start = datetime(2025, 6, 1, 10)
+    # Three readings share each timestamp, so page breaks fall inside ties
+    session.add_all(Reading(timestamp=start + timedelta(minutes=index // 3)) for index in range(10))
+    session.commit()
+    expected = [(row.timestamp, row.id) for row in session.query(Reading)]
+    expected.sort(reverse=True)
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(session.query(Reading), Reading, 4, cursor)
+        seen.append([(row.timestamp, row.id) for row in rows])
+        if cursor is None:
+            break
+
+    assert [len(page) for page in seen] == [4, 4, 2]
+    assert [item for page in seen for item in page] == expected
+
+
+def test_exact_multiple_has_no_trailing_empty_page(session):
+    start = datetime(2025, 6, 1, 10)
+    session.add_all(Reading(timestamp=start + timedelta(minutes=index)) for index in range(4))
+    session.commit()
+
+    rows, cursor = keyset_page(session.query(Reading), Reading, 2)
+    rows, cursor = keyset_page(session.query(Reading), Reading, 2, cursor)
+    assert len(rows) == 2 and cursor is None
+    assert keyset_page(session.query(Reading), Reading, 10) == (session.query(Reading).order_by(
+        Reading.timestamp.desc(), Reading.id.desc()).all(), None)
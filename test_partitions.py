@@ -0,0 +1,77 @@
+import os
+from datetime import date, datetime
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, create_engine
+
+import partitions
+from partitions import SQLitePartitionManager
+
+metadata = MetaData()
+readings = Table('environmental_data', metadata,
+                 Column('id', Integer, primary_key=True),
+                 Column('bunker_id', String(50), nullable=False),
+                 Column('timestamp', DateTime, nullable=False),
+                 Column('temperature', Float))
+
+
+def make_manager(tmp_path, **options):
+    engine = create_engine(f"sqlite:///{tmp_path / 'main.db'}")
+    return SQLitePartitionManager(engine, readings, str(tmp_path / 'partitions'), **options)
+
+
+def test_month_helpers():
+    assert partitions.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert partitions.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partitions.months_between(datetime(2025, 1, 31), datetime(2025, 3, 1)) == [
+        date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)]
+    assert partitions.partition_name('environmental_data', date(2025, 3, 1)) == 'environmental_data_y2025m03'
+    assert partitions.parse_month('environmental_data_y2025m03') == date(2025, 3, 1)
+
+
+def test_rows_are_routed_and_ranges_pruned(tmp_path):
+    manager = make_manager(tmp_path, months_ahead=1)
+    assert len(manager.ensure(date(2025, 3, 15))) == 2
+    assert manager.ensure(date(2025, 3, 15)) == []
+
+    rows = [{'bunker_id': 'bunker-01', 'timestamp': datetime(2025, month, 10), 'temperature': 20.0 + month}
+            for month in (1, 2, 3)]
+    with manager.engine.begin() as connection:
+        assert manager.insert(connection, rows) == 3
+    assert manager.months() == [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1), date(2025, 4, 1)]
+
+    with manager.engine.connect() as connection:
+        statement = manager.select(connection, datetime(2025, 2, 1), datetime(2025, 3, 31),
+                                   lambda table: table.c.bunker_id == 'bunker-01')
+        sql = str(statement)
+        assert 'p_y2025m02' in sql and 'p_y2025m03' in sql and 'p_y2025m01' not in sql
+        assert sorted(row.temperature for row in connection.execute(statement)) == [22.0, 23.0]
+
+
+def test_expired_months_are_archived(tmp_path):
+    manager = make_manager(tmp_path, retention_months=1, archive_directory=str(tmp_path / 'archive'))
+    with manager.engine.begin() as connection:
+        manager.insert(connection, [{'bunker_id': 'bunker-01', 'timestamp': datetime(2025, month, 1)}
+                                    for month in (1, 2, 3, 4)])
+
+    archived = manager.expire(date(2025, 4, 20))
+    assert [os.path.basename(path) for path in archived] == [
+        'environmental_data_y2025m01.db', 'environmental_data_y2025m02.db']
+    assert manager.months() == [date(2025, 3, 1), date(2025, 4, 1)]
+    with manager.engine.connect() as connection:
+        assert manager.select(connection, datetime(2025, 1, 1), datetime(2025, 2, 28)) is None
+
+
+def test_cli_is_a_no_op_on_sqlite(tmp_path, monkeypatch, capsys):
+    database = tmp_path / 'main.db'
+    readings.create(create_engine(f'sqlite:///{database}'))
+    monkeypatch.setattr('sys.argv', ['partitions.py', '--database-url', f'sqlite:///{database}'])
+    partitions.main()
+    assert 'Nothing to do' in capsys.readouterr().out
+    assert sorted(os.listdir(tmp_path)) == ['main.db']
+
+
+def test_default_database_url_matches_the_app(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    assert partitions.default_database_url() == 'sqlite:///' + os.path.join(partitions.INSTANCE_DIR, 'lataupe_bunker.db')
+    monkeypatch.setenv('DATABASE_URL', 'postgresql://user:secret@db/lataupe')
+    assert partitions.default_database_url() == 'postgresql://user:secret@db/lataupe'
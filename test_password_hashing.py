@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import password_hashing
+from password_hashing import HasherBusy, PasswordHasher, needs_rehash, parse_method
+
+FAST = 'pbkdf2:sha256:600000'
+
+
+def test_parse_and_needs_rehash():
+    assert parse_method('scrypt:32768:8:1$salt$hash') == ('scrypt', 32768)
+    assert parse_method('pbkdf2:sha256:600000$salt$hash') == ('pbkdf2:sha256', 600000)
+    assert needs_rehash('pbkdf2:sha256$salt$hash', FAST)          # legacy, no cost recorded
+    assert needs_rehash('pbkdf2:sha256:260000$salt$hash', FAST)
+    assert needs_rehash('scrypt:32768:8:1$salt$hash', FAST)       # other algorithm
+    assert not needs_rehash('pbkdf2:sha256:700000$salt$hash', FAST)
+
+
+def test_calibration_respects_floor_and_ceiling():
+    floor, ceiling = password_hashing.COST_LIMITS['pbkdf2:sha256']
+    assert password_hashing.calibrate('pbkdf2:sha256', 0.0) == f'pbkdf2:sha256:{floor}'
+    assert password_hashing.calibrate('pbkdf2:sha256', 1e6) == f'pbkdf2:sha256:{ceiling}'
+    with pytest.raises(ValueError):
+        PasswordHasher(algorithm='md5')
+
+
+def test_verify_upgrades_weaker_hashes_in_pool():
+    hasher = PasswordHasher(workers=1, method=FAST)
+    try:
+        stored = hasher.hash('hunter2')
+        assert stored.startswith(FAST + '$')
+        assert hasher.verify(stored, 'hunter2') == (True, None)
+        assert hasher.verify(stored, 'wrong') == (False, None)
+
+        legacy = generate_password_hash('hunter2', method='pbkdf2:sha256:1000')
+        valid, upgraded = hasher.verify(legacy, 'hunter2')
+        assert valid and upgraded.startswith(FAST + '$')
+        assert hasher.verify(upgraded, 'hunter2') == (True, None)
+    finally:
+        hasher.shutdown()
+
+
+def test_full_queue_rejects_instead_of_waiting():
+    hasher = PasswordHasher(workers=0, max_pending=1, method=FAST)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher.run, args=(slow,))
+    worker.start()
+    started.wait(5)
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.hash('hunter2')
+    finally:
+        release.set()
+        worker.join()
+    assert hasher.verify(hasher.hash('hunter2'), 'hunter2')[0]
+
+
+def test_timed_out_job_answers_busy_and_keeps_its_slot():
+    hasher = PasswordHasher(workers=1, max_pending=1, method=FAST, timeout=0.2)
+    try:
+        hasher.run(time.sleep, 0)  # start the worker process
+        with pytest.raises(HasherBusy):
+            hasher.run(time.sleep, 1.5)
+        # The abandoned job still runs in the pool and holds the only slot
+        with pytest.raises(HasherBusy):
+            hasher.run(time.sleep, 0)
+        time.sleep(2)
+        assert hasher.run(abs, -3) == 3
+    finally:
+        hasher.shutdown()
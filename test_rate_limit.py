@@ -0,0 +1,134 @@
+import os
+
+import pytest
+
+from rate_limit import MemoryStore, RateLimiter, SharedStore, parse_rate
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def make_store(request):
+    stores = []
+
+    def make(**options):
+        if request.param == 'memory':
+            store = MemoryStore(**options)
+        else:
+            store = SharedStore(f'lataupe_test_rl_{os.getpid()}_{len(stores)}', **options)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        if isinstance(store, SharedStore):
+            shm = store._shm
+            store.close()
+            if shm is not None:
+                shm.unlink()
+
+
+def test_parse_rate():
+    assert parse_rate('5 per minute') == (5, 60)
+    assert parse_rate('100/hour') == (100, 3600)
+    assert parse_rate('10 per 30 seconds') == (10, 30)
+    with pytest.raises(ValueError):
+        parse_rate('often')
+
+
+def test_sliding_window_without_boundary_burst(make_store):
+    clock = Clock()
+    limiter = RateLimiter(make_store(), clock=clock)
+    decisions = [limiter.hit('ip:1', 5, 60) for _ in range(6)]
+    assert [d.allowed for d in decisions] == [True] * 5 + [False]
+    assert [d.remaining for d in decisions[:5]] == [4, 3, 2, 1, 0]
+    assert decisions[-1].retry_after == pytest.approx(12)
+
+    # A fixed window would reset at the minute boundary; here capacity returns at 5/min
+    clock.now = 1011
+    assert not limiter.allow('ip:1', 5, 60)
+    clock.now = 1012
+    assert limiter.allow('ip:1', 5, 60)
+    assert not limiter.allow('ip:1', 5, 60)
+
+    # Keys are independent, and reset forgets one
+    assert limiter.allow('ip:2', 5, 60)
+    limiter.reset('ip:1')
+    assert limiter.hit('ip:1', 5, 60).remaining == 4
+
+
+def test_idle_keys_are_dropped():
+    clock = Clock()
+    store = MemoryStore(max_keys=50)
+    limiter = RateLimiter(store, clock=clock)
+    for i in range(40):
+        limiter.allow(f'ip:{i}', 10, 60)
+    assert len(store) == 40
+
+    # Every key has gone idle: later writes sweep them without a cleanup pass
+    clock.now = 1100
+    for i in range(20):
+        limiter.allow('busy', 1000, 60)
+    assert len(store) == 1
+
+    for i in range(200):
+        limiter.allow(f'burst:{i}', 10, 60)
+    assert len(store) <= 50
+
+
+def test_long_window_keys_do_not_hold_back_expiry():
+    clock = Clock()
+    store = MemoryStore()
+    limiter = RateLimiter(store, clock=clock)
+    limiter.allow('daily', 1, 86400)
+    for i in range(40):
+        limiter.allow(f'ip:{i}', 10, 60)
+
+    clock.now = 1100
+    limiter.allow('busy', 10, 60)
+    assert len(store) == 2
+
+
+def test_key_flood_cannot_reset_exhausted_limits():
+    clock = Clock()
+    limiter = RateLimiter(MemoryStore(max_keys=50), clock=clock)
+    while limiter.allow('login:victim', 5, 60):
+        pass
+    # Spoofed client addresses: each a new key with most of its allowance left
+    for i in range(500):
+        limiter.allow(f'login:spoofed-{i}', 5, 60)
+    assert not limiter.allow('login:victim', 5, 60)
+
+
+def test_shared_store_lock_dir_and_size_check(tmp_path):
+    name = f'lataupe_test_rl_{os.getpid()}_sized'
+    store = SharedStore(name, slots=64, lock_dir=str(tmp_path))
+    try:
+        assert (tmp_path / f'{name}.lock').exists()
+        with pytest.raises(ValueError):
+            SharedStore(name, slots=4096, lock_dir=str(tmp_path))
+    finally:
+        shm = store._shm
+        store.close()
+        shm.unlink()
+
+
+def test_shared_store_is_shared_between_workers():
+    name = f'lataupe_test_rl_{os.getpid()}_shared'
+    first, second = SharedStore(name, slots=64), SharedStore(name, slots=64)
+    try:
+        clock = Clock()
+        a, b = RateLimiter(first, clock=clock), RateLimiter(second, clock=clock)
+        assert a.allow('login:1', 2, 60) and b.allow('login:1', 2, 60)
+        assert not a.allow('login:1', 2, 60) and not b.allow('login:1', 2, 60)
+    finally:
+        second.close()
+        shm = first._shm
+        first.close()
+        shm.unlink()
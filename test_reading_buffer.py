@@ -0,0 +1,80 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from reading_buffer import LatestReadingBuffer
+
+FIELDS = ('temperature', 'oxygen_level')
+
+def test_latest_and_ring_wraparound():
+    buffer = LatestReadingBuffer(FIELDS, capacity=4, max_bunkers=2)
+    start = datetime(2025, 6, 1)
+    for i in range(10):
+        buffer.push('bunker-01', start + timedelta(minutes=i), {'temperature': 20.0 + i}, i)
+
+    latest = buffer.latest('bunker-01')
+    assert latest['id'] == 9
+    assert latest['temperature'] == 29.0
+    assert latest['oxygen_level'] is None
+    assert latest['timestamp'] == start + timedelta(minutes=9)
+    assert [r['id'] for r in buffer.recent('bunker-01')] == [9, 8, 7, 6]
+    assert buffer.latest('bunker-02') is None
+
+def test_full_directory_drops_new_bunkers():
+    buffer = LatestReadingBuffer(FIELDS, capacity=2, max_bunkers=1)
+    buffer.push('bunker-01', datetime(2025, 6, 1), {'temperature': 21.0})
+    buffer.push('bunker-02', datetime(2025, 6, 1), {'temperature': 22.0})
+    assert buffer.bunker_ids() == ['bunker-01']
+    assert buffer.latest('bunker-02') is None
+
+def test_shared_segment_is_visible_to_other_instances():
+    name = f'lataupe-test-{uuid.uuid4().hex[:8]}'
+    writer = LatestReadingBuffer(FIELDS, capacity=4, max_bunkers=4, name=name)
+    try:
+        reader = LatestReadingBuffer(FIELDS, capacity=4, max_bunkers=4, name=name)
+        writer.push('bunker-01', datetime(2025, 6, 1, 12), {'temperature': 19.5, 'oxygen_level': 20.9}, 1)
+        assert reader.latest('bunker-01')['oxygen_level'] == 20.9
+
+        with pytest.raises(ValueError):
+            LatestReadingBuffer(FIELDS, capacity=8, max_bunkers=4, name=name)
+        reader.close()
+    finally:
+        writer._shm.unlink()
+        writer.close()
+
+def test_clear_is_seen_by_other_instances():
+    name = f'lataupe-test-{uuid.uuid4().hex[:8]}'
+    first = LatestReadingBuffer(FIELDS, capacity=4, max_bunkers=4, name=name)
+    try:
+        second = LatestReadingBuffer(FIELDS, capacity=4, max_bunkers=4, name=name)
+        first.push('bunker-01', datetime(2025, 6, 1, 12), {'temperature': 19.5}, 1)
+        assert second.latest('bunker-01')['id'] == 1
+
+        # After the clear, bunker-02 takes the slot `second` still has cached for bunker-01
+        first.clear()
+        assert second.latest('bunker-01') is None
+        first.push('bunker-02', datetime(2025, 6, 1, 12), {'temperature': 20.5}, 2)
+        second.push('bunker-01', datetime(2025, 6, 1, 12, 1), {'temperature': 19.0}, 3)
+        assert [r['id'] for r in first.recent('bunker-02')] == [2]
+        assert [r['id'] for r in first.recent('bunker-01')] == [3]
+        assert sorted(second.bunker_ids()) == ['bunker-01', 'bunker-02']
+        second.close()
+    finally:
+        first._shm.unlink()
+        first.close()
+
+def test_slot_left_mid_write_reads_as_cold_until_repaired():
+    import reading_buffer
+
+    buffer = LatestReadingBuffer(FIELDS, capacity=4, max_bunkers=2, read_retries=5)
+    buffer.push('bunker-01', datetime(2025, 6, 1), {'temperature': 20.0}, 1)
+
+    # Simulate a writer process that died between its two sequence bumps
+    offset = buffer._slot_offset(0)
+    name, seq, count = reading_buffer._SLOT_HEADER.unpack_from(buffer._buf, offset)
+    reading_buffer._SLOT_HEADER.pack_into(buffer._buf, offset, name, seq + 1, count)
+    assert buffer.latest('bunker-01') is None
+
+    buffer.push('bunker-01', datetime(2025, 6, 1, 0, 1), {'temperature': 21.0}, 2)
+    assert [r['id'] for r in buffer.recent('bunker-01')] == [2, 1]
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import sqlalchemy as sa
+
+import rollups
+
+FIELDS = ('temperature', 'co2_level')
+
+
+def rollup_table(metadata):
+    return sa.Table(
+        'environmental_rollups', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('bunker_id', sa.String(50), nullable=False),
+        sa.Column('resolution', sa.String(10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime, nullable=False),
+        sa.Column('metric', sa.String(32), nullable=False),
+        sa.Column('sample_count', sa.Integer, nullable=False),
+        sa.Column('min_value', sa.Float, nullable=False),
+        sa.Column('max_value', sa.Float, nullable=False),
+        sa.Column('sum_value', sa.Float, nullable=False),
+        sa.UniqueConstraint(*rollups.ROLLUP_KEY)
+    )
+
+
+def test_accumulate_folds_every_resolution_and_skips_missing_values():
+    start = datetime(2025, 6, 1, 10, 0, 30)
+    rows = [
+        {'bunker_id': 'bunker-01', 'timestamp': start, 'temperature': 20.0, 'co2_level': None},
+        {'bunker_id': 'bunker-01', 'timestamp': start + timedelta(seconds=20), 'temperature': 24.0},
+        {'bunker_id': 'bunker-01', 'timestamp': start + timedelta(minutes=5), 'temperature': 18.0, 'co2_level': 900.0}
+    ]
+    aggregates = rollups.accumulate(rows, FIELDS)
+
+    assert aggregates[('bunker-01', 'minute', datetime(2025, 6, 1, 10, 0), 'temperature')] == [2, 20.0, 24.0, 44.0]
+    assert aggregates[('bunker-01', 'hour', datetime(2025, 6, 1, 10), 'temperature')] == [3, 18.0, 24.0, 62.0]
+    assert aggregates[('bunker-01', 'day', datetime(2025, 6, 1), 'co2_level')] == [1, 900.0, 900.0, 900.0]
+    assert ('bunker-01', 'minute', datetime(2025, 6, 1, 10, 0), 'co2_level') not in aggregates
+
+
+def test_upsert_merges_into_existing_buckets():
+    metadata = sa.MetaData()
+    table = rollup_table(metadata)
+    engine = sa.create_engine('sqlite://')
+    metadata.create_all(engine)
+
+    timestamp = datetime(2025, 6, 1, 10, 0, 30)
+    with engine.begin() as connection:
+        rollups.upsert(connection, table, rollups.accumulate(
+            [{'bunker_id': 'bunker-01', 'timestamp': timestamp, 'temperature': 20.0}], FIELDS))
+        rollups.upsert(connection, table, rollups.accumulate(
+            [{'bunker_id': 'bunker-01', 'timestamp': timestamp, 'temperature': 26.0},
+             {'bunker_id': 'bunker-01', 'timestamp': timestamp, 'temperature': 17.0}], FIELDS))
+
+        row = connection.execute(table.select().where(table.c.resolution == 'minute')).mappings().one()
+        assert (row['sample_count'], row['min_value'], row['max_value'], row['sum_value']) == (3, 17.0, 26.0, 63.0)
+        assert connection.execute(sa.select(sa.func.count()).select_from(table)).scalar() == 3
+
+
+def test_pick_resolution_prefers_the_coarsest_dense_enough():
+    assert rollups.pick_resolution(timedelta(days=30), 20) == 'day'
+    assert rollups.pick_resolution(timedelta(days=30), 200) == 'hour'
+    assert rollups.pick_resolution(timedelta(hours=6), 300) == 'minute'
+    assert rollups.pick_resolution(timedelta(hours=1), 300) is None
+    assert rollups.pick_resolution(timedelta(days=30), None) is None
+
+
+def test_pivot_shapes_buckets_newest_first():
+    def row(start, metric, count, low, high, total):
+        return SimpleNamespace(bunker_id='bunker-01', bucket_start=start, metric=metric,
+                               sample_count=count, min_value=low, max_value=high, sum_value=total)
+
+    early, late = datetime(2025, 6, 1, 10), datetime(2025, 6, 1, 11)
+    buckets = rollups.pivot([
+        row(early, 'temperature', 2, 20.0, 22.0, 42.0),
+        row(late, 'temperature', 4, 19.0, 25.0, 88.0),
+        row(late, 'co2_level', 3, 800.0, 1000.0, 2700.0)
+    ], 'hour')
+
+    assert [bucket['timestamp'] for bucket in buckets] == [late.isoformat(), early.isoformat()]
+    assert buckets[0]['temperature'] == 22.0 and buckets[0]['temperature_min'] == 19.0
+    assert buckets[0]['co2_level_max'] == 1000.0 and buckets[0]['count'] == 4
+    assert 'co2_level' not in buckets[1] and buckets[1]['resolution'] == 'hour'
+
+    starts, columns = rollups.pivot_columns([
+        (late, 'temperature', 4, 19.0, 25.0, 88.0),
+        (early, 'temperature', 2, 20.0, 22.0, 42.0),
+        (late, 'co2_level', 3, 800.0, 1000.0, 2700.0)
+    ], FIELDS)
+    assert starts == [early, late]
+    assert columns['temperature'] == [21.0, 22.0]
+    assert columns['co2_level'] == [None, 900.0]
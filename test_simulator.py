@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, create_engine, func, select
+
+import simulator
+from simulator import SCENARIOS, TelemetrySimulator, bulk_load, to_rows
+
+
+def test_readings_stay_in_scenario_ranges_and_correlate():
+    sim = TelemetrySimulator(['calm', 'storm'], ['normal', 'critical'], interval_seconds=60, seed=3)
+    end = datetime(2026, 1, 2)
+    chunk = np.concatenate([c['co2_level'] for c in sim.chunks(end - timedelta(days=1), end)])
+    assert len(chunk) == 2 * 1440
+
+    columns = next(TelemetrySimulator(['calm'] * 50, ['normal'] * 50, seed=3).chunks(end - timedelta(hours=6), end))
+    low, high = SCENARIOS['normal']['co2_range']
+    assert low <= columns['co2_level'].min() and columns['co2_level'].max() <= high
+    assert np.corrcoef(columns['co2_level'], columns['oxygen_level'])[0, 1] < -0.3
+
+
+def test_chunks_are_time_ordered_and_bounded():
+    sim = TelemetrySimulator.fleet(10, 'mixed', interval_seconds=300, seed=1)
+    end = datetime(2026, 1, 2)
+    chunks = list(sim.chunks(end - timedelta(days=1), end, rows_per_chunk=100))
+    assert all(len(chunk['bunker_id']) <= 100 for chunk in chunks)
+    rows = [row for chunk in chunks for row in to_rows(chunk)]
+    assert len(rows) == 10 * 288
+    assert [row['timestamp'] for row in rows] == sorted(row['timestamp'] for row in rows)
+    assert rows[0]['timestamp'] == end - timedelta(days=1)
+
+
+def test_bulk_load_maps_dashboard_schema_columns():
+    engine = create_engine('sqlite://')
+    table = Table('environmental_data', MetaData(),
+                  Column('id', Integer, primary_key=True), Column('bunker_id', String), Column('timestamp', DateTime),
+                  *(Column(name, Float) for name in ('temperature', 'humidity', 'oxygen_level', 'co2_level',
+                                                     'radiation_level', 'air_quality', 'atmospheric_pressure')))
+    table.metadata.create_all(engine)
+
+    end = datetime(2026, 1, 2)
+    sim = TelemetrySimulator.fleet(5, interval_seconds=3600, seed=2)
+    assert bulk_load(engine, sim.chunks(end - timedelta(days=2), end, rows_per_chunk=40)) == 240
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(table)).scalar() == 240
+        assert connection.execute(select(func.min(table.c.atmospheric_pressure))).scalar() > 1000
+
+
+def test_fleet_mixed_scenarios_are_reproducible():
+    first = TelemetrySimulator.fleet(200, 'mixed', seed=9)
+    second = TelemetrySimulator.fleet(200, 'mixed', seed=9)
+    assert np.array_equal(first.high['co2_level'], second.high['co2_level'])
+    assert set(first.high['co2_level']) <= {scenario['co2_range'][1] for scenario in simulator.SCENARIOS.values()}
@@ -0,0 +1,92 @@
+import pytest
+
+from ttl_store import MemoryBackend, SQLiteBackend, open_backend
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path):
+    def make(**options):
+        if request.param == 'memory':
+            return MemoryBackend(**options)
+        return SQLiteBackend(str(tmp_path / 'store.db'), **options)
+    return make
+
+
+def test_expiry_without_reads(make_store):
+    clock = Clock()
+    store = make_store(clock=clock)
+    store.put('short', b'a', 1010)
+    store.put('long', b'b', 2000)
+    assert store.get('short') == b'a'
+
+    clock.now = 1010
+    assert store.purge_expired() == 1
+    assert store.get('short') is None and store.get('long') == b'b'
+
+    # Writes expire due entries on their own, no cleanup pass needed
+    store.put('other', b'c', 1020)
+    clock.now = 1500
+    store.put('again', b'd', 2000)
+    assert len(store) == 2 and store.nbytes == 2
+
+
+def test_lru_eviction_at_byte_budget(make_store):
+    clock = Clock()
+    store = make_store(max_bytes=10, clock=clock)
+    store.put('a', b'xxxx', 2000)
+    clock.now += 100
+    store.put('b', b'xxxx', 2000)
+    clock.now += 100
+    assert store.get('a') == b'xxxx'       # a is now more recent than b
+    clock.now += 100
+    store.put('c', b'xxxx', 2000)
+    assert store.get('b') is None
+    assert store.get('a') == b'xxxx' and store.get('c') == b'xxxx'
+    assert store.nbytes == 8
+
+    store.put('a', b'y', 2000)              # overwrite adjusts the byte total
+    assert store.nbytes == 5 and store.delete('a') and not store.delete('a')
+
+
+def test_memory_stays_flat_under_overwrites():
+    store = MemoryBackend(max_entries=100)
+    for index in range(20000):
+        store.put(f'key-{index % 150}', b'v', 1e12 + index)
+    assert len(store) == 100
+    assert len(store._heap) <= 2 * len(store) + 64
+
+
+def test_sqlite_is_shared_between_handles(tmp_path):
+    url = f"sqlite:///{tmp_path / 'shared.db'}?mmap_size=1048576"
+    writer, reader = open_backend(url), open_backend(url)
+    writer.put('session', b'payload', 1e12)
+    assert reader.get('session') == b'payload'
+    assert isinstance(open_backend(None), MemoryBackend)
+    with pytest.raises(ValueError):
+        open_backend('redis://localhost')
+    with pytest.raises(ValueError):
+        open_backend(f"sqlite:///{tmp_path / 'shared.db'}?path=/etc/passwd")
+    with pytest.raises(ValueError):
+        open_backend('memory://?max_bytes=lots')
+
+
+def test_sqlite_reads_touch_entries_at_most_once_per_interval(tmp_path):
+    clock = Clock()
+    store = SQLiteBackend(str(tmp_path / 'store.db'), touch_seconds=60, clock=clock)
+    store.put('hot', b'v', 5000)
+
+    def accessed_at():
+        return store._connection().execute("SELECT accessed_at FROM ttl_entries WHERE key = 'hot'").fetchone()[0]
+
+    clock.now += 30
+    assert store.get('hot') == b'v' and accessed_at() == 1000
+    clock.now += 30
+    assert store.get('hot') == b'v' and accessed_at() == 1060
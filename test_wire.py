@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+import rollups
+import wire
+from downsample import lttb_columns
+
+
+def negotiate(header):
+    return wire.negotiate(parse_accept_header(header, MIMEAccept))
+
+
+def test_only_explicit_columnar_types_are_negotiated():
+    assert negotiate('') is None
+    assert negotiate('*/*') is None
+    assert negotiate('application/json') is None
+    assert negotiate('application/vnd.lataupe.columnar+json, */*;q=0.1') == wire.COLUMNAR_JSON
+    assert negotiate('application/vnd.lataupe.columnar+json;q=0.5, application/json') is None
+    if wire.msgpack is not None:
+        assert negotiate('application/x-msgpack') == wire.COLUMNAR_MSGPACK
+
+
+def test_columnar_payload_uses_epoch_milliseconds():
+    payload = wire.columnar([datetime(2025, 1, 1), datetime(2025, 1, 1, 0, 0, 1, 500000)],
+                            {'temperature': [20.5, None]}, bunker_id='b1')
+    assert payload['timestamps'] == [1735689600000, 1735689601500]
+    assert payload['count'] == 2
+    assert wire.encode(payload, wire.COLUMNAR_JSON).startswith(b'{"bunker_id":"b1","count":2')
+
+
+def test_rollup_tuples_pivot_to_parallel_columns():
+    first, second = datetime(2025, 1, 1, 1), datetime(2025, 1, 1, 0)
+    starts, columns = rollups.pivot_columns([
+        (first, 'temperature', 2, 20.0, 22.0, 42.0),
+        (second, 'temperature', 1, 19.0, 19.0, 19.0),
+        (second, 'oxygen_level', 4, 20.0, 21.0, 82.0),
+    ], ('temperature', 'oxygen_level'))
+    assert starts == [second, first]
+    assert columns['temperature'] == [19.0, 21.0]
+    assert columns['oxygen_level_max'] == [21.0, None]
+
+
+def test_lttb_columns_keeps_spike_and_alignment():
+    timestamps = list(range(100))
+    values = [1.0] * 100
+    values[40] = 50.0
+    kept, columns = lttb_columns(timestamps, {'v': values, 'label': timestamps}, 10, ('v',))
+    assert len(kept) == 10 and 40 in kept
+    assert columns['label'] == kept
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Bounded TTL Store
+Byte values with an expiry time, bounded by entry count and total bytes.
+
+MemoryBackend keeps entries in an LRU-ordered dict with a min-heap on
+`expires_at`: expired entries are popped off the heap in O(log n) as
+writes come in, and the least recently used entries go once the byte
+budget is exceeded, so memory stays flat under sustained writes.
+
+SQLiteBackend keeps the same contract in a local database file that
+every worker on the host can open. Expiry and LRU eviction are index
+range deletes, the byte total is kept by triggers, and reads can go
+through SQLite's memory-mapped I/O (`mmap_size`). A read only rewrites
+an entry's access time once it is `touch_seconds` old, so hot keys do
+not turn every read into a write.
+
+    store = open_backend('sqlite:////var/lib/lataupe/secure.db?mmap_size=67108864', max_bytes=64 << 20)
+    store.put('session:42', payload, expires_at=time.time() + 3600)
+"""
+
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class MemoryBackend:
+    """Process-local store: LRU dict plus an expiry min-heap"""
+
+    def __init__(self, max_bytes: int = 64 << 20, max_entries: int = 100000,
+                 clock: Callable[[], float] = time.time):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.clock = clock
+        self.nbytes = 0
+        self._entries: 'OrderedDict[str, Tuple[float, int, bytes]]' = OrderedDict()  # key -> (expires_at, generation, value)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._generations = itertools.count()
+        self._lock = threading.Lock()
+
+    def put(self, key: str, value: bytes, expires_at: float):
+        with self._lock:
+            self._remove(key)
+            generation = next(self._generations)
+            self._entries[key] = (expires_at, generation, value)
+            self.nbytes += len(value)
+            heapq.heappush(self._heap, (expires_at, generation, key))
+            self._expire(self.clock())
+            while self._entries and (self.nbytes > self.max_bytes or len(self._entries) > self.max_entries):
+                self._remove(next(iter(self._entries)))
+            self._compact()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._expire(self.clock())
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.nbytes -= len(entry[2])
+        return True
+
+    def _expire(self, now: float) -> int:
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            _, generation, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == generation:
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def _compact(self):
+        # Overwrites and evictions leave dead heap entries; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(expires_at, generation, key)
+                          for key, (expires_at, generation, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Host-wide store in a SQLite file, shared by every worker that opens it"""
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS ttl_entries ('
+        ' key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,'
+        ' expires_at REAL NOT NULL, accessed_at REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS idx_ttl_entries_expires ON ttl_entries (expires_at)',
+        'CREATE INDEX IF NOT EXISTS idx_ttl_entries_accessed ON ttl_entries (accessed_at)',
+        'CREATE TABLE IF NOT EXISTS ttl_usage (id INTEGER PRIMARY KEY CHECK (id = 1),'
+        ' entries INTEGER NOT NULL, bytes INTEGER NOT NULL)',
+        'INSERT OR IGNORE INTO ttl_usage VALUES (1, 0, 0)',
+        'CREATE TRIGGER IF NOT EXISTS ttl_entries_insert AFTER INSERT ON ttl_entries BEGIN'
+        ' UPDATE ttl_usage SET entries = entries + 1, bytes = bytes + NEW.size; END',
+        'CREATE TRIGGER IF NOT EXISTS ttl_entries_delete AFTER DELETE ON ttl_entries BEGIN'
+        ' UPDATE ttl_usage SET entries = entries - 1, bytes = bytes - OLD.size; END',
+        'CREATE TRIGGER IF NOT EXISTS ttl_entries_update AFTER UPDATE OF size ON ttl_entries BEGIN'
+        ' UPDATE ttl_usage SET bytes = bytes - OLD.size + NEW.size; END'
+    )
+
+    def __init__(self, path: str, max_bytes: int = 64 << 20, max_entries: int = 100000,
+                 mmap_size: int = 0, touch_seconds: float = 60.0, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.mmap_size = mmap_size
+        self.touch_seconds = touch_seconds
+        self.clock = clock
+        self._local = threading.local()
+        with self._connection() as connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not shareable across threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            if self.mmap_size:
+                connection.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            self._local.connection = connection
+        return connection
+
+    def put(self, key: str, value: bytes, expires_at: float):
+        now = self.clock()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'INSERT INTO ttl_entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, '
+                'expires_at = excluded.expires_at, accessed_at = excluded.accessed_at',
+                (key, sqlite3.Binary(value), len(value), expires_at, now)
+            )
+            connection.execute('DELETE FROM ttl_entries WHERE expires_at <= ?', (now,))
+            self._evict(connection)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _evict(self, connection: sqlite3.Connection):
+        while True:
+            entries, nbytes = connection.execute('SELECT entries, bytes FROM ttl_usage').fetchone()
+            if entries == 0 or (nbytes <= self.max_bytes and entries <= self.max_entries):
+                return
+            # Least recently used first, a handful at a time
+            excess = max(entries - self.max_entries, 1)
+            connection.execute(
+                'DELETE FROM ttl_entries WHERE key IN '
+                '(SELECT key FROM ttl_entries ORDER BY accessed_at LIMIT ?)', (min(excess, 64),)
+            )
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = self.clock()
+        connection = self._connection()
+        row = connection.execute('SELECT value, expires_at, accessed_at FROM ttl_entries WHERE key = ?',
+                                 (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            connection.execute('DELETE FROM ttl_entries WHERE key = ? AND expires_at <= ?', (key, now))
+            return None
+        # LRU order only needs touch_seconds resolution: skip the write for recently touched keys
+        if now - row[2] >= self.touch_seconds:
+            connection.execute('UPDATE ttl_entries SET accessed_at = ? WHERE key = ?', (now, key))
+        return bytes(row[0])
+
+    def delete(self, key: str) -> bool:
+        return self._connection().execute('DELETE FROM ttl_entries WHERE key = ?', (key,)).rowcount > 0
+
+    def purge_expired(self) -> int:
+        return self._connection().execute('DELETE FROM ttl_entries WHERE expires_at <= ?',
+                                          (self.clock(),)).rowcount
+
+    @property
+    def nbytes(self) -> int:
+        return self._connection().execute('SELECT bytes FROM ttl_usage').fetchone()[0]
+
+    def __len__(self):
+        return self._connection().execute('SELECT entries FROM ttl_usage').fetchone()[0]
+
+
+# Settings a backend URL may carry, with their types
+URL_OPTIONS = {'max_bytes': int, 'max_entries': int, 'mmap_size': int, 'touch_seconds': float}
+
+
+def open_backend(url: Optional[str] = None, **options):
+    """Backend from a URL: 'memory://' (default) or 'sqlite:///path?mmap_size=N'
+
+    Query parameters (URL_OPTIONS) override `options`; any other
+    parameter, or a value of the wrong type, raises ValueError.
+    """
+    parsed = urlparse(url or 'memory://')
+    for name, values in parse_qs(parsed.query).items():
+        if name not in URL_OPTIONS:
+            raise ValueError(f'Unknown TTL store URL parameter: {name}')
+        options[name] = URL_OPTIONS[name](values[-1])
+    if parsed.scheme == 'memory':
+        options.pop('mmap_size', None)
+        options.pop('touch_seconds', None)
+        return MemoryBackend(**options)
+    if parsed.scheme == 'sqlite':
+        # As in SQLAlchemy URLs: sqlite:///relative.db, sqlite:////absolute.db
+        path = parsed.path[1:]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteBackend(path, **options)
+    raise ValueError(f'Unsupported TTL store URL: {url}')
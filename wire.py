@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Lataupe Bunker Tech - Columnar Wire Format
+Compact history payloads for charting clients.
+
+Instead of one object per reading (every key name, bunker_id and an ISO
+timestamp repeated on each row), a columnar payload carries one array of
+epoch-millisecond timestamps and one parallel array per metric, oldest
+first. It is opt-in through the Accept header, as JSON or MessagePack:
+
+    Accept: application/vnd.lataupe.columnar+json
+    Accept: application/vnd.lataupe.columnar+msgpack
+
+    {"bunker_id": "bunker-01", "resolution": "raw", "count": 3,
+     "timestamps": [1735689600000, 1735689660000, 1735689720000],
+     "columns": {"temperature": [21.0, 21.1, 21.3], ...}}
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is optional: columnar JSON is always offered
+    msgpack = None
+
+DEFAULT_JSON = 'application/json'
+COLUMNAR_JSON = 'application/vnd.lataupe.columnar+json'
+COLUMNAR_MSGPACK = 'application/vnd.lataupe.columnar+msgpack'
+MSGPACK_ALIASES = ('application/msgpack', 'application/x-msgpack')
+
+
+def offered() -> List[str]:
+    """Media types the history endpoint can produce, default first"""
+    types = [DEFAULT_JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        types += [COLUMNAR_MSGPACK, *MSGPACK_ALIASES]
+    return types
+
+
+def negotiate(accept) -> Optional[str]:
+    """Columnar media type requested by a werkzeug Accept header, or None for plain JSON
+
+    Wildcards (`*/*`, `application/*`) resolve to plain JSON: only clients
+    that name a columnar type explicitly get one.
+    """
+    for media_type, quality in accept:  # highest quality first
+        if media_type == DEFAULT_JSON or quality <= 0:
+            return None
+        if media_type in offered():
+            return COLUMNAR_MSGPACK if media_type in MSGPACK_ALIASES else media_type
+    return None
+
+
+def epoch_ms(timestamps: Sequence[datetime]) -> List[int]:
+    """Naive UTC datetimes to epoch milliseconds in one vectorized pass"""
+    return np.array(timestamps, dtype='datetime64[ms]').astype(np.int64).tolist()
+
+
+def columnar(timestamps: Sequence[datetime], columns: Dict[str, Sequence], **meta) -> Dict:
+    """Columnar payload; `timestamps` and every column must be parallel and oldest first"""
+    payload = dict(meta)
+    payload['count'] = len(timestamps)
+    payload['timestamps'] = epoch_ms(timestamps)
+    payload['columns'] = {name: list(values) for name, values in columns.items()}
+    return payload
+
+
+def encode(payload: Dict, media_type: str) -> bytes:
+    if media_type == COLUMNAR_MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')